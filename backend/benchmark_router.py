@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Offline accuracy and latency benchmark for responding-agent routing.
+
+Compares the original keyword precedence (judge > prosecutor > defense),
+the compiled keyword router and, when a model is given, the keyword router
+combined with a hashed n-gram classifier. Can also train that classifier.
+
+The corpus is JSON Lines, one labeled user turn per line:
+    {"text": "...", "role": "judge", "jurisdiction": "United Kingdom"}
+("jurisdiction" is optional.)
+
+Usage:
+    python benchmark_router.py eval CORPUS [--classifier MODEL] [--repeat N]
+    python benchmark_router.py train CORPUS --output MODEL [--holdout FRACTION]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.agent_router import (
+    ROLE_PRIORITY,
+    AgentRouter,
+    HashedNgramClassifier,
+    matcher_for,
+)
+from config import settings
+
+Sample = Tuple[str, str, Optional[str]]
+
+
+def load_corpus(path: str) -> List[Sample]:
+    samples = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            samples.append((item["text"], item["role"], item.get("jurisdiction")))
+    return samples
+
+
+def legacy_route(text: str) -> str:
+    """The routing AgentManager used before the router existed."""
+    text = text.lower()
+    if any(phrase in text for phrase in ["your honor", "judge", "ruling", "objection"]):
+        return "judge"
+    if any(phrase in text for phrase in ["prosecution", "prosecutor", "state's case", "evidence against"]):
+        return "prosecutor"
+    if any(phrase in text for phrase in ["defense", "defendant", "my client", "not guilty"]):
+        return "defense"
+    return "judge"
+
+
+def evaluate(name: str, route: Callable[[str, Optional[str]], str], samples: List[Sample], repeat: int):
+    correct = 0
+    per_role: Dict[str, List[int]] = {role: [0, 0] for role in ROLE_PRIORITY}
+    timings: List[float] = []
+
+    for text, role, jurisdiction in samples:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            predicted = route(text, jurisdiction)
+        timings.append((time.perf_counter() - started) / repeat)
+
+        per_role.setdefault(role, [0, 0])[1] += 1
+        if predicted == role:
+            correct += 1
+            per_role[role][0] += 1
+
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"\n{name}")
+    print(f"   accuracy: {correct / len(samples):.1%} ({correct}/{len(samples)})")
+    for role, (hits, total) in per_role.items():
+        if total:
+            print(f"   {role:<10} recall {hits / total:.1%} ({hits}/{total})")
+    print(f"   latency:  p50 {statistics.median(timings) * 1e6:.1f}us, p99 {p99 * 1e6:.1f}us")
+
+
+def run_eval(args):
+    samples = load_corpus(args.corpus)
+    if not samples:
+        print("❌ Corpus is empty", file=sys.stderr)
+        sys.exit(1)
+    print(f"📊 {len(samples)} labeled turns from {args.corpus}")
+
+    evaluate("legacy precedence", lambda text, _: legacy_route(text), samples, args.repeat)
+
+    # Routers are built up front, one per jurisdiction, as AgentManager does
+    # once per trial, so only routing itself is timed.
+    jurisdictions = {jurisdiction for _, _, jurisdiction in samples}
+
+    keyword_routers = {
+        jurisdiction: AgentRouter(matcher_for(jurisdiction), min_score=settings.router_min_score)
+        for jurisdiction in jurisdictions
+    }
+
+    def keyword_route(text: str, jurisdiction: Optional[str]) -> str:
+        return keyword_routers[jurisdiction].route(text, ROLE_PRIORITY)
+
+    evaluate("keyword router", keyword_route, samples, args.repeat)
+
+    if args.classifier:
+        classifier = HashedNgramClassifier.load(args.classifier)
+        combined_routers = {
+            jurisdiction: AgentRouter(
+                matcher_for(jurisdiction),
+                classifier,
+                settings.router_classifier_weight,
+                settings.router_min_score
+            )
+            for jurisdiction in jurisdictions
+        }
+
+        def combined_route(text: str, jurisdiction: Optional[str]) -> str:
+            return combined_routers[jurisdiction].route(text, ROLE_PRIORITY)
+
+        evaluate("keyword router + classifier", combined_route, samples, args.repeat)
+
+
+def run_train(args):
+    samples = load_corpus(args.corpus)
+    holdout: List[Sample] = []
+    if args.holdout:
+        # Every k-th sample, so the split is deterministic across runs.
+        step = max(2, round(1 / args.holdout))
+        holdout = samples[::step]
+        samples = [sample for index, sample in enumerate(samples) if index % step]
+
+    print(f"🧠 Training on {len(samples)} turns...")
+    classifier = HashedNgramClassifier.train(
+        ((text, role) for text, role, _ in samples),
+        n_features=args.n_features,
+        ngram=args.ngram
+    )
+    classifier.save(args.output)
+    print(f"✅ Saved classifier ({len(classifier.weights)} buckets) to {args.output}")
+
+    if holdout:
+        def classify(text: str, _: Optional[str]) -> str:
+            probabilities = classifier.predict(text)
+            return max(probabilities, key=probabilities.get)
+
+        evaluate(f"classifier alone on {len(holdout)} held-out turns", classify, holdout, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and train responding-agent routing")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    eval_parser = commands.add_parser("eval", help="Measure routing accuracy and latency")
+    eval_parser.add_argument("corpus", help="Labeled JSON Lines corpus")
+    eval_parser.add_argument("--classifier", help="Classifier model written by 'train'")
+    eval_parser.add_argument("--repeat", type=int, default=100, help="Routing calls per turn when timing (default: 100)")
+    eval_parser.set_defaults(handler=run_eval)
+
+    train_parser = commands.add_parser("train", help="Train a hashed n-gram classifier")
+    train_parser.add_argument("corpus", help="Labeled JSON Lines corpus")
+    train_parser.add_argument("--output", required=True, help="Where to write the model (JSON)")
+    train_parser.add_argument("--n-features", type=int, default=1 << 16, help="Hash buckets (default: 65536)")
+    train_parser.add_argument("--ngram", type=int, default=2, help="Longest word n-gram (default: 2)")
+    train_parser.add_argument("--holdout", type=float, default=0.0, help="Fraction of turns held out for evaluation")
+    train_parser.set_defaults(handler=run_train)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,72 @@ from typing import Optional
 class Settings(BaseSettings):
     openjustice_api_url: str = "https://api.staging.openjustice.ai/api"
     openjustice_api_key: Optional[str] = None
+    openjustice_http2: bool = False
+    openjustice_max_connections: int = 100
+    openjustice_max_keepalive_connections: int = 20
+    openjustice_keepalive_expiry: float = 30.0
+    openjustice_connect_timeout: float = 10.0
+    openjustice_read_timeout: float = 60.0
+    openjustice_write_timeout: float = 60.0
+    openjustice_pool_timeout: float = 10.0
+    openjustice_stream_read_timeout: float = 120.0
+    openjustice_stream_max_reconnects: int = 5
+    openjustice_stream_backoff_initial: float = 0.5
+    openjustice_stream_backoff_max: float = 8.0
+    openjustice_cache_ttl_jurisdictions: float = 3600.0
+    openjustice_cache_ttl_legal_areas: float = 3600.0
+    openjustice_cache_ttl_articles: float = 900.0
+    openjustice_cache_stale_ttl: float = 300.0
+    openjustice_cache_max_entries: int = 1024
+    openjustice_fanout_concurrency: int = 8
+    openjustice_fanout_timeout: float = 10.0
     deepgram_api_key: str
     frontend_url: str = "http://localhost:3000"
     backend_host: str = "0.0.0.0"
     backend_port: int = 8000
+    backend_workers: int = 1
+    event_bus_backend: str = "memory"
+    event_bus_max_pending: int = 256
+    redis_url: str = "redis://localhost:6379/0"
+    session_store_backend: str = "memory"
+    session_store_path: str = "sessions.db"
+    session_ttl_seconds: float = 6 * 60 * 60
+    session_ended_ttl_seconds: float = 10 * 60
+    session_max_in_memory: int = 1000
+    extraction_max_workers: int = 2
+    extraction_max_bytes: int = 20 * 1024 * 1024
+    extraction_max_pages: int = 500
+    extraction_pages_per_task: int = 10
+    extraction_ocr_band_height: int = 2000
+    content_cache_max_text_chars: int = 64 * 1024 * 1024
+    content_cache_max_resources: int = 1000
+    content_cache_resource_ttl: float = 24 * 60 * 60
+    upload_max_bytes: int = 100 * 1024 * 1024
+    upload_chunk_max_bytes: int = 1024 * 1024
+    upload_spool_dir: Optional[str] = None
+    ws_max_pending_messages: int = 16
+    ws_outbound_max_queue: int = 64
+    ws_coalesce_interval: float = 0.02
+    ws_coalesce_max_chars: int = 2048
+    prompt_cache_max_entries: int = 256
+    history_window_turns: int = 40
+    history_summary_max_chars: int = 4000
+    router_classifier_path: Optional[str] = None
+    router_classifier_weight: float = 0.5
+    router_min_score: float = 0.35
+    trial_max_responders: int = 1
+    log_level: str = "INFO"
+    log_levels: str = ""
+    log_format: str = "text"
+    log_sample_rate: int = 50
+    speech_max_concurrency: int = 4
+    speech_call_timeout: float = 30.0
+    stt_recognizer: str = "deepgram"
+    tts_cache_enabled: bool = True
+    tts_cache_max_bytes: int = 32 * 1024 * 1024
+    tts_cache_ttl_seconds: float = 24 * 60 * 60
+    tts_cache_dir: Optional[str] = None
+    tts_cache_disk_max_bytes: int = 512 * 1024 * 1024
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,117 @@
+from typing import Any, Dict, Optional, Tuple
+from logging.handlers import QueueHandler, QueueListener
+from config import settings
+import atexit
+import json
+import logging
+import queue
+import sys
+
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "sample"}
+
+class LazyJSON:
+    """Defers ``json.dumps`` until a record is actually emitted.
+
+    ``logger.debug("Payload: %s", LazyJSON(payload))`` costs nothing when
+    DEBUG is disabled for that logger.
+    """
+
+    __slots__ = ("value", "indent")
+
+    def __init__(self, value: Any, indent: Optional[int] = None):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, indent=self.indent, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in ``n`` records per call site for records logged with ``extra={"sample": n}``.
+
+    Runs before a record is queued, so dropped records cost one counter bump.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.counts: Dict[Tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, "sample", None)
+        if not every or every <= 1:
+            return True
+
+        key = (record.pathname, record.lineno)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        if count % every:
+            return False
+
+        record.sampled = every
+        return True
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RESERVED_ATTRS}
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+_listener: Optional[QueueListener] = None
+
+def parse_log_levels(spec: str) -> Dict[str, str]:
+    """Parses ``"services.openjustice=DEBUG,ws_handlers=WARNING"``."""
+    levels = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging():
+    """Routes all backend logging through a queue drained by a background thread.
+
+    Callers only format the message and enqueue it; writing to stderr happens
+    on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JSONFormatter() if settings.log_format == "json" else TextFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper())
+    root.addHandler(queue_handler)
+
+    for name, level in parse_log_levels(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,11 +1,43 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
+import os
 from config import settings
+from services.openjustice import openjustice_service
+from services.speech_service import speech_service
+from services.event_bus import event_bus
+from services.document_extraction import document_extractor
+from services.content_cache import content_cache
+from services import metrics
+from routers.trial import trial_sessions
+from ws_handlers.fact_gathering import active_fact_gathering_sessions
 from routers import configuration, trial
 from ws_handlers.trial_session import router as ws_trial_router
 from ws_handlers.fact_gathering import router as ws_fact_gathering_router
+from logging_config import setup_logging
+import logging
 
-app = FastAPI(title="Mock Trial Simulator API", version="1.0.0")
+setup_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await openjustice_service.start()
+    yield
+    await openjustice_service.close()
+    speech_service.close()
+    document_extractor.close()
+    await trial_sessions.close()
+    await active_fact_gathering_sessions.close()
+    await event_bus.close()
+
+metrics.register_cache("openjustice", openjustice_service.cache.get_stats, ["hits", "stale_hits", "coalesced"], ["misses"])
+metrics.register_cache("tts", lambda: speech_service.tts_cache and speech_service.tts_cache.get_stats(), ["hits", "disk_hits"], ["misses"])
+metrics.register_cache("extracted_text", content_cache.get_stats, ["text_hits"], ["text_misses"])
+metrics.register_cache("uploaded_resource", content_cache.get_stats, ["resource_hits"], ["resource_misses"])
+
+app = FastAPI(title="Mock Trial Simulator API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 app.include_router(configuration.router, prefix="/api/configuration", tags=["configuration"])
@@ -30,9 +63,30 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "worker_pid": os.getpid()}
+
+@app.get("/stats")
+async def stats():
+    return {
+        "openjustice_pool": openjustice_service.get_pool_stats(),
+        "openjustice_cache": openjustice_service.cache.get_stats(),
+        "content_cache": content_cache.get_stats(),
+        "speech": speech_service.get_stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=settings.backend_host, port=settings.backend_port)
+    
+    if settings.backend_workers > 1:
+        if settings.session_store_backend == "memory":
+            raise SystemExit("BACKEND_WORKERS > 1 requires a shared session store (SESSION_STORE_BACKEND=sqlite)")
+        if settings.event_bus_backend == "memory":
+            raise SystemExit("BACKEND_WORKERS > 1 requires a cross-worker event bus (EVENT_BUS_BACKEND=redis)")
+        uvicorn.run("main:app", host=settings.backend_host, port=settings.backend_port, workers=settings.backend_workers)
+    else:
+        uvicorn.run(app, host=settings.backend_host, port=settings.backend_port)
 
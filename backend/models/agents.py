@@ -21,3 +21,8 @@ class AgentResponse(BaseModel):
     text: str
     reasoning: Optional[str] = None
 
+class AgentResponseDelta(BaseModel):
+    role: AgentRole
+    text: str
+    position: int = 0
+    is_final: bool = False
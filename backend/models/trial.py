@@ -27,6 +27,21 @@ class FactGatheringMessage(BaseModel):
 class NAPStreamEvent(BaseModel):
     event: str
     data: Dict[str, Any]
+    id: Optional[str] = None
+
+class TranscriptEvent(BaseModel):
+    text: str
+    is_final: bool
+
+class ExtractionJob(BaseModel):
+    job_id: str
+    session_id: str
+    filename: str
+    status: Literal["pending", "running", "completed", "failed"]
+    completed: int = 0
+    total: int = 0
+    text_length: int = 0
+    error: Optional[str] = None
 
 class RoleConfig(BaseModel):
     role: RoleType
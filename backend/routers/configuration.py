@@ -1,36 +1,51 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from typing import List, Dict, Any
 from services.openjustice import openjustice_service
+from services.response_cache import CacheEntry
 
 router = APIRouter()
 
-@router.get("/jurisdictions")
-async def get_jurisdictions() -> List[Dict[str, Any]]:
+def cached_json_response(request: Request, entry: CacheEntry) -> Response:
+    etag = f'"{entry.etag}"'
+    if entry.ttl > 0:
+        cache_control = f"public, max-age={entry.max_age}, stale-while-revalidate={int(entry.stale_ttl)}"
+    else:
+        cache_control = "no-store"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    return JSONResponse(content=entry.value, headers=headers)
+
+@router.get("/jurisdictions", response_model=List[Dict[str, Any]])
+async def get_jurisdictions(request: Request) -> Response:
     try:
-        jurisdictions = await openjustice_service.get_jurisdictions()
-        return jurisdictions
+        entry = await openjustice_service.get_jurisdictions_entry()
+        return cached_json_response(request, entry)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/legal-areas/{jurisdiction}")
-async def get_legal_areas(jurisdiction: str) -> List[Dict[str, Any]]:
+@router.get("/legal-areas/{jurisdiction}", response_model=List[Dict[str, Any]])
+async def get_legal_areas(request: Request, jurisdiction: str) -> Response:
     try:
-        legal_areas = await openjustice_service.get_legal_areas(jurisdiction)
-        return legal_areas
+        entry = await openjustice_service.get_legal_areas_entry(jurisdiction)
+        return cached_json_response(request, entry)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/articles")
+@router.get("/articles", response_model=List[Dict[str, Any]])
 async def search_articles(
+    request: Request,
     jurisdiction: str,
     legal_area: str,
     query: str = None
-) -> List[Dict[str, Any]]:
+) -> Response:
     try:
-        articles = await openjustice_service.search_articles(
+        entry = await openjustice_service.search_articles_entry(
             jurisdiction, legal_area, query
         )
-        return articles
+        return cached_json_response(request, entry)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
@@ -1,27 +1,115 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import Dict, Any
-from models.trial import CreateTrialRequest, TrialSession, TrialStatus, CaseContextConfig
+from typing import Any, Callable, Dict, Optional
+from models.trial import (
+    CreateTrialRequest,
+    ExtractionJob,
+    TrialSession,
+    TrialStatus,
+    CaseContextConfig,
+    RoleConfig,
+    LegalPropertiesConfig,
+)
 from services.agent_manager import AgentManager
+from services.conversation_history import ConversationHistory
+from services.session_store import create_session_store
+from services.event_bus import event_bus
+from services.document_extraction import document_extractor
+from services.content_cache import content_cache, content_hash
+from config import settings
 from datetime import datetime
+import asyncio
 import uuid
-import PyPDF2
-import io
-from PIL import Image
-import pytesseract
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-trial_sessions: Dict[str, Dict[str, Any]] = {}
+def serialize_trial_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    legal_properties = session.get("legal_properties")
+    return {
+        "session_id": session["session_id"],
+        "status": session["status"],
+        "roles": [role.model_dump(mode="json") for role in session["roles"]],
+        "legal_properties": legal_properties.model_dump(mode="json") if legal_properties else None,
+        "conversation_id": session.get("conversation_id"),
+        "trial_flow_id": session.get("trial_flow_id"),
+        "fact_flow_id": session.get("fact_flow_id"),
+        "legal_context": session["legal_context"],
+        "case_context": session["case_context"].model_dump(mode="json"),
+        "agent_manager": session["agent_manager"].to_dict(),
+        "messages": session["messages"].to_dict(),
+        "streaming_tts": session.get("streaming_tts", False),
+        "binary_audio": session.get("binary_audio", False),
+        "created_at": session["created_at"].isoformat(),
+        "updated_at": session["updated_at"].isoformat()
+    }
+
+def deserialize_trial_session(data: Dict[str, Any]) -> Dict[str, Any]:
+    legal_properties = data.get("legal_properties")
+    return {
+        **data,
+        "status": TrialStatus(data["status"]),
+        "roles": [RoleConfig(**role) for role in data["roles"]],
+        "legal_properties": LegalPropertiesConfig(**legal_properties) if legal_properties else None,
+        "case_context": CaseContextConfig(**data["case_context"]),
+        "agent_manager": AgentManager.from_dict(data["agent_manager"]),
+        "messages": ConversationHistory.from_dict(
+            data.get("messages"),
+            settings.history_window_turns,
+            settings.history_summary_max_chars
+        ),
+        "created_at": datetime.fromisoformat(data["created_at"]),
+        "updated_at": datetime.fromisoformat(data["updated_at"])
+    }
+
+def merge_trial_session(session: Dict[str, Any], latest: Dict[str, Any]):
+    """Keeps REST-side changes when the live socket saves an older copy.
+
+    Documents attached and the trial being ended happen outside the socket,
+    so they are carried over from the newer stored copy; everything else
+    is owned by the socket and its copy wins.
+    """
+    additional_info = session["case_context"].additional_info
+    for filename, text in latest["case_context"].additional_info.items():
+        additional_info.setdefault(filename, text)
+    if latest["status"] == TrialStatus.ENDED:
+        session["status"] = TrialStatus.ENDED
+
+trial_sessions = create_session_store(
+    "trial",
+    serialize_trial_session,
+    deserialize_trial_session,
+    merge=merge_trial_session
+)
+
+def trial_session_ttl(session: Dict[str, Any]) -> Optional[float]:
+    return settings.session_ended_ttl_seconds if session["status"] == TrialStatus.ENDED else None
+
+async def save_trial_session(session: Dict[str, Any]):
+    session["updated_at"] = datetime.now()
+    await trial_sessions.save(session["session_id"], session, ttl=trial_session_ttl(session))
+
+async def update_trial_session(
+    session_id: str,
+    mutate: Callable[[Dict[str, Any]], None]
+) -> Optional[Dict[str, Any]]:
+    """Applies a change to the latest stored copy of a trial session."""
+    def apply(session: Dict[str, Any]):
+        mutate(session)
+        session["updated_at"] = datetime.now()
+
+    return await trial_sessions.update(session_id, apply, trial_session_ttl)
 
 @router.post("/create")
 async def create_trial(request: CreateTrialRequest) -> Dict[str, Any]:
-    print(f"[TRIAL] Creating new trial session...")
-    print(f"[TRIAL] Request data: conversationId={request.conversationId}, flowId={request.flowId}")
-    print(f"[TRIAL] Roles: {[role.role for role in request.roles if role.enabled]}")
+    logger.debug("Creating new trial session...")
+    logger.debug("Request data: conversationId=%s, flowId=%s", request.conversationId, request.flowId)
+    logger.debug("Roles: %s", [role.role for role in request.roles if role.enabled])
     
     try:
         session_id = str(uuid.uuid4())
-        print(f"[TRIAL] Generated session_id: {session_id}")
+        logger.debug("Generated session_id: %s", session_id)
         
         legal_context = {
             "jurisdiction": request.legal_properties.jurisdiction if request.legal_properties else "United States",
@@ -33,7 +121,7 @@ async def create_trial(request: CreateTrialRequest) -> Dict[str, Any]:
             additional_info={}
         )
         
-        print(f"[TRIAL] Creating agent manager...")
+        logger.debug("Creating agent manager...")
         agent_manager = AgentManager(
             session_id=session_id,
             conversation_id=request.conversationId,
@@ -45,7 +133,7 @@ async def create_trial(request: CreateTrialRequest) -> Dict[str, Any]:
             legal_context=legal_context,
             case_context=case_context
         )
-        print(f"[TRIAL] Agents created: {len(agent_manager.get_all_agents())} agents")
+        logger.info("Agents created: %s agents", len(agent_manager.get_all_agents()))
         
         session = {
             "session_id": session_id,
@@ -56,15 +144,19 @@ async def create_trial(request: CreateTrialRequest) -> Dict[str, Any]:
             "trial_flow_id": request.flowId,
             "fact_flow_id": request.factFlowId,
             "legal_context": legal_context,
+            "case_context": case_context,
             "agent_manager": agent_manager,
-            "messages": [],
+            "messages": ConversationHistory(
+                settings.history_window_turns,
+                settings.history_summary_max_chars
+            ),
             "created_at": datetime.now(),
             "updated_at": datetime.now()
         }
         
-        trial_sessions[session_id] = session
-        print(f"[TRIAL] Session {session_id} stored in trial_sessions")
-        print(f"[TRIAL] Total active sessions: {len(trial_sessions)}")
+        await trial_sessions.save(session_id, session)
+        logger.debug("Session %s stored in trial_sessions", session_id)
+        logger.debug("Total active sessions: %s", await trial_sessions.count())
         
         return {
             "session_id": session_id,
@@ -83,16 +175,14 @@ async def create_trial(request: CreateTrialRequest) -> Dict[str, Any]:
 
 @router.get("/{session_id}")
 async def get_trial_session(session_id: str) -> Dict[str, Any]:
-    print(f"[TRIAL] GET request for session: {session_id}")
-    print(f"[TRIAL] Available sessions: {list(trial_sessions.keys())}")
-    
-    if session_id not in trial_sessions:
-        print(f"[TRIAL] Session {session_id} not found!")
+    logger.debug("GET request for session: %s", session_id)
+    session = await trial_sessions.get(session_id)
+    if session is None:
+        logger.warning("Session %s not found!", session_id)
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = trial_sessions[session_id]
     agent_manager = session["agent_manager"]
-    print(f"[TRIAL] Session found with {len(agent_manager.get_all_agents())} agents")
+    logger.debug("Session found with %s agents", len(agent_manager.get_all_agents()))
     
     return {
         "session_id": session_id,
@@ -109,52 +199,125 @@ async def get_trial_session(session_id: str) -> Dict[str, Any]:
             }
             for agent in agent_manager.get_all_agents().values()
         ],
-        "messages": session["messages"]
+        "messages": session["messages"].to_messages(),
+        "summary": session["messages"].summary
     }
 
-@router.post("/{session_id}/context")
-async def upload_context_document(
-    session_id: str,
-    file: UploadFile = File(...)
-) -> Dict[str, Any]:
-    if session_id not in trial_sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
+def keep_running_job(record: Dict[str, Any], latest: Dict[str, Any]):
+    """The worker running a job is its only writer, so its copy always wins."""
+
+# Job state goes through a session store so that a poll reaching any worker
+# sees the job, whichever worker runs it. Progress from parallel parts can
+# save concurrently; a losing save simply retries with the current record.
+extraction_jobs = create_session_store("extraction_job", dict, dict, merge=keep_running_job)
+
+async def save_extraction_job(record: Dict[str, Any], job: ExtractionJob):
+    record.update(job.model_dump())
+    ttl = settings.session_ended_ttl_seconds if job.status in ("completed", "failed") else None
+    await extraction_jobs.save(job.job_id, record, ttl=ttl)
+
+async def run_extraction_job(job: ExtractionJob, record: Dict[str, Any], content: bytes, cache_key: str):
+    channel = f"trial:{job.session_id}"
+    
+    async def publish_progress(job: ExtractionJob):
+        await save_extraction_job(record, job)
+        await event_bus.publish(channel, {"type": "extraction_progress", **job.model_dump()})
     
     try:
-        content = await file.read()
-        extracted_text = ""
-        
-        if file.filename.endswith('.pdf'):
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            for page in pdf_reader.pages:
-                extracted_text += page.extract_text()
-        
-        elif file.filename.endswith(('.png', '.jpg', '.jpeg')):
-            image = Image.open(io.BytesIO(content))
-            extracted_text = pytesseract.image_to_string(image)
-        
+        extracted_text = content_cache.get_text(cache_key)
+        if extracted_text is None:
+            extracted_text = await document_extractor.extract(job, content, publish_progress)
+            content_cache.put_text(cache_key, extracted_text)
         else:
-            extracted_text = content.decode('utf-8')
+            logger.info("Reusing extracted text for %s (sha256 %s)", job.filename, cache_key[:12])
         
-        session = trial_sessions[session_id]
-        session["case_context"].additional_info[file.filename] = extracted_text
+        def attach_document(session: Dict[str, Any]):
+            session["case_context"].additional_info[job.filename] = extracted_text
         
-        return {
-            "filename": file.filename,
-            "extracted_text_length": len(extracted_text),
-            "status": "processed"
-        }
+        if await update_trial_session(job.session_id, attach_document) is None:
+            raise Exception("Session not found")
+        
+        job.status = "completed"
+        job.text_length = len(extracted_text)
+        await save_extraction_job(record, job)
+        logger.debug("Extraction job %s completed: %s (%s chars)", job.job_id, job.filename, job.text_length)
+        await event_bus.publish(channel, {
+            "type": "context_updated",
+            "filename": job.filename,
+            "job_id": job.job_id
+        })
+    
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to process document: {str(e)}")
+        logger.error("Extraction job %s failed: %s: %s", job.job_id, type(e).__name__, e)
+        job.status = "failed"
+        job.error = str(e)
+        try:
+            await save_extraction_job(record, job)
+        except Exception as save_error:
+            logger.error("Could not record failure of extraction job %s: %s", job.job_id, save_error)
+        await event_bus.publish(channel, {"type": "extraction_failed", **job.model_dump()})
+
+extraction_tasks = set()
+
+@router.post("/{session_id}/context")
+async def upload_context_document(
+    session_id: str,
+    file: UploadFile = File(...),
+    wait: bool = False
+) -> Dict[str, Any]:
+    session = await trial_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    content = await file.read(settings.extraction_max_bytes + 1)
+    if len(content) > settings.extraction_max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {settings.extraction_max_bytes} byte upload limit"
+        )
+    
+    extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    cache_key = f"{await content_hash(content)}:{extension}"
+    
+    job = document_extractor.create_job(session_id, file.filename)
+    record: Dict[str, Any] = {}
+    await save_extraction_job(record, job)
+    task = asyncio.create_task(run_extraction_job(job, record, content, cache_key))
+    extraction_tasks.add(task)
+    task.add_done_callback(extraction_tasks.discard)
+    
+    if not wait:
+        return job.model_dump()
+    
+    await task
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to process document: {job.error}")
+    
+    return {
+        "filename": file.filename,
+        "extracted_text_length": job.text_length,
+        "status": "processed"
+    }
+
+@router.get("/{session_id}/context/jobs/{job_id}")
+async def get_extraction_job(session_id: str, job_id: str) -> Dict[str, Any]:
+    record = await extraction_jobs.get(job_id)
+    if record is None or record["session_id"] != session_id:
+        raise HTTPException(status_code=404, detail="Extraction job not found")
+    
+    return {field: record[field] for field in ExtractionJob.model_fields}
 
 @router.delete("/{session_id}")
 async def end_trial(session_id: str) -> Dict[str, Any]:
-    if session_id not in trial_sessions:
+    def end(session: Dict[str, Any]):
+        session["status"] = TrialStatus.ENDED
+    
+    if await update_trial_session(session_id, end) is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = trial_sessions[session_id]
-    session["status"] = TrialStatus.ENDED
+    await event_bus.publish(f"trial:{session_id}", {
+        "type": "trial_ended"
+    })
     
     return {"status": "ended", "session_id": session_id}
 
@@ -1,7 +1,12 @@
-from typing import Dict, List, Any, Optional, Tuple
-from models.agents import AgentRole, AgentConfig, AgentResponse
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator
+from models.agents import AgentRole, AgentConfig, AgentResponse, AgentResponseDelta
 from models.trial import RoleType, LegalPropertiesConfig, CaseContextConfig
 from services.openjustice import openjustice_service
+from services import metrics
+from services.prompts import ROLE_PROFILES, render_role_prompt
+from services.conversation_history import ConversationHistory
+from services.agent_router import AgentRouter
+from config import settings
 from pyagentspec.agent import Agent
 from pyagentspec.property import Property
 from pyagentspec.llms import OpenAiConfig
@@ -9,16 +14,124 @@ import json
 import re
 import os
 from pathlib import Path
+from contextlib import aclosing
+import asyncio
+import hashlib
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FlowConversation:
+    """An OpenJustice conversation that agent turns run through.
+
+    ``prompt_key`` is the role prompt it currently holds. ``backlog`` collects
+    lines of the trial it has not seen yet, which happens when other roles
+    answered on their own conversations. The backlog is sent ahead of its
+    next user message.
+    """
+
+    __slots__ = ("conversation_id", "execution_id", "prompt_key", "backlog")
+
+    def __init__(
+        self,
+        conversation_id: Optional[str] = None,
+        execution_id: Optional[str] = None,
+        prompt_key: Optional[str] = None,
+        backlog: Optional[List[str]] = None
+    ):
+        self.conversation_id = conversation_id
+        self.execution_id = execution_id
+        self.prompt_key = prompt_key
+        self.backlog: List[str] = backlog or []
+
+    def add_backlog(self, line: str, limit: int):
+        self.backlog.append(line)
+        del self.backlog[:-limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "conversation_id": self.conversation_id,
+            "execution_id": self.execution_id,
+            "prompt_key": self.prompt_key,
+            "backlog": self.backlog,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FlowConversation":
+        return cls(**data)
 
 class AgentManager:
     def __init__(self, session_id: str = "", conversation_id: str = "", flow_id: str = ""):
         self.agents: Dict[str, AgentConfig] = {}
         self.agent_spec_agents: Dict[str, Agent] = {}
-        self.conversation_history: List[Dict[str, str]] = []
+        self.conversation_history = ConversationHistory(
+            settings.history_window_turns,
+            settings.history_summary_max_chars
+        )
         self.session_id = session_id
-        self.conversation_id = conversation_id
         self.trial_flow_id = flow_id
-        self.trial_execution_id: Optional[str] = None
+        # The session's OpenJustice conversation answers every turn's first
+        # responder. With TRIAL_MAX_RESPONDERS above 1, each other role that
+        # answers gets a conversation of its own, so replies can be generated
+        # concurrently.
+        self.conversation = FlowConversation(conversation_id)
+        self.side_conversations: Dict[str, FlowConversation] = {}
+        self.max_responders = settings.trial_max_responders
+        self.roles: List[RoleType] = []
+        self.legal_context: Dict[str, Any] = {}
+        self.case_context: Optional[CaseContextConfig] = None
+        # Role and prompt fingerprint per agent. A conversation is only sent a
+        # rendered prompt again when the role it answers for changes or the
+        # agents are rebuilt with a different context.
+        self.prompt_keys: Dict[str, str] = {}
+        self.router = AgentRouter.for_jurisdiction(None)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "conversation_id": self.conversation.conversation_id,
+            "trial_flow_id": self.trial_flow_id,
+            "trial_execution_id": self.conversation.execution_id,
+            "roles": [role.value for role in self.roles],
+            "legal_context": self.legal_context,
+            "case_context": self.case_context.model_dump(mode="json") if self.case_context else None,
+            "conversation_history": self.conversation_history.to_dict(),
+            "conversation_prompt": self.conversation.prompt_key,
+            "conversation_backlog": self.conversation.backlog,
+            "side_conversations": {
+                role: conversation.to_dict()
+                for role, conversation in self.side_conversations.items()
+            },
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AgentManager":
+        manager = cls(
+            session_id=data["session_id"],
+            conversation_id=data["conversation_id"],
+            flow_id=data["trial_flow_id"]
+        )
+        if data.get("case_context") is not None:
+            manager.create_agents(
+                session_id=data["session_id"],
+                roles=[RoleType(role) for role in data["roles"]],
+                legal_context=data["legal_context"],
+                case_context=CaseContextConfig(**data["case_context"])
+            )
+        manager.conversation.execution_id = data.get("trial_execution_id")
+        manager.conversation.prompt_key = data.get("conversation_prompt")
+        manager.conversation.backlog = data.get("conversation_backlog", [])
+        manager.side_conversations = {
+            role: FlowConversation.from_dict(conversation)
+            for role, conversation in data.get("side_conversations", {}).items()
+        }
+        manager.conversation_history = ConversationHistory.from_dict(
+            data.get("conversation_history"),
+            settings.history_window_turns,
+            settings.history_summary_max_chars
+        )
+        return manager
     
     def create_agents(
         self,
@@ -29,11 +142,18 @@ class AgentManager:
     ):
         self.agents = {}
         self.agent_spec_agents = {}
+        self.prompt_keys = {}
+        self.roles = list(roles)
+        self.legal_context = legal_context
+        self.case_context = case_context
+        self.router = AgentRouter.for_jurisdiction(legal_context.get('jurisdiction'))
         
         for role in roles:
             agent_spec, agent_config = self._create_agent_config(role, legal_context, case_context)
             self.agent_spec_agents[role.value] = agent_spec
             self.agents[role.value] = agent_config
+            prompt_hash = hashlib.sha1(agent_config.system_prompt.encode("utf-8")).hexdigest()
+            self.prompt_keys[role.value] = f"{role.value}:{prompt_hash}"
     
     def _create_agent_config(
         self,
@@ -56,308 +176,277 @@ class AgentManager:
             model_id="gpt-4o-mini-2024-07-18"
         )
         
-        role_configs = {
-            RoleType.JUDGE: {
-                "name": "Judge Anderson",
-                "system_prompt_template": self._get_judge_prompt_template(),
-                "voice_id": "aura-athena-en",
-                "personality_traits": ["impartial", "authoritative", "procedural", "fair"]
-            },
-            RoleType.PROSECUTOR: {
-                "name": "District Attorney Martinez",
-                "system_prompt_template": self._get_prosecutor_prompt_template(),
-                "voice_id": "aura-arcas-en",
-                "personality_traits": ["assertive", "methodical", "persuasive", "justice-focused"]
-            },
-            RoleType.DEFENSE: {
-                "name": "Defense Attorney Chen",
-                "system_prompt_template": self._get_defense_prompt_template(),
-                "voice_id": "aura-angus-en",
-                "personality_traits": ["protective", "analytical", "strategic", "client-focused"]
-            }
-        }
-        
-        config = role_configs[role]
+        profile = ROLE_PROFILES[role]
         
         agent_spec = Agent(
-            name=config["name"],
-            system_prompt=config["system_prompt_template"],
+            name=profile.name,
+            system_prompt=profile.template.source,
             llm_config=llm_config,
             inputs=[jurisdiction_property, legal_areas_property, case_context_property]
         )
         
-        system_prompt = self._render_system_prompt(
-            config["system_prompt_template"],
-            legal_context,
-            case_context
-        )
+        system_prompt = self._render_system_prompt(role, legal_context, case_context)
         
         agent_config = AgentConfig(
             role=AgentRole(role.value),
-            name=config["name"],
+            name=profile.name,
             system_prompt=system_prompt,
-            voice_id=config["voice_id"],
-            personality_traits=config["personality_traits"],
+            voice_id=profile.voice_id,
+            personality_traits=profile.personality_traits,
             legal_context=legal_context,
             case_context=case_context.description
         )
         
         return agent_spec, agent_config
     
-    def _get_judge_prompt_template(self) -> str:
-        return """You are Judge Anderson, presiding over a {{jurisdiction}} court.
-
-ROLE: You are an impartial judge responsible for maintaining courtroom order, making legal rulings, and ensuring fair proceedings.
-
-CASE CONTEXT:
-{{case_context}}
-
-LEGAL FRAMEWORK:
-- Jurisdiction: {{jurisdiction}}
-- Applicable Legal Areas: {{legal_areas}}
-
-RESPONSIBILITIES:
-- Maintain courtroom decorum and procedure
-- Rule on objections and motions
-- Ensure both sides have fair opportunity to present
-- Make decisions based on law and evidence
-- Provide clear legal reasoning for rulings
-
-STYLE:
-- Speak with authority and clarity
-- Be impartial and fair to both sides
-- Use proper legal terminology
-- Keep responses concise but complete
-- Address parties formally (Counselor, Attorney)
-
-Remember: You are neutral and must not favor either side. Base all decisions on law and procedure."""
-    
-    def _get_judge_prompt(self, legal_context: Dict[str, Any], case_context: CaseContextConfig) -> str:
-        return self._render_system_prompt(
-            self._get_judge_prompt_template(),
-            legal_context,
-            case_context
-        )
-    
-    def _get_prosecutor_prompt_template(self) -> str:
-        return """You are District Attorney Martinez, the prosecutor in this {{jurisdiction}} court case.
-
-ROLE: You represent the state/government and seek to prove the defendant's guilt beyond a reasonable doubt.
-
-CASE CONTEXT:
-{{case_context}}
-
-LEGAL FRAMEWORK:
-- Jurisdiction: {{jurisdiction}}
-- Applicable Legal Areas: {{legal_areas}}
-
-RESPONSIBILITIES:
-- Present evidence against the defendant
-- Examine and cross-examine witnesses
-- Make compelling arguments for conviction
-- Object to improper defense tactics
-- Uphold justice and the rule of law
-
-STRATEGY:
-- Build systematic case against defendant
-- Highlight incriminating evidence
-- Challenge defense claims with facts
-- Anticipate and counter defense arguments
-- Maintain professional demeanor
-
-STYLE:
-- Be assertive but respectful
-- Use evidence and facts to support claims
-- Speak with conviction and confidence
-- Address the judge properly ("Your Honor")
-- Keep arguments logical and structured
-
-Remember: Your goal is to prove guilt, but always within the bounds of law and ethics."""
-    
-    def _get_prosecutor_prompt(self, legal_context: Dict[str, Any], case_context: CaseContextConfig) -> str:
-        return self._render_system_prompt(
-            self._get_prosecutor_prompt_template(),
-            legal_context,
-            case_context
-        )
-    
-    def _get_defense_prompt_template(self) -> str:
-        return """You are Defense Attorney Chen, representing the defendant in this {{jurisdiction}} court case.
-
-ROLE: You are the defendant's advocate, working to protect their rights and achieve the best possible outcome.
-
-CASE CONTEXT:
-{{case_context}}
-
-LEGAL FRAMEWORK:
-- Jurisdiction: {{jurisdiction}}
-- Applicable Legal Areas: {{legal_areas}}
-
-RESPONSIBILITIES:
-- Protect defendant's constitutional rights
-- Challenge prosecution's evidence and arguments
-- Present alternative explanations and defenses
-- Cross-examine prosecution witnesses
-- Ensure fair trial procedures
-
-STRATEGY:
-- Cast reasonable doubt on prosecution's case
-- Highlight weaknesses in their evidence
-- Present exculpatory evidence
-- Protect client from unfair procedures
-- Humanize the defendant
-
-STYLE:
-- Be protective of your client
-- Question prosecution claims vigorously
-- Use law to support your positions
-- Address the judge properly ("Your Honor")
-- Balance passion with professionalism
-
-Remember: Everyone deserves a strong defense. Your duty is to your client within the bounds of legal ethics."""
-    
-    def _get_defense_prompt(self, legal_context: Dict[str, Any], case_context: CaseContextConfig) -> str:
-        return self._render_system_prompt(
-            self._get_defense_prompt_template(),
-            legal_context,
-            case_context
-        )
-    
     def _render_system_prompt(
         self,
-        template: str,
+        role: RoleType,
         legal_context: Dict[str, Any],
         case_context: CaseContextConfig
     ) -> str:
-        jurisdiction = legal_context.get('jurisdiction', 'United States')
-        legal_areas = legal_context.get('legal_areas', [])
-        case_context_str = case_context.description
-        
-        legal_areas_str = ', '.join(legal_areas) if legal_areas else ''
-        
-        prompt = template.replace('{{jurisdiction}}', jurisdiction)
-        prompt = prompt.replace('{{case_context}}', case_context_str)
-        prompt = prompt.replace('{{legal_areas}}', legal_areas_str)
-        
-        return prompt
+        return render_role_prompt(
+            role,
+            legal_context.get('jurisdiction', 'United States'),
+            legal_context.get('legal_areas', []),
+            case_context.description
+        )
+    
+    async def get_agent_responses(
+        self,
+        user_message: str,
+        session_id: str
+    ) -> List[AgentResponse]:
+        """Every reply to one user turn, in speaking order."""
+        roles: Dict[int, AgentRole] = {}
+        parts: Dict[int, List[str]] = {}
+        
+        async for delta in self.stream_agent_response(user_message, session_id):
+            roles[delta.position] = delta.role
+            parts.setdefault(delta.position, []).append(delta.text)
+        
+        return [
+            AgentResponse(role=roles[position], text="".join(parts[position]))
+            for position in sorted(roles)
+        ]
     
     async def get_agent_response(
         self,
         user_message: str,
         session_id: str
     ) -> AgentResponse:
-        print(f"[AgentManager] Getting agent response for message: '{user_message[:50]}...'")
-        print(f"[AgentManager] Available agents: {list(self.agents.keys())}")
-        
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
-        
-        responding_role = self._determine_responding_agent(user_message)
-        print(f"[AgentManager] Determined responding role: {responding_role}")
-        
-        if responding_role not in self.agents:
-            print(f"[AgentManager] Role '{responding_role}' not found, using first available agent")
-            responding_role = next(iter(self.agents.keys()))
-        
-        print(f"[AgentManager] Final responding role: {responding_role}")
-        agent = self.agents[responding_role]
+        """The first reply to one user turn.
+
+        When several agents answer, the other replies are still generated
+        and recorded in the history but not returned here; use
+        ``get_agent_responses`` to get all of them.
+        """
+        return (await self.get_agent_responses(user_message, session_id))[0]
+    
+    async def stream_agent_response(
+        self,
+        user_message: str,
+        session_id: str
+    ) -> AsyncIterator[AgentResponseDelta]:
+        """Streams every reply to one user turn.
+
+        Each responder generates concurrently on its own conversation. Deltas
+        are yielded as they arrive, so in this stream replies from different
+        roles interleave. ``position`` is the reply's place in speaking order
+        and each reply ends with an ``is_final`` delta; callers that deliver
+        replies one after another, like the trial socket with
+        ``DeliveryLanes``, order them by ``position``. Replies are recorded
+        in the history in that order.
+        """
+        logger.debug("Streaming agent response for message: '%s...'", user_message[:50])
+        logger.debug("Available agents: %s", list(self.agents.keys()))
+        
+        # The router hands the floor on from the last agent who spoke.
+        last_agent = self.conversation_history.last_agent()
+        self.conversation_history.append("user", user_message)
+        
+        responders = self.router.route_many(
+            user_message,
+            self.agents.keys(),
+            last_agent.speaker.value if last_agent else None,
+            self.max_responders
+        )
+        logger.debug("Determined responding roles: %s", responders)
         
-        response_text = await self.get_agent_response_from_flow(agent, user_message)
+        if responders[0] not in self.agents:
+            logger.warning("Role '%s' not found, using first available agent", responders[0])
+            responders = [next(iter(self.agents.keys()))]
         
-        self.conversation_history.append({
-            "role": responding_role,
-            "content": response_text
-        })
+        conversations = [self.conversation, *(self._side_conversation(role) for role in responders[1:])]
+        deltas: asyncio.Queue = asyncio.Queue()
+        replies: List[List[str]] = [[] for _ in responders]
         
-        return AgentResponse(
-            role=AgentRole(responding_role),
-            text=response_text
-        )
+        async def generate(index: int, agent: AgentConfig):
+            started = time.perf_counter()
+            try:
+                async with aclosing(self.stream_agent_response_from_flow(agent, user_message, conversations[index])) as texts:
+                    async for text in texts:
+                        deltas.put_nowait((index, text))
+                metrics.llm_turn_latency.observe(time.perf_counter() - started, agent=agent.role.value)
+            finally:
+                deltas.put_nowait((index, None))
+        
+        agents = [self.agents[role] for role in responders]
+        tasks = [asyncio.create_task(generate(index, agent)) for index, agent in enumerate(agents)]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                index, text = await deltas.get()
+                if text is None:
+                    remaining -= 1
+                    yield AgentResponseDelta(role=agents[index].role, text="", position=index, is_final=True)
+                    continue
+                
+                replies[index].append(text)
+                yield AgentResponseDelta(role=agents[index].role, text=text, position=index)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._record_turn(user_message, responders, conversations, ["".join(parts) for parts in replies])
+    
+    def _side_conversation(self, role: str) -> FlowConversation:
+        conversation = self.side_conversations.get(role)
+        if conversation is None:
+            # A new conversation catches up on the turns still in the window
+            # (the current user message aside); older ones reach it through
+            # the summary sent with its prompt.
+            conversation = FlowConversation(backlog=[
+                f"{entry.speaker.value.capitalize()}: {entry.content}"
+                for entry in list(self.conversation_history)[:-1]
+            ])
+            self.side_conversations[role] = conversation
+        return conversation
+    
+    def _record_turn(
+        self,
+        user_message: str,
+        responders: List[str],
+        conversations: List[FlowConversation],
+        replies: List[str]
+    ):
+        spoken = [
+            (conversation, role, text)
+            for conversation, role, text in zip(conversations, responders, replies)
+            if text
+        ]
+        for _, role, text in spoken:
+            self.conversation_history.append(role, text)
+        
+        # Tell every other conversation what it missed this turn.
+        limit = settings.history_window_turns
+        for conversation in (self.conversation, *self.side_conversations.values()):
+            if conversation not in conversations:
+                conversation.add_backlog(f"User: {user_message}", limit)
+            for speaker, role, text in spoken:
+                if speaker is not conversation:
+                    conversation.add_backlog(f"{role.capitalize()}: {text}", limit)
     
     async def get_agent_response_from_flow(
         self,
         agent: AgentConfig,
-        user_message: str
+        user_message: str,
+        conversation: Optional[FlowConversation] = None
     ) -> str:
-        print(f"[AgentManager] get_agent_response_from_flow called for agent: {agent.role.value}")
-        print(f"[AgentManager] conversation_id: {self.conversation_id}, trial_flow_id: {self.trial_flow_id}")
+        response_parts: List[str] = []
+        async for text in self.stream_agent_response_from_flow(agent, user_message, conversation):
+            response_parts.append(text)
+        return "".join(response_parts)
+    
+    async def stream_agent_response_from_flow(
+        self,
+        agent: AgentConfig,
+        user_message: str,
+        conversation: Optional[FlowConversation] = None
+    ) -> AsyncIterator[str]:
+        conversation = conversation or self.conversation
+        logger.debug("stream_agent_response_from_flow called for agent: %s", agent.role.value)
+        logger.debug("conversation_id: %s, trial_flow_id: %s", conversation.conversation_id, self.trial_flow_id)
+        
+        has_yielded = False
         
         try:
-            system_prompt = agent.system_prompt
-            print(f"[AgentManager] Using system prompt from Agent Spec for role: {agent.role.value}")
+            # The prompt is keyed on the role prompt alone. The conversation
+            # keeps every turn it has seen, so the summary of older turns is
+            # only attached when a new conversation is started or the role
+            # prompt changes, never resent because it grew.
+            prompt_key = self.prompt_keys.get(agent.role.value)
+            if prompt_key is None or prompt_key != conversation.prompt_key:
+                system_prompt = agent.system_prompt
+                summary = self.conversation_history.summary
+                if summary:
+                    system_prompt = f"{system_prompt}\n\n{summary}"
+                logger.debug("Sending system prompt for role: %s (%s chars)", agent.role.value, len(system_prompt))
+            else:
+                system_prompt = None
+                logger.debug("Conversation already holds the %s prompt", agent.role.value)
             
-            print(f"[AgentManager] Sending message to conversation...")
-            await openjustice_service.send_message_to_conversation(
-                conversation_id=self.conversation_id,
-                user_message=user_message,
+            message = user_message
+            if conversation.backlog:
+                backlog = "\n".join(conversation.backlog)
+                message = f"Since you last spoke:\n{backlog}\n\n{user_message}"
+            
+            logger.debug("Sending message to conversation...")
+            result = await openjustice_service.send_message_to_conversation(
+                conversation_id=conversation.conversation_id,
+                user_message=message,
+                title=None if conversation.conversation_id else f"{agent.name} ({self.session_id})",
                 system_prompt=system_prompt
             )
-            print(f"[AgentManager] Message sent successfully")
-            
-            response_text = ""
+            if conversation.conversation_id is None:
+                conversation.conversation_id = result.get("conversationId")
+                logger.debug("Started conversation %s for role: %s", conversation.conversation_id, agent.role.value)
+            conversation.prompt_key = prompt_key
+            conversation.backlog = []
+            logger.debug("Message sent successfully")
             
-            if self.trial_execution_id:
-                print(f"[AgentManager] Using existing trial executionId: {self.trial_execution_id}")
-                stream_params = {"execution_id": self.trial_execution_id}
+            if conversation.execution_id:
+                logger.debug("Using existing trial executionId: %s", conversation.execution_id)
+                stream_params = {"execution_id": conversation.execution_id}
             else:
-                print(f"[AgentManager] Starting new trial execution with flowId: {self.trial_flow_id}")
+                logger.debug("Starting new trial execution with flowId: %s", self.trial_flow_id)
                 stream_params = {
                     "dialog_flow_id": self.trial_flow_id,
-                    "conversation_id": self.conversation_id
+                    "conversation_id": conversation.conversation_id
                 }
             
-            print(f"[AgentManager] Starting stream with params: {stream_params}")
-            async for event in openjustice_service.stream_dialog_flow(**stream_params):
-                event_type = event.get("event")
-                event_data = event.get("data", {})
-                
-                if event_type == "message":
-                    text = event_data.get("text", "")
-                    response_text += text
-                
-                elif event_type == "awaiting-user-input":
-                    new_execution_id = event_data.get("executionId")
-                    if new_execution_id:
-                        self.trial_execution_id = new_execution_id
-                        print(f"[AgentManager] Updated trial executionId: {new_execution_id}")
-                
-                elif event_type == "done" or event_type == "stream-complete":
-                    print(f"[AgentManager] Stream ended with event: {event_type}")
-                    break
-            
-            return response_text if response_text else "I understand. Please continue."
+            logger.debug("Starting stream with params: %s", stream_params)
+            async with aclosing(openjustice_service.stream_dialog_flow(**stream_params)) as events:
+                async for event in events:
+                    event_type = event.event
+                    event_data = event.data
+                    
+                    if event_type == "message":
+                        text = event_data.get("text", "")
+                        if text:
+                            has_yielded = True
+                            yield text
+                    
+                    elif event_type == "awaiting-user-input":
+                        new_execution_id = event_data.get("executionId")
+                        if new_execution_id:
+                            conversation.execution_id = new_execution_id
+                            logger.debug("Updated trial executionId: %s", new_execution_id)
+                    
+                    elif event_type == "done" or event_type == "stream-complete":
+                        logger.debug("Stream ended with event: %s", event_type)
+                        break
         
         except Exception as e:
-            print(f"[AgentManager] ERROR in get_agent_response_from_flow: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
-            return f"I acknowledge your statement regarding: {user_message[:100]}..."
-    
-    def _determine_responding_agent(self, message: str) -> str:
-        message_lower = message.lower()
-        
-        if any(phrase in message_lower for phrase in ["your honor", "judge", "ruling", "objection"]):
-            return "judge"
-        
-        if any(phrase in message_lower for phrase in ["prosecution", "prosecutor", "state's case", "evidence against"]):
-            return "prosecutor"
-        
-        if any(phrase in message_lower for phrase in ["defense", "defendant", "my client", "not guilty"]):
-            return "defense"
-        
-        if len(self.conversation_history) > 0:
-            last_role = self.conversation_history[-1].get("role")
-            if last_role == "judge":
-                return "prosecutor" if "prosecutor" in self.agents else "defense"
-            elif last_role == "prosecutor":
-                return "defense" if "defense" in self.agents else "judge"
-            elif last_role == "defense":
-                return "prosecutor" if "prosecutor" in self.agents else "judge"
-        
-        return "judge"
-    
+            logger.exception("Agent stream failed: %s: %s", type(e).__name__, e)
+            if not has_yielded:
+                has_yielded = True
+                metrics.fallbacks.inc(kind="agent_reply")
+                yield f"I acknowledge your statement regarding: {user_message[:100]}..."
+        
+        if not has_yielded:
+            metrics.fallbacks.inc(kind="agent_reply_empty")
+            yield "I understand. Please continue."
     
     def get_all_agents(self) -> Dict[str, AgentConfig]:
         return self.agents
@@ -400,7 +489,7 @@ Remember: Everyone deserves a strong defense. Your duty is to your client within
                 
                 agent_json = json.dumps(agent_dict, indent=2, default=str)
             except Exception as e:
-                print(f"[AgentManager] Warning: Could not serialize {role} agent using standard methods: {e}")
+                logger.warning("Could not serialize %s agent using standard methods: %s", role, e)
                 agent_dict = {
                     'name': getattr(agent_spec, 'name', role),
                     'system_prompt': getattr(agent_spec, 'system_prompt', ''),
@@ -420,7 +509,7 @@ Remember: Everyone deserves a strong defense. Your duty is to your client within
                 f.write(agent_json)
             
             exported_files[role] = file_path
-            print(f"[AgentManager] Exported {role} agent spec to {file_path}")
+            logger.info("Exported %s agent spec to %s", role, file_path)
         
         return exported_files
     
@@ -465,7 +554,7 @@ Remember: Everyone deserves a strong defense. Your duty is to your client within
                 else:
                     agent_dict = {k: serialize_value(v) for k, v in agent_spec.__dict__.items()}
             except Exception as e:
-                print(f"[AgentManager] Warning: Could not serialize {role} agent using standard methods: {e}")
+                logger.warning("Could not serialize %s agent using standard methods: %s", role, e)
                 agent_dict = {
                     'name': getattr(agent_spec, 'name', role),
                     'system_prompt': getattr(agent_spec, 'system_prompt', ''),
@@ -484,7 +573,7 @@ Remember: Everyone deserves a strong defense. Your duty is to your client within
                 yaml.dump(agent_dict, f, default_flow_style=False, sort_keys=False, allow_unicode=True)
             
             exported_files[role] = file_path
-            print(f"[AgentManager] Exported {role} agent spec to {file_path}")
+            logger.info("Exported %s agent spec to %s", role, file_path)
         
         return exported_files
     
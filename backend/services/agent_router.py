@@ -0,0 +1,301 @@
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple
+from functools import lru_cache
+from config import settings
+import json
+import math
+import re
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tie-break order when two roles score the same, highest priority first.
+ROLE_PRIORITY = ("judge", "prosecutor", "defense")
+
+# Who speaks next when nothing in the message points at a role.
+NEXT_SPEAKER = {
+    "judge": ("prosecutor", "defense"),
+    "prosecutor": ("defense", "judge"),
+    "defense": ("prosecutor", "judge"),
+}
+
+DEFAULT_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "judge": ("your honor", "judge", "ruling", "objection"),
+    "prosecutor": ("prosecution", "prosecutor", "state's case", "evidence against"),
+    "defense": ("defense", "defendant", "my client", "not guilty"),
+}
+
+COMMONWEALTH_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "judge": ("your honour", "my lord", "my lady", "your lordship", "your ladyship", "m'lud"),
+    "prosecutor": ("crown", "the crown's case", "crown counsel"),
+    "defense": ("defence", "the accused", "counsel for the accused"),
+}
+
+# Extra phrases per jurisdiction, keyed by the lowercased jurisdiction name.
+# They are added to DEFAULT_KEYWORDS, never replace them.
+JURISDICTION_KEYWORDS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "united states": {
+        "prosecutor": ("district attorney", "the people's case", "government's case"),
+    },
+    "united kingdom": COMMONWEALTH_KEYWORDS,
+    "england and wales": COMMONWEALTH_KEYWORDS,
+    "scotland": {
+        **COMMONWEALTH_KEYWORDS,
+        "prosecutor": ("procurator fiscal", "advocate depute", "crown"),
+    },
+    "canada": COMMONWEALTH_KEYWORDS,
+    "australia": COMMONWEALTH_KEYWORDS,
+    "new zealand": COMMONWEALTH_KEYWORDS,
+    "ireland": {
+        **COMMONWEALTH_KEYWORDS,
+        "prosecutor": ("director of public prosecutions", "the state's case"),
+    },
+}
+
+class KeywordMatcher:
+    """Scores every role against a message with a single compiled regex.
+
+    All phrases are joined into one alternation (longest first, so "the
+    crown's case" wins over "crown"), and one ``finditer`` pass counts the
+    hits per role.
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        self.roles: Dict[str, str] = {}
+        for role, phrases in keywords.items():
+            for phrase in phrases:
+                self.roles[phrase.lower()] = role
+
+        alternatives = sorted(self.roles, key=len, reverse=True)
+        # Whole words only, allowing a plural or possessive ("defendants", "judge's").
+        self.pattern = re.compile(
+            r"(?<!\w)(?P<phrase>" + "|".join(re.escape(phrase) for phrase in alternatives) + r")(?:'?s)?(?!\w)",
+            re.IGNORECASE
+        )
+
+    def score(self, text: str) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        for match in self.pattern.finditer(text):
+            role = self.roles[match.group("phrase").lower()]
+            scores[role] = scores.get(role, 0.0) + 1.0
+        return scores
+
+def keywords_for(jurisdiction: Optional[str]) -> Dict[str, Tuple[str, ...]]:
+    extra = JURISDICTION_KEYWORDS.get((jurisdiction or "").strip().lower(), {})
+    return {
+        role: DEFAULT_KEYWORDS.get(role, ()) + extra.get(role, ())
+        for role in ROLE_PRIORITY
+    }
+
+@lru_cache(maxsize=64)
+def matcher_for(jurisdiction: Optional[str]) -> KeywordMatcher:
+    return KeywordMatcher(keywords_for(jurisdiction))
+
+class RoleClassifier(Protocol):
+    def predict(self, text: str) -> Dict[str, float]:
+        """Returns a probability per role."""
+        ...
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+def hashed_ngrams(text: str, n_features: int, ngram: int = 2) -> List[int]:
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    buckets = []
+    for size in range(1, ngram + 1):
+        for start in range(len(tokens) - size + 1):
+            feature = " ".join(tokens[start:start + size])
+            buckets.append(zlib.crc32(feature.encode("utf-8")) % n_features)
+    return buckets
+
+class HashedNgramClassifier:
+    """Multinomial naive Bayes over hashed word n-grams.
+
+    Trained offline (see ``benchmark_router.py train``) and stored as JSON
+    holding only the buckets seen in training, so a model is small and
+    loading it needs nothing beyond the standard library.
+    """
+
+    def __init__(
+        self,
+        classes: Sequence[str],
+        prior: Sequence[float],
+        default: Sequence[float],
+        weights: Dict[int, List[float]],
+        n_features: int,
+        ngram: int
+    ):
+        self.classes = tuple(classes)
+        self.prior = list(prior)
+        self.default = list(default)
+        self.weights = weights
+        self.n_features = n_features
+        self.ngram = ngram
+
+    @classmethod
+    def train(
+        cls,
+        samples: Iterable[Tuple[str, str]],
+        n_features: int = 1 << 16,
+        ngram: int = 2,
+        alpha: float = 0.5
+    ) -> "HashedNgramClassifier":
+        classes = list(ROLE_PRIORITY)
+        documents = [0] * len(classes)
+        totals = [0] * len(classes)
+        counts: Dict[int, List[int]] = {}
+
+        for text, role in samples:
+            index = classes.index(role)
+            documents[index] += 1
+            for bucket in hashed_ngrams(text, n_features, ngram):
+                counts.setdefault(bucket, [0] * len(classes))[index] += 1
+                totals[index] += 1
+
+        total_documents = sum(documents)
+        if not total_documents:
+            raise ValueError("No training samples")
+
+        prior = [math.log((count + 1) / (total_documents + len(classes))) for count in documents]
+        denominators = [total + alpha * n_features for total in totals]
+        default = [math.log(alpha / denominator) for denominator in denominators]
+        weights = {
+            bucket: [math.log((count + alpha) / denominator) for count, denominator in zip(bucket_counts, denominators)]
+            for bucket, bucket_counts in counts.items()
+        }
+        return cls(classes, prior, default, weights, n_features, ngram)
+
+    def predict(self, text: str) -> Dict[str, float]:
+        scores = list(self.prior)
+        for bucket in hashed_ngrams(text, self.n_features, self.ngram):
+            for index, weight in enumerate(self.weights.get(bucket, self.default)):
+                scores[index] += weight
+
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return {role: value / total for role, value in zip(self.classes, exps)}
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "version": 1,
+            "classes": list(self.classes),
+            "prior": self.prior,
+            "default": self.default,
+            "n_features": self.n_features,
+            "ngram": self.ngram,
+            "weights": {str(bucket): weights for bucket, weights in self.weights.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "HashedNgramClassifier":
+        return cls(
+            classes=data["classes"],
+            prior=data["prior"],
+            default=data["default"],
+            weights={int(bucket): weights for bucket, weights in data["weights"].items()},
+            n_features=data["n_features"],
+            ngram=data["ngram"]
+        )
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+@lru_cache(maxsize=1)
+def default_classifier() -> Optional[RoleClassifier]:
+    if not settings.router_classifier_path:
+        return None
+    try:
+        classifier = HashedNgramClassifier.load(settings.router_classifier_path)
+    except Exception as e:
+        logger.warning("Could not load router classifier from %s: %s", settings.router_classifier_path, e)
+        return None
+    logger.info("Loaded router classifier from %s", settings.router_classifier_path)
+    return classifier
+
+class AgentRouter:
+    """Picks the role that answers a user message.
+
+    Keyword hits count 1 each; a classifier, when configured, adds its
+    probability times ``classifier_weight``. The best available role whose
+    score reaches ``min_score`` answers, with ties going to the judge, then
+    the prosecutor. If no role qualifies the floor passes to whoever follows
+    the last speaker, and to the judge at the start of a trial.
+    """
+
+    def __init__(
+        self,
+        matcher: KeywordMatcher,
+        classifier: Optional[RoleClassifier] = None,
+        classifier_weight: float = 0.5,
+        min_score: float = 0.35
+    ):
+        self.matcher = matcher
+        self.classifier = classifier
+        self.classifier_weight = classifier_weight
+        self.min_score = min_score
+
+    @classmethod
+    def for_jurisdiction(cls, jurisdiction: Optional[str]) -> "AgentRouter":
+        return cls(
+            matcher_for(jurisdiction),
+            default_classifier(),
+            settings.router_classifier_weight,
+            settings.router_min_score
+        )
+
+    def score(self, text: str) -> Dict[str, float]:
+        scores = self.matcher.score(text)
+        if self.classifier is not None:
+            for role, probability in self.classifier.predict(text).items():
+                scores[role] = scores.get(role, 0.0) + self.classifier_weight * probability
+        return scores
+
+    def route(self, text: str, available: Iterable[str], last_role: Optional[str] = None) -> str:
+        return self._pick(self.score(text), set(available), last_role)
+
+    def _pick(self, scores: Dict[str, float], available: Set[str], last_role: Optional[str]) -> str:
+        best = None
+        for role in ROLE_PRIORITY:
+            score = scores.get(role, 0.0)
+            if role in available and score >= self.min_score and (best is None or score > scores[best]):
+                best = role
+        if best is not None:
+            return best
+
+        for role in NEXT_SPEAKER.get(last_role, ()):
+            if role in available:
+                return role
+        return "judge"
+
+    def route_many(
+        self,
+        text: str,
+        available: Iterable[str],
+        last_role: Optional[str] = None,
+        limit: int = 1
+    ) -> List[str]:
+        """The roles that answer, in delivery order.
+
+        The role ``route`` picks always answers first. Up to ``limit - 1``
+        other available roles follow if they also reach ``min_score``,
+        highest score first and ties in ``ROLE_PRIORITY`` order, so the same
+        message always gets the same speaking order.
+        """
+        available = set(available)
+        scores = self.score(text)
+        primary = self._pick(scores, available, last_role)
+        if limit <= 1:
+            return [primary]
+
+        others = [
+            role for role in ROLE_PRIORITY
+            if role != primary and role in available and scores.get(role, 0.0) >= self.min_score
+        ]
+        others.sort(key=lambda role: -scores[role])
+        return [primary, *others[:limit - 1]]
@@ -0,0 +1,63 @@
+from typing import BinaryIO, Optional
+import asyncio
+import hashlib
+import tempfile
+import zlib
+
+class UploadError(ValueError):
+    pass
+
+class ChunkedUpload:
+    """Spools an upload received in chunks to an anonymous temporary file.
+
+    Chunks must arrive in order (``offset`` equals the bytes received so far)
+    and may carry a CRC32 checksum. The SHA-256 of the whole file is computed
+    incrementally so the finished file never has to be read back into memory.
+    """
+
+    def __init__(
+        self,
+        upload_id: str,
+        filename: str,
+        size: int,
+        max_bytes: int,
+        spool_dir: Optional[str] = None
+    ):
+        if size <= 0:
+            raise UploadError("Upload size must be positive")
+        if size > max_bytes:
+            raise UploadError(f"File exceeds the {max_bytes} byte upload limit")
+
+        self.upload_id = upload_id
+        self.filename = filename
+        self.size = size
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.file: BinaryIO = tempfile.TemporaryFile(dir=spool_dir)
+
+    async def write_chunk(self, offset: int, chunk: bytes, crc32: Optional[str] = None):
+        if offset != self.received:
+            raise UploadError(f"Expected offset {self.received}, got {offset}")
+        if self.received + len(chunk) > self.size:
+            raise UploadError("Chunk exceeds the declared file size")
+        if crc32 is not None and int(crc32, 16) != zlib.crc32(chunk):
+            raise UploadError(f"Checksum mismatch for chunk at offset {offset}")
+
+        await asyncio.to_thread(self.file.write, chunk)
+        self.digest.update(chunk)
+        self.received += len(chunk)
+
+    def finish(self, sha256: Optional[str] = None) -> str:
+        if self.received != self.size:
+            raise UploadError(f"Received {self.received} of {self.size} bytes")
+
+        digest = self.digest.hexdigest()
+        if sha256 is not None and sha256.lower() != digest:
+            raise UploadError("File checksum mismatch")
+
+        self.file.flush()
+        self.file.seek(0)
+        return digest
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,91 @@
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from config import settings
+import asyncio
+import hashlib
+import time
+
+async def content_hash(data: bytes) -> str:
+    return await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+
+class ContentCache:
+    """Content-addressed cache for uploaded files, keyed by SHA-256.
+
+    Holds the text extracted from context documents (bounded by total
+    characters) and the OpenJustice upload result for fact-gathering files
+    (bounded by entry count and TTL, since remote resources can expire).
+    """
+
+    def __init__(self, max_text_chars: int, max_resources: int, resource_ttl: float):
+        self.max_text_chars = max_text_chars
+        self.max_resources = max_resources
+        self.resource_ttl = resource_ttl
+        self.texts: "OrderedDict[str, str]" = OrderedDict()
+        self.text_size = 0
+        self.resources: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.stats = {
+            "text_hits": 0,
+            "text_misses": 0,
+            "resource_hits": 0,
+            "resource_misses": 0,
+            "evictions": 0,
+        }
+
+    def get_text(self, key: str) -> Optional[str]:
+        text = self.texts.get(key)
+        if text is None:
+            self.stats["text_misses"] += 1
+            return None
+
+        self.texts.move_to_end(key)
+        self.stats["text_hits"] += 1
+        return text
+
+    def put_text(self, key: str, text: str):
+        if len(text) > self.max_text_chars:
+            return
+
+        previous = self.texts.pop(key, None)
+        if previous is not None:
+            self.text_size -= len(previous)
+
+        self.texts[key] = text
+        self.text_size += len(text)
+
+        while self.text_size > self.max_text_chars:
+            _, evicted = self.texts.popitem(last=False)
+            self.text_size -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def get_resource(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.resources.get(key)
+        if entry is None or time.time() - entry[1] > self.resource_ttl:
+            self.resources.pop(key, None)
+            self.stats["resource_misses"] += 1
+            return None
+
+        self.resources.move_to_end(key)
+        self.stats["resource_hits"] += 1
+        return entry[0]
+
+    def put_resource(self, key: str, result: Dict[str, Any]):
+        self.resources[key] = (result, time.time())
+        self.resources.move_to_end(key)
+
+        while len(self.resources) > self.max_resources:
+            self.resources.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "texts": len(self.texts),
+            "text_chars": self.text_size,
+            "resources": len(self.resources),
+        }
+
+content_cache = ContentCache(
+    max_text_chars=settings.content_cache_max_text_chars,
+    max_resources=settings.content_cache_max_resources,
+    resource_ttl=settings.content_cache_resource_ttl
+)
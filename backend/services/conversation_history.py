@@ -0,0 +1,157 @@
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+from collections import deque
+from datetime import datetime
+from enum import Enum
+import re
+import time
+
+SUMMARY_LINE_CHARS = 200
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+class Speaker(str, Enum):
+    USER = "user"
+    JUDGE = "judge"
+    PROSECUTOR = "prosecutor"
+    DEFENSE = "defense"
+
+class HistoryEntry:
+    """One turn. Speakers are enum members, so every entry shares them."""
+
+    __slots__ = ("seq", "speaker", "content", "timestamp")
+
+    def __init__(self, seq: int, speaker: Speaker, content: str, timestamp: int):
+        self.seq = seq
+        self.speaker = speaker
+        self.content = content
+        self.timestamp = timestamp
+
+    def to_message(self) -> Dict[str, Any]:
+        """The message shape the trial page has always received."""
+        if self.speaker is Speaker.USER:
+            message = {"id": f"msg_{self.seq}", "type": "user"}
+        else:
+            message = {"id": f"msg_{self.seq}", "type": "agent", "role": self.speaker.value}
+        message["content"] = self.content
+        message["timestamp"] = datetime.fromtimestamp(self.timestamp).isoformat()
+        return message
+
+def _summary_line(entry: HistoryEntry) -> str:
+    text = " ".join(entry.content.split())
+    text = SENTENCE_END.split(text, 1)[0]
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    return f"{entry.speaker.value.capitalize()}: {text}"
+
+class ConversationHistory:
+    """The last ``window`` turns, with older turns folded into a summary.
+
+    When a turn falls out of the window it is reduced to one line (the
+    speaker and the first sentence of what they said) and appended to the
+    rolling summary, which in turn drops its oldest lines once it exceeds
+    ``summary_max_chars``. Memory per conversation therefore stays bounded
+    however long the trial runs.
+    """
+
+    def __init__(self, window: int, summary_max_chars: int):
+        self.window = max(1, window)
+        self.summary_max_chars = summary_max_chars
+        self.entries: Deque[HistoryEntry] = deque()
+        self.summary_lines: Deque[str] = deque()
+        self.summary_chars = 0
+        self.folded = 0
+        self.next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return iter(self.entries)
+
+    def last_agent(self) -> Optional[HistoryEntry]:
+        """The most recent turn still in the window not spoken by the user."""
+        for entry in reversed(self.entries):
+            if entry.speaker is not Speaker.USER:
+                return entry
+        return None
+
+    def append(self, speaker: Union[Speaker, str], content: str, timestamp: Optional[int] = None) -> HistoryEntry:
+        entry = HistoryEntry(
+            self.next_seq,
+            Speaker(speaker),
+            content,
+            int(time.time()) if timestamp is None else timestamp
+        )
+        self.next_seq += 1
+        self.entries.append(entry)
+
+        while len(self.entries) > self.window:
+            self._fold(self.entries.popleft())
+        return entry
+
+    def _fold(self, entry: HistoryEntry):
+        line = _summary_line(entry)
+        self.summary_lines.append(line)
+        self.summary_chars += len(line) + 1
+        self.folded += 1
+
+        while self.summary_chars > self.summary_max_chars and len(self.summary_lines) > 1:
+            self.summary_chars -= len(self.summary_lines.popleft()) + 1
+
+    @property
+    def summary(self) -> str:
+        if not self.summary_lines:
+            return ""
+        omitted = self.folded - len(self.summary_lines)
+        header = f"EARLIER IN THE PROCEEDINGS ({self.folded} turns, oldest first"
+        header += f", {omitted} earliest omitted):" if omitted else "):"
+        return "\n".join([header, *(f"- {line}" for line in self.summary_lines)])
+
+    def to_messages(self) -> List[Dict[str, Any]]:
+        return [entry.to_message() for entry in self.entries]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "next_seq": self.next_seq,
+            "folded": self.folded,
+            "summary": list(self.summary_lines),
+            "entries": [
+                [entry.seq, entry.speaker.value, entry.content, entry.timestamp]
+                for entry in self.entries
+            ],
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Union[Dict[str, Any], List[Dict[str, Any]], None],
+        window: int,
+        summary_max_chars: int
+    ) -> "ConversationHistory":
+        history = cls(window, summary_max_chars)
+        if not data:
+            return history
+
+        if isinstance(data, list):
+            # Sessions saved before history was bounded stored plain message dicts.
+            for message in data:
+                speaker = Speaker.USER if message.get("type") == "user" else message.get("role", "user")
+                timestamp = message.get("timestamp")
+                history.append(
+                    speaker,
+                    message.get("content", ""),
+                    int(datetime.fromisoformat(timestamp).timestamp()) if timestamp else None
+                )
+            return history
+
+        for line in data.get("summary", []):
+            history.summary_lines.append(line)
+            history.summary_chars += len(line) + 1
+        history.folded = data.get("folded", 0)
+        for seq, speaker, content, timestamp in data.get("entries", []):
+            history.entries.append(HistoryEntry(seq, Speaker(speaker), content, timestamp))
+        history.next_seq = data.get("next_seq", len(history.entries))
+
+        while len(history.entries) > history.window:
+            history._fold(history.entries.popleft())
+        return history
@@ -0,0 +1,173 @@
+from typing import Any, Awaitable, Callable, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from models.trial import ExtractionJob
+from config import settings
+from PIL import Image
+import asyncio
+import os
+import tempfile
+import uuid
+import PyPDF2
+import pytesseract
+
+class ExtractionLimitError(ValueError):
+    pass
+
+# The functions below run in worker processes and must stay importable at
+# module level. They take the path of the spooled upload rather than its
+# bytes, so a large file is not pickled to the pool once per part.
+
+def count_pdf_pages(path: str) -> int:
+    return len(PyPDF2.PdfReader(path).pages)
+
+def extract_pdf_pages(path: str, start: int, end: int) -> str:
+    reader = PyPDF2.PdfReader(path)
+    return "".join(reader.pages[index].extract_text() for index in range(start, end))
+
+# A pixel row counts as blank when its darkest and lightest grey values are
+# at most this far apart, i.e. it holds no ink.
+BLANK_ROW_SPREAD = 16
+
+def find_band_cuts(path: str, band_height: int) -> List[int]:
+    """Band boundaries for OCR, from 0 to the image height.
+
+    Each cut moves to the nearest blank pixel row within a quarter band of
+    its target so that no line of text is split between two bands. Only a
+    page with no gap that close is cut at the target row.
+    """
+    with Image.open(path) as image:
+        gray = image.convert("L")
+    width, height = gray.size
+    pixels = gray.tobytes()
+
+    def is_blank(row: int) -> bool:
+        line = pixels[row * width:(row + 1) * width]
+        return max(line) - min(line) <= BLANK_ROW_SPREAD
+
+    cuts = [0]
+    window = max(1, band_height // 4)
+    target = band_height
+    while target < height:
+        cut = target
+        for distance in range(window + 1):
+            if is_blank(target - distance):
+                cut = target - distance
+                break
+            if target + distance < height and is_blank(target + distance):
+                cut = target + distance
+                break
+        if cut > cuts[-1]:
+            cuts.append(cut)
+        target = cut + band_height
+    cuts.append(height)
+    return cuts
+
+def ocr_image_band(path: str, top: int, bottom: int) -> str:
+    with Image.open(path) as image:
+        band = image.crop((0, top, image.width, bottom))
+        return pytesseract.image_to_string(band)
+
+class DocumentExtractor:
+    """Extracts text from uploaded context documents on a process pool.
+
+    PDFs are split into page ranges and tall images into horizontal bands
+    (cut at blank rows) so that each piece is processed in parallel; results
+    are joined in order. If one piece fails the others are cancelled.
+
+    The upload is written once to a temporary file that every worker reads.
+    Job state is kept by the caller (see ``routers.trial``), so any worker
+    can report on a job.
+    """
+
+    def __init__(self):
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=settings.extraction_max_workers)
+        return self.executor
+
+    async def _run(self, func: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    def create_job(self, session_id: str, filename: str) -> ExtractionJob:
+        return ExtractionJob(
+            job_id=str(uuid.uuid4()),
+            session_id=session_id,
+            filename=filename,
+            status="pending"
+        )
+
+    @staticmethod
+    def _spool(content: bytes) -> str:
+        with tempfile.NamedTemporaryFile(dir=settings.upload_spool_dir, suffix=".extract", delete=False) as spool:
+            spool.write(content)
+        return spool.name
+
+    async def _run_parts(
+        self,
+        job: ExtractionJob,
+        parts: List[Awaitable[str]],
+        on_progress: Callable[[ExtractionJob], Awaitable[None]]
+    ) -> List[str]:
+        job.total = len(parts)
+        await on_progress(job)
+
+        async def run_part(part: Awaitable[str]) -> str:
+            text = await part
+            job.completed += 1
+            await on_progress(job)
+            return text
+
+        tasks = [asyncio.ensure_future(run_part(part)) for part in parts]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # Cancelling drops parts still queued on the pool once one fails.
+            for task in tasks:
+                task.cancel()
+
+    async def extract(
+        self,
+        job: ExtractionJob,
+        content: bytes,
+        on_progress: Callable[[ExtractionJob], Awaitable[None]]
+    ) -> str:
+        job.status = "running"
+        filename = job.filename.lower()
+
+        if not filename.endswith(('.pdf', '.png', '.jpg', '.jpeg')):
+            return content.decode('utf-8')
+
+        path = await asyncio.to_thread(self._spool, content)
+        try:
+            if filename.endswith('.pdf'):
+                page_count = await self._run(count_pdf_pages, path)
+                if page_count > settings.extraction_max_pages:
+                    raise ExtractionLimitError(
+                        f"PDF has {page_count} pages; the limit is {settings.extraction_max_pages}"
+                    )
+
+                step = settings.extraction_pages_per_task
+                parts = [
+                    self._run(extract_pdf_pages, path, start, min(start + step, page_count))
+                    for start in range(0, page_count, step)
+                ]
+                return "".join(await self._run_parts(job, parts, on_progress))
+
+            cuts = await self._run(find_band_cuts, path, settings.extraction_ocr_band_height)
+            parts = [
+                self._run(ocr_image_band, path, top, bottom)
+                for top, bottom in zip(cuts, cuts[1:])
+            ]
+            return "\n".join(await self._run_parts(job, parts, on_progress))
+        finally:
+            os.unlink(path)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+document_extractor = DocumentExtractor()
@@ -0,0 +1,115 @@
+from typing import Any, AsyncIterator, Dict, Set
+from config import settings
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SlowSubscriberError(Exception):
+    """A subscriber fell too far behind and its subscription was closed."""
+
+class EventBus:
+    """Publish/subscribe channel used to reach a session's WebSocket.
+
+    A trial socket lives on exactly one worker, while REST calls for the same
+    session may land on any worker. Handlers publish to ``trial:{session_id}``
+    and the worker holding the socket forwards the event to the client.
+    """
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        pass
+
+class MemoryEventBus(EventBus):
+    """In-process bus; only reaches subscribers in the same worker.
+
+    Each subscriber queues at most ``max_pending`` events. One that falls
+    further behind is unsubscribed and its iterator raises
+    ``SlowSubscriberError``, so a stuck socket cannot grow memory without
+    bound or hold up publishers.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        queues = self.subscribers.get(channel)
+        if not queues:
+            return
+
+        for queue in list(queues):
+            if queue.qsize() < self.max_pending:
+                queue.put_nowait(message)
+                continue
+
+            logger.warning("Dropping slow subscriber on %s (%s events pending)", channel, queue.qsize())
+            queues.discard(queue)
+            # Replace the backlog with the sentinel that ends the subscription.
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        # One slot beyond max_pending is kept for the end-of-subscription sentinel.
+        queue: asyncio.Queue = asyncio.Queue(self.max_pending + 1)
+        self.subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    raise SlowSubscriberError(f"Subscriber on {channel} fell behind by {self.max_pending} events")
+                yield message
+        finally:
+            queues = self.subscribers.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[channel]
+
+class RedisEventBus(EventBus):
+    """Cross-worker (and cross-host) bus backed by Redis pub/sub."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise ImportError("redis is required for EVENT_BUS_BACKEND=redis. Install it with: pip install redis")
+
+        self.client = redis.from_url(url)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self.client.publish(channel, json.dumps(message, separators=(",", ":")))
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield json.loads(message["data"])
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+
+def create_event_bus() -> EventBus:
+    backend = settings.event_bus_backend
+
+    if backend == "memory":
+        return MemoryEventBus(settings.event_bus_max_pending)
+    if backend == "redis":
+        return RedisEventBus(settings.redis_url)
+
+    raise ValueError(f"Unknown event bus backend: {backend}")
+
+event_bus = create_event_bus()
@@ -0,0 +1,229 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import bisect
+import math
+import time
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+class CallbackCounter(Metric):
+    """Counter read at scrape time from stats a component already keeps."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[LabelValues, float]]]
+    ):
+        super().__init__(name, documentation, label_names)
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.collect():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = ([0] * (len(self.buckets) + 1), [0.0])
+            self.series[key] = series
+
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total[0])}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}"
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format.
+
+    With several uvicorn workers each one keeps its own values; scrape every
+    worker (or aggregate by ``worker_pid`` from ``/health``) to see the total.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+stt_latency = registry.histogram(
+    "mockr_stt_latency_seconds",
+    "Time to transcribe a recorded audio clip.",
+    ("recognizer",)
+)
+llm_time_to_first_token = registry.histogram(
+    "mockr_llm_time_to_first_token_seconds",
+    "Time from opening a /nap/stream request to its first message event."
+)
+llm_turn_latency = registry.histogram(
+    "mockr_llm_turn_seconds",
+    "Time to produce a complete streamed reply, including send-message.",
+    ("agent",)
+)
+tts_latency = registry.histogram(
+    "mockr_tts_latency_seconds",
+    "Time to synthesize one utterance.",
+    ("cache",)
+)
+send_message_latency = registry.histogram(
+    "mockr_openjustice_send_message_seconds",
+    "Latency of OpenJustice send-message calls, including retries."
+)
+upload_latency = registry.histogram(
+    "mockr_upload_seconds",
+    "Time to upload a file to OpenJustice.",
+    ("outcome",)
+)
+ws_send_queue_depth = registry.histogram(
+    "mockr_ws_send_queue_depth",
+    "Outbound WebSocket frames already queued when a new frame is enqueued.",
+    ("endpoint",),
+    buckets=DEPTH_BUCKETS
+)
+retries = registry.counter(
+    "mockr_retries_total",
+    "Retried upstream calls.",
+    ("operation",)
+)
+fallbacks = registry.counter(
+    "mockr_fallbacks_total",
+    "Responses replaced by a fallback after an upstream failure or timeout.",
+    ("kind",)
+)
+
+caches: Dict[str, Tuple[Callable[[], Optional[Dict[str, int]]], Tuple[str, ...], Tuple[str, ...]]] = {}
+
+def register_cache(
+    name: str,
+    get_stats: Callable[[], Optional[Dict[str, int]]],
+    hit_keys: Sequence[str],
+    miss_keys: Sequence[str]
+):
+    """Exposes an existing cache's hit/miss stats as ``mockr_cache_requests_total``."""
+    caches[name] = (get_stats, tuple(hit_keys), tuple(miss_keys))
+
+def _collect_cache_requests() -> Iterator[Tuple[LabelValues, float]]:
+    for name, (get_stats, hit_keys, miss_keys) in caches.items():
+        stats = get_stats()
+        if not stats:
+            continue
+        yield (name, "hit"), sum(stats.get(key, 0) for key in hit_keys)
+        yield (name, "miss"), sum(stats.get(key, 0) for key in miss_keys)
+
+cache_requests = registry.register(CallbackCounter(
+    "mockr_cache_requests_total",
+    "Cache lookups by cache and result.",
+    ("cache", "result"),
+    _collect_cache_requests
+))
@@ -1,17 +1,100 @@
 import httpx
-from typing import List, Dict, Any, Optional, AsyncIterator
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, BinaryIO, Union
 from config import settings
-import json
+from models.trial import NAPStreamEvent
+from services.sse import SSEDecoder
+from services.response_cache import CacheEntry, ResponseCache
+from services import metrics
 import asyncio
+import importlib.util
+import time
+from logging_config import LazyJSON
+import logging
+
+logger = logging.getLogger(__name__)
 
 class OpenJusticeService:
     def __init__(self):
         self.base_url = settings.openjustice_api_url
         self.api_key = settings.openjustice_api_key
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        self.cache = ResponseCache(max_entries=settings.openjustice_cache_max_entries)
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = settings.openjustice_http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+            http2 = False
+        
+        limits = httpx.Limits(
+            max_connections=settings.openjustice_max_connections,
+            max_keepalive_connections=settings.openjustice_max_keepalive_connections,
+            keepalive_expiry=settings.openjustice_keepalive_expiry
+        )
+        timeout = httpx.Timeout(
+            connect=settings.openjustice_connect_timeout,
+            read=settings.openjustice_read_timeout,
+            write=settings.openjustice_write_timeout,
+            pool=settings.openjustice_pool_timeout
+        )
+        
+        self.http2 = http2
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    async def start(self):
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
     
     async def close(self):
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        stats = {
+            "http2_requested": settings.openjustice_http2,
+            "http2": self.http2,
+            "max_connections": settings.openjustice_max_connections,
+            "max_keepalive_connections": settings.openjustice_max_keepalive_connections,
+            "connections": 0,
+            "http2_connections": 0,
+            "active": 0,
+            "idle": 0,
+            "queued_requests": 0,
+        }
+        
+        if self._client is None:
+            return stats
+        
+        # httpx does not expose pool usage publicly, so read it from the
+        # underlying httpcore pool. Those are private attributes that may
+        # change between releases, so the counts are left at 0 if they do.
+        try:
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", None) or [])
+            requests = list(getattr(pool, "_requests", None) or [])
+            idle = sum(1 for conn in connections if conn.is_idle())
+            # ALPN may still settle on HTTP/1.1, so count what was negotiated.
+            http2_connections = sum(1 for conn in connections if "HTTP/2" in conn.info())
+            queued = sum(1 for request in requests if getattr(request, "connection", None) is None)
+        except Exception as e:
+            logger.debug("Could not read HTTP pool usage: %s: %s", type(e).__name__, e)
+            return stats
+        
+        stats["connections"] = len(connections)
+        stats["http2_connections"] = http2_connections
+        stats["idle"] = idle
+        stats["active"] = len(connections) - idle
+        stats["queued_requests"] = queued
+        
+        return stats
     
     def _get_headers(self) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -31,7 +114,7 @@ class OpenJusticeService:
             metadata = {}
             if resources and len(resources) > 0:
                 metadata["resources"] = resources
-                print(f"[OpenJustice] Attaching {len(resources)} resource(s) to message: {[r.get('name') for r in resources]}")
+                logger.debug("Attaching %s resource(s) to message: %s", len(resources), [r.get('name') for r in resources])
             
             message = {
                 "model": "gpt-4o-mini-2024-07-18",
@@ -51,7 +134,7 @@ class OpenJusticeService:
                 "prompt": system_prompt
             }
             
-            print(f"[OpenJustice] Payload: {json.dumps(payload, indent=2)}")
+            logger.debug("Payload: %s", LazyJSON(payload, indent=2))
             
             url = f"{self.base_url}/conversation/send-message"
             headers = self._get_headers()
@@ -59,6 +142,7 @@ class OpenJusticeService:
             
             max_attempts = 3
             backoff_seconds = 1
+            started = time.perf_counter()
             
             for attempt in range(1, max_attempts + 1):
                 try:
@@ -69,17 +153,19 @@ class OpenJusticeService:
                     )
                     response.raise_for_status()
                     data = response.json()
+                    metrics.send_message_latency.observe(time.perf_counter() - started)
                     return data
                 except httpx.HTTPStatusError as http_err:
                     status = http_err.response.status_code
                     response_text = http_err.response.text if hasattr(http_err.response, 'text') else 'N/A'
                     
                     if status == 400:
-                        print(f"[OpenJustice] 400 Bad Request error: {response_text}")
-                        print(f"[OpenJustice] This may be due to malformed message or invalid resources")
+                        logger.error("400 Bad Request error: %s", response_text)
+                        logger.warning("This may be due to malformed message or invalid resources")
                     
                     if status >= 500 and attempt < max_attempts:
-                        print(f"[OpenJustice] Temporary error {status}. Retrying in {backoff_seconds}s (attempt {attempt}/{max_attempts})")
+                        logger.warning("Temporary error %s. Retrying in %ss (attempt %s/%s)", status, backoff_seconds, attempt, max_attempts)
+                        metrics.retries.inc(operation="send_message")
                         await asyncio.sleep(backoff_seconds)
                         backoff_seconds *= 2
                         continue
@@ -87,9 +173,9 @@ class OpenJusticeService:
         
         except httpx.HTTPError as e:
             resp = getattr(e, "response", None)
-            print(f"OpenJustice API error: {e}")
-            print(f"Response status: {resp.status_code if resp else 'N/A'}")
-            print(f"Response text: {resp.text if resp else 'N/A'}")
+            logger.error("OpenJustice API error: %s", e)
+            logger.debug("Response status: %s", resp.status_code if resp else 'N/A')
+            logger.debug("Response text: %s", resp.text if resp else 'N/A')
             raise Exception(f"Failed to send message: {str(e)}")
     
     async def stream_dialog_flow(
@@ -97,7 +183,7 @@ class OpenJusticeService:
         dialog_flow_id: Optional[str] = None,
         conversation_id: Optional[str] = None,
         execution_id: Optional[str] = None
-    ) -> AsyncIterator[Dict[str, Any]]:
+    ) -> AsyncIterator[NAPStreamEvent]:
         try:
             params = {}
             
@@ -107,112 +193,223 @@ class OpenJusticeService:
                 params["dialogFlowId"] = dialog_flow_id
                 params["conversationId"] = conversation_id
             else:
-                print("[OpenJustice] Warning: Need either executionId OR (dialogFlowId + conversationId)")
+                logger.warning("Need either executionId OR (dialogFlowId + conversationId)")
                 if dialog_flow_id:
                     params["dialogFlowId"] = dialog_flow_id
                 if conversation_id:
                     params["conversationId"] = conversation_id
             
             url = f"{self.base_url}/nap/stream"
+            timeout = httpx.Timeout(
+                connect=settings.openjustice_connect_timeout,
+                read=settings.openjustice_stream_read_timeout,
+                write=settings.openjustice_write_timeout,
+                pool=settings.openjustice_pool_timeout
+            )
             
-            async with self.client.stream(
-                "GET",
-                url,
-            params=params,
-                headers=self._get_headers(),
-                timeout=120.0
-            ) as response:
-                response.raise_for_status()
+            decoder = SSEDecoder()
+            seen_event_ids = set()
+            resume_execution_id = execution_id
+            # Replayed events are recognised by id only. An event without an
+            # id cannot be told apart from a new one, so once such an event
+            # has been yielded the stream can no longer be resumed safely.
+            delivered = 0
+            unidentified = 0
+            reconnects = 0
+            resuming = False
+            backoff_seconds = settings.openjustice_stream_backoff_initial
+            started = time.perf_counter()
+            first_token_seen = False
+            
+            def is_new(event: NAPStreamEvent) -> bool:
+                nonlocal delivered, unidentified
+                if event.id is not None:
+                    if event.id in seen_event_ids:
+                        return False
+                    seen_event_ids.add(event.id)
+                    unidentified = 0
+                else:
+                    unidentified += 1
+                delivered += 1
+                return True
+            
+            while True:
+                headers = self._get_headers()
+                request_params = params
+                if resuming:
+                    if decoder.last_event_id:
+                        headers["Last-Event-ID"] = decoder.last_event_id
+                    if resume_execution_id:
+                        request_params = {"executionId": resume_execution_id}
+                
+                try:
+                    async with self.client.stream(
+                        "GET",
+                        url,
+                        params=request_params,
+                        headers=headers,
+                        timeout=timeout
+                    ) as response:
+                        response.raise_for_status()
+                        
+                        async for chunk in response.aiter_bytes():
+                            for event in decoder.feed(chunk):
+                                if not is_new(event):
+                                    continue
+                                
+                                if not first_token_seen and event.event == "message":
+                                    first_token_seen = True
+                                    metrics.llm_time_to_first_token.observe(time.perf_counter() - started)
+                                
+                                event_execution_id = event.data.get("executionId")
+                                if event_execution_id:
+                                    resume_execution_id = event_execution_id
+                                
+                                if resuming:
+                                    logger.info("NAP stream resumed after %s reconnect(s)", reconnects)
+                                    resuming = False
+                                    backoff_seconds = settings.openjustice_stream_backoff_initial
+                                
+                                yield event
+                        
+                        for event in decoder.flush():
+                            if is_new(event):
+                                yield event
+                    return
                 
-                current_event = None
-                async for line in response.aiter_lines():
-                    line = line.strip()
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                        raise
+                    
+                    # Nothing delivered yet means a retry is simply a fresh start.
+                    # Otherwise every event since the last id must have had
+                    # one, so the server's replay after Last-Event-ID can be
+                    # deduplicated; events without ids fail the turn instead.
+                    if delivered and (decoder.last_event_id is None or unidentified):
+                        logger.warning("NAP stream dropped after %s event(s) without ids; cannot resume without repeating or losing text", unidentified)
+                        raise
                     
-                    if line.startswith("event:"):
-                        current_event = line[6:].strip()
+                    # The cap counts every reconnect of this stream, so one
+                    # that keeps dropping after a few events still gives up.
+                    if reconnects >= settings.openjustice_stream_max_reconnects:
+                        raise
                     
-                    elif line.startswith("data:"):
-                        data_str = line[5:].strip()
-                        try:
-                            data = json.loads(data_str)
-                            event_obj = {
-                                "event": current_event or "message",
-                                "data": data
-                            }
-                            yield event_obj
-                        except json.JSONDecodeError:
-                            event_obj = {
-                                "event": current_event or "message",
-                                "data": {"text": data_str}
-                            }
-                            yield event_obj
-                        current_event = None
+                    reconnects += 1
+                    resuming = True
+                    metrics.retries.inc(operation="nap_stream")
+                    logger.warning("NAP stream dropped (%s: %s). Reconnecting in %ss (attempt %s/%s, Last-Event-ID=%s, executionId=%s)", type(e).__name__, e, backoff_seconds, reconnects, settings.openjustice_stream_max_reconnects, decoder.last_event_id, resume_execution_id)
+                    await asyncio.sleep(backoff_seconds)
+                    backoff_seconds = min(backoff_seconds * 2, settings.openjustice_stream_backoff_max)
+                    decoder.reset()
         
         except httpx.HTTPError as e:
-            print(f"OpenJustice NAP stream error: {e}")
+            logger.error("OpenJustice NAP stream error: %s", e)
             raise Exception(f"Failed to stream dialog flow: {str(e)}")
     
     async def upload_file_to_conversation(
         self,
-        file_data: bytes,
-        filename: str
+        file_data: Union[bytes, BinaryIO],
+        filename: str,
+        size: Optional[int] = None
     ) -> Dict[str, Any]:
         try:
+            # httpx streams file objects through the multipart body in small
+            # chunks, so spooled uploads are never loaded into memory here.
             files = {"file": (filename, file_data)}
             
-            print(f"[OpenJustice] Uploading file: {filename} ({len(file_data)} bytes)")
+            logger.info("Uploading file: %s (%s bytes)", filename, size if size is not None else len(file_data))
             
-            response = await self.client.post(
-                f"{self.base_url}/conversation/resources/upload-file",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                files=files
-            )
-            response.raise_for_status()
-            result = response.json()
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(
+                    f"{self.base_url}/conversation/resources/upload-file",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    files=files
+                )
+                response.raise_for_status()
+                result = response.json()
+            except httpx.HTTPError:
+                metrics.upload_latency.observe(time.perf_counter() - started, outcome="error")
+                raise
+            metrics.upload_latency.observe(time.perf_counter() - started, outcome="success")
             
-            print(f"[OpenJustice] Upload response: {json.dumps(result, indent=2)}")
+            logger.debug("Upload response: %s", LazyJSON(result, indent=2))
             
             return result
         
         except httpx.HTTPError as e:
-            print(f"[OpenJustice] File upload error: {e}")
+            logger.error("File upload error: %s", e)
             if hasattr(e, 'response'):
-                print(f"[OpenJustice] Response: {e.response.text}")
+                logger.debug("Response: %s", e.response.text)
             raise Exception(f"Failed to upload file: {str(e)}")
     
-    async def get_jurisdictions(self) -> List[Dict[str, Any]]:
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        response = await self.client.get(
+            f"{self.base_url}{path}",
+            params=params,
+            headers=self._get_headers()
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def get_jurisdictions_entry(self) -> CacheEntry:
         try:
-            response = await self.client.get(
-                f"{self.base_url}/jurisdictions",
-                headers=self._get_headers()
+            return await self.cache.get_or_load(
+                ("jurisdictions",),
+                lambda: self._get_json("/jurisdictions"),
+                ttl=settings.openjustice_cache_ttl_jurisdictions,
+                stale_ttl=settings.openjustice_cache_stale_ttl
             )
-            response.raise_for_status()
-            return response.json()
         except httpx.HTTPError as e:
-            return [
+            metrics.fallbacks.inc(kind="jurisdictions")
+            return CacheEntry([
                 {"id": "us", "name": "United States", "code": "US"},
                 {"id": "uk", "name": "United Kingdom", "code": "UK"},
                 {"id": "ca", "name": "Canada", "code": "CA"},
                 {"id": "au", "name": "Australia", "code": "AU"},
-            ]
+            ], ttl=0, stale_ttl=0)
     
-    async def get_legal_areas(self, jurisdiction: str) -> List[Dict[str, Any]]:
+    async def get_jurisdictions(self) -> List[Dict[str, Any]]:
+        return (await self.get_jurisdictions_entry()).value
+    
+    async def get_legal_areas_entry(self, jurisdiction: str) -> CacheEntry:
         try:
-            response = await self.client.get(
-                f"{self.base_url}/jurisdictions/{jurisdiction}/legal-areas",
-                headers=self._get_headers()
+            return await self.cache.get_or_load(
+                ("legal-areas", jurisdiction),
+                lambda: self._get_json(f"/jurisdictions/{jurisdiction}/legal-areas"),
+                ttl=settings.openjustice_cache_ttl_legal_areas,
+                stale_ttl=settings.openjustice_cache_stale_ttl
             )
-            response.raise_for_status()
-            return response.json()
         except httpx.HTTPError as e:
-            return [
+            metrics.fallbacks.inc(kind="legal_areas")
+            return CacheEntry([
                 {"id": "criminal", "name": "Criminal Law"},
                 {"id": "civil", "name": "Civil Law"},
                 {"id": "constitutional", "name": "Constitutional Law"},
                 {"id": "administrative", "name": "Administrative Law"},
                 {"id": "family", "name": "Family Law"},
                 {"id": "commercial", "name": "Commercial Law"},
-            ]
+            ], ttl=0, stale_ttl=0)
+    
+    async def get_legal_areas(self, jurisdiction: str) -> List[Dict[str, Any]]:
+        return (await self.get_legal_areas_entry(jurisdiction)).value
+    
+    async def search_articles_entry(
+        self,
+        jurisdiction: str,
+        legal_area: str,
+        query: Optional[str] = None
+    ) -> CacheEntry:
+        params = {"jurisdiction": jurisdiction, "legal_area": legal_area}
+        if query:
+            params["q"] = query
+        
+        return await self.cache.get_or_load(
+            ("articles", jurisdiction, legal_area, query or ""),
+            lambda: self._get_json("/articles", params=params),
+            ttl=settings.openjustice_cache_ttl_articles,
+            stale_ttl=settings.openjustice_cache_stale_ttl
+        )
     
     async def search_articles(
         self, 
@@ -220,27 +417,7 @@ class OpenJusticeService:
         legal_area: str,
         query: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        try:
-            params = {"jurisdiction": jurisdiction, "legal_area": legal_area}
-            if query:
-                params["q"] = query
-            
-            response = await self.client.get(
-                f"{self.base_url}/articles",
-                params=params,
-                headers=self._get_headers()
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            return [
-                {
-                    "id": "article_1",
-                    "title": f"{legal_area.title()} - Article 1",
-                    "content": "Sample article content",
-                    "jurisdiction": jurisdiction
-                }
-            ]
+        return (await self.search_articles_entry(jurisdiction, legal_area, query)).value
     
     async def search_case_law(
         self, 
@@ -248,17 +425,14 @@ class OpenJusticeService:
         query: str,
         limit: int = 10
     ) -> List[Dict[str, Any]]:
-        try:
-            params = {"jurisdiction": jurisdiction, "q": query, "limit": limit}
-            response = await self.client.get(
-                f"{self.base_url}/case-law",
-                params=params,
-                headers=self._get_headers()
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            return []
+        params = {"jurisdiction": jurisdiction, "q": query, "limit": limit}
+        response = await self.client.get(
+            f"{self.base_url}/case-law",
+            params=params,
+            headers=self._get_headers()
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def get_legal_context(
         self,
@@ -266,19 +440,51 @@ class OpenJusticeService:
         legal_areas: List[str],
         case_description: str
     ) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(settings.openjustice_fanout_concurrency)
+        
+        async def bounded(source: str, call: Awaitable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(call, timeout=settings.openjustice_fanout_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Legal context source '%s' timed out after %ss", source, settings.openjustice_fanout_timeout)
+                    raise
+                except httpx.HTTPError as e:
+                    logger.warning("Legal context source '%s' failed: %s", source, e)
+                    raise
+        
+        calls = [
+            bounded(f"articles:{area}", self.search_articles(jurisdiction, area))
+            for area in legal_areas
+        ]
+        calls.append(bounded("case_law", self.search_case_law(jurisdiction, case_description, limit=5)))
+        
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        
+        missing_sources = []
         articles = []
-        for area in legal_areas:
-            area_articles = await self.search_articles(jurisdiction, area)
-            articles.extend(area_articles[:3])
+        for area, result in zip(legal_areas, results[:-1]):
+            if isinstance(result, BaseException):
+                missing_sources.append(f"articles:{area}")
+                continue
+            articles.extend(result[:3])
+        
+        case_law = results[-1]
+        if isinstance(case_law, BaseException):
+            missing_sources.append("case_law")
+            case_law = []
         
-        case_law = await self.search_case_law(jurisdiction, case_description, limit=5)
+        if missing_sources:
+            metrics.fallbacks.inc(kind="legal_context_partial")
         
         return {
             "jurisdiction": jurisdiction,
             "legal_areas": legal_areas,
             "relevant_articles": articles,
             "relevant_case_law": case_law,
-            "summary": f"Legal context for {jurisdiction} in {', '.join(legal_areas)}"
+            "summary": f"Legal context for {jurisdiction} in {', '.join(legal_areas)}",
+            "partial": bool(missing_sources),
+            "missing_sources": missing_sources
         }
 
 openjustice_service = OpenJusticeService()
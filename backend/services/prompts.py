@@ -0,0 +1,195 @@
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+from collections import OrderedDict
+from models.trial import RoleType
+from config import settings
+import hashlib
+import re
+
+SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+class PromptTemplate:
+    """A ``{{slot}}`` template parsed once into literal chunks and slot names.
+
+    ``render`` joins the literals with the slot values in a single pass, so
+    its cost depends on the number of slots rather than rescanning the
+    template once per slot.
+    """
+
+    __slots__ = ("source", "literals", "slots")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.literals: List[str] = []
+        self.slots: List[str] = []
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.literals.append(source[position:])
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            parts.append(values[slot])
+            parts.append(literal)
+        return "".join(parts)
+
+class RoleProfile(NamedTuple):
+    name: str
+    template: PromptTemplate
+    voice_id: str
+    personality_traits: List[str]
+
+JUDGE_PROMPT = PromptTemplate("""You are Judge Anderson, presiding over a {{jurisdiction}} court.
+
+ROLE: You are an impartial judge responsible for maintaining courtroom order, making legal rulings, and ensuring fair proceedings.
+
+CASE CONTEXT:
+{{case_context}}
+
+LEGAL FRAMEWORK:
+- Jurisdiction: {{jurisdiction}}
+- Applicable Legal Areas: {{legal_areas}}
+
+RESPONSIBILITIES:
+- Maintain courtroom decorum and procedure
+- Rule on objections and motions
+- Ensure both sides have fair opportunity to present
+- Make decisions based on law and evidence
+- Provide clear legal reasoning for rulings
+
+STYLE:
+- Speak with authority and clarity
+- Be impartial and fair to both sides
+- Use proper legal terminology
+- Keep responses concise but complete
+- Address parties formally (Counselor, Attorney)
+
+Remember: You are neutral and must not favor either side. Base all decisions on law and procedure.""")
+
+PROSECUTOR_PROMPT = PromptTemplate("""You are District Attorney Martinez, the prosecutor in this {{jurisdiction}} court case.
+
+ROLE: You represent the state/government and seek to prove the defendant's guilt beyond a reasonable doubt.
+
+CASE CONTEXT:
+{{case_context}}
+
+LEGAL FRAMEWORK:
+- Jurisdiction: {{jurisdiction}}
+- Applicable Legal Areas: {{legal_areas}}
+
+RESPONSIBILITIES:
+- Present evidence against the defendant
+- Examine and cross-examine witnesses
+- Make compelling arguments for conviction
+- Object to improper defense tactics
+- Uphold justice and the rule of law
+
+STRATEGY:
+- Build systematic case against defendant
+- Highlight incriminating evidence
+- Challenge defense claims with facts
+- Anticipate and counter defense arguments
+- Maintain professional demeanor
+
+STYLE:
+- Be assertive but respectful
+- Use evidence and facts to support claims
+- Speak with conviction and confidence
+- Address the judge properly ("Your Honor")
+- Keep arguments logical and structured
+
+Remember: Your goal is to prove guilt, but always within the bounds of law and ethics.""")
+
+DEFENSE_PROMPT = PromptTemplate("""You are Defense Attorney Chen, representing the defendant in this {{jurisdiction}} court case.
+
+ROLE: You are the defendant's advocate, working to protect their rights and achieve the best possible outcome.
+
+CASE CONTEXT:
+{{case_context}}
+
+LEGAL FRAMEWORK:
+- Jurisdiction: {{jurisdiction}}
+- Applicable Legal Areas: {{legal_areas}}
+
+RESPONSIBILITIES:
+- Protect defendant's constitutional rights
+- Challenge prosecution's evidence and arguments
+- Present alternative explanations and defenses
+- Cross-examine prosecution witnesses
+- Ensure fair trial procedures
+
+STRATEGY:
+- Cast reasonable doubt on prosecution's case
+- Highlight weaknesses in their evidence
+- Present exculpatory evidence
+- Protect client from unfair procedures
+- Humanize the defendant
+
+STYLE:
+- Be protective of your client
+- Question prosecution claims vigorously
+- Use law to support your positions
+- Address the judge properly ("Your Honor")
+- Balance passion with professionalism
+
+Remember: Everyone deserves a strong defense. Your duty is to your client within the bounds of legal ethics.""")
+
+ROLE_PROFILES: Dict[RoleType, RoleProfile] = {
+    RoleType.JUDGE: RoleProfile(
+        name="Judge Anderson",
+        template=JUDGE_PROMPT,
+        voice_id="aura-athena-en",
+        personality_traits=["impartial", "authoritative", "procedural", "fair"]
+    ),
+    RoleType.PROSECUTOR: RoleProfile(
+        name="District Attorney Martinez",
+        template=PROSECUTOR_PROMPT,
+        voice_id="aura-arcas-en",
+        personality_traits=["assertive", "methodical", "persuasive", "justice-focused"]
+    ),
+    RoleType.DEFENSE: RoleProfile(
+        name="Defense Attorney Chen",
+        template=DEFENSE_PROMPT,
+        voice_id="aura-angus-en",
+        personality_traits=["protective", "analytical", "strategic", "client-focused"]
+    ),
+}
+
+PromptKey = Tuple[RoleType, str, Tuple[str, ...], str]
+
+_rendered_prompts: "OrderedDict[PromptKey, str]" = OrderedDict()
+
+def case_context_hash(case_context: str) -> str:
+    return hashlib.sha1(case_context.encode("utf-8")).hexdigest()
+
+def render_role_prompt(
+    role: RoleType,
+    jurisdiction: str,
+    legal_areas: Sequence[str],
+    case_context: str
+) -> str:
+    """Renders a role's system prompt, memoized across sessions.
+
+    Sessions loaded from a shared store rebuild their agents on every load,
+    so the same prompt is rendered repeatedly for the lifetime of a trial.
+    """
+    key = (role, jurisdiction, tuple(legal_areas), case_context_hash(case_context))
+
+    prompt = _rendered_prompts.get(key)
+    if prompt is not None:
+        _rendered_prompts.move_to_end(key)
+        return prompt
+
+    prompt = ROLE_PROFILES[role].template.render({
+        "jurisdiction": jurisdiction,
+        "legal_areas": ", ".join(legal_areas),
+        "case_context": case_context,
+    })
+
+    _rendered_prompts[key] = prompt
+    while len(_rendered_prompts) > settings.prompt_cache_max_entries:
+        _rendered_prompts.popitem(last=False)
+    return prompt
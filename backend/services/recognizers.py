@@ -0,0 +1,166 @@
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import urlencode
+from models.trial import TranscriptEvent
+from websockets.asyncio.client import connect
+import asyncio
+import json
+
+class AudioStream:
+    """Queue-backed async iterator that a WebSocket handler feeds with audio chunks.
+
+    Feeding never blocks, so a stalled recognizer cannot hold up the socket's
+    receive loop. Once ``max_chunks`` chunks are waiting, ``push`` refuses the
+    chunk, marks the stream ``overflowed`` and closes it.
+    """
+
+    def __init__(self, max_chunks: int = 256):
+        self.max_chunks = max_chunks
+        # One slot beyond max_chunks is kept for the end-of-stream marker.
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks + 1)
+        self.closed = False
+        self.overflowed = False
+
+    def push(self, chunk: bytes) -> bool:
+        """Queues a chunk; returns False if it was dropped."""
+        if self.closed:
+            return False
+        if self.queue.qsize() >= self.max_chunks:
+            self.overflowed = True
+            self.close()
+            return False
+        self.queue.put_nowait(chunk)
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put_nowait(None)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+class StreamingRecognizer:
+    """Base class for live speech-to-text backends.
+
+    ``recognize`` consumes audio chunks and yields interim transcripts while the
+    user is speaking, followed by a final transcript per utterance.
+    """
+
+    async def recognize(self, audio_stream: AsyncIterator[bytes]) -> AsyncIterator[TranscriptEvent]:
+        raise NotImplementedError
+        yield
+
+class DeepgramLiveRecognizer(StreamingRecognizer):
+    url = "wss://api.deepgram.com/v1/listen"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "nova-2",
+        language: str = "en-US",
+        endpointing_ms: int = 300
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.language = language
+        self.endpointing_ms = endpointing_ms
+
+    def _get_url(self) -> str:
+        params = {
+            "model": self.model,
+            "language": self.language,
+            "smart_format": "true",
+            "punctuate": "true",
+            "interim_results": "true",
+            "endpointing": self.endpointing_ms,
+        }
+        return f"{self.url}?{urlencode(params)}"
+
+    async def recognize(self, audio_stream: AsyncIterator[bytes]) -> AsyncIterator[TranscriptEvent]:
+        async with connect(
+            self._get_url(),
+            additional_headers={"Authorization": f"Token {self.api_key}"}
+        ) as connection:
+            async def send_audio():
+                try:
+                    async for chunk in audio_stream:
+                        await connection.send(chunk)
+                finally:
+                    try:
+                        await connection.send(json.dumps({"type": "CloseStream"}))
+                    except Exception:
+                        pass
+
+            sender = asyncio.create_task(send_audio())
+            segments = []
+
+            try:
+                async for raw in connection:
+                    message = json.loads(raw)
+                    if message.get("type") != "Results":
+                        continue
+
+                    alternatives = message.get("channel", {}).get("alternatives") or [{}]
+                    transcript = alternatives[0].get("transcript", "")
+
+                    if not message.get("is_final"):
+                        if transcript:
+                            yield TranscriptEvent(text=" ".join(segments + [transcript]), is_final=False)
+                        continue
+
+                    if transcript:
+                        segments.append(transcript)
+
+                    if message.get("speech_final") and segments:
+                        yield TranscriptEvent(text=" ".join(segments), is_final=True)
+                        segments = []
+
+                if segments:
+                    yield TranscriptEvent(text=" ".join(segments), is_final=True)
+
+            finally:
+                sender.cancel()
+                try:
+                    await sender
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+class BufferedRecognizer(StreamingRecognizer):
+    """Collects the whole stream and transcribes it once it closes.
+
+    Useful for local testing: pass any ``transcribe`` coroutine (for example a
+    stub returning canned text) instead of a live speech backend.
+    """
+
+    def __init__(self, transcribe: Callable[[bytes], Awaitable[str]]):
+        self.transcribe = transcribe
+
+    async def recognize(self, audio_stream: AsyncIterator[bytes]) -> AsyncIterator[TranscriptEvent]:
+        buffer = bytearray()
+        async for chunk in audio_stream:
+            buffer.extend(chunk)
+
+        if not buffer:
+            return
+
+        transcript = await self.transcribe(bytes(buffer))
+        if transcript:
+            yield TranscriptEvent(text=transcript, is_final=True)
+
+def create_recognizer(
+    name: str,
+    api_key: str,
+    transcribe: Optional[Callable[[bytes], Awaitable[str]]] = None
+) -> StreamingRecognizer:
+    if name == "deepgram":
+        return DeepgramLiveRecognizer(api_key)
+    if name == "buffered":
+        if transcribe is None:
+            raise ValueError("The buffered recognizer needs a transcribe function")
+        return BufferedRecognizer(transcribe)
+    raise ValueError(f"Unknown speech recognizer: {name}")
@@ -0,0 +1,136 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    __slots__ = ("value", "etag", "created_at", "ttl", "stale_ttl")
+
+    def __init__(self, value: Any, ttl: float, stale_ttl: float):
+        self.value = value
+        self.etag = hashlib.sha1(
+            json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        self.created_at = time.monotonic()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age < self.ttl
+
+    @property
+    def is_usable(self) -> bool:
+        return self.age < self.ttl + self.stale_ttl
+
+    @property
+    def max_age(self) -> int:
+        return max(0, int(self.ttl - self.age))
+
+class ResponseCache:
+    """Async TTL cache with single-flight loading and stale-while-revalidate.
+
+    Concurrent misses for the same key share one loader call. Entries past
+    their TTL but inside the stale window are served immediately while a
+    single background refresh runs; if that refresh fails the stale entry is
+    kept until the window closes.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self.inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refresh_errors": 0,
+        }
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0.0
+    ) -> CacheEntry:
+        entry = self.entries.get(key)
+
+        if entry is not None and entry.is_fresh:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+        if entry is not None and entry.is_usable:
+            self.entries.move_to_end(key)
+            self.stats["stale_hits"] += 1
+            if key not in self.inflight:
+                task = self._start_load(key, loader, ttl, stale_ttl)
+                task.add_done_callback(self._log_refresh_error)
+            return entry
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._start_load(key, loader, ttl, stale_ttl)
+
+        return await asyncio.shield(task)
+
+    def _start_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float
+    ) -> asyncio.Task:
+        async def load() -> CacheEntry:
+            try:
+                value = await loader()
+                entry = CacheEntry(value, ttl, stale_ttl)
+                self._store(key, entry)
+                return entry
+            finally:
+                self.inflight.pop(key, None)
+
+        task = asyncio.create_task(load())
+        self.inflight[key] = task
+        return task
+
+    def _log_refresh_error(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.stats["refresh_errors"] += 1
+            logger.error("Background refresh failed: %s: %s", type(error).__name__, error)
+
+    def _store(self, key: Hashable, entry: CacheEntry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "inflight": len(self.inflight),
+        }
@@ -0,0 +1,341 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from config import settings
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+Serializer = Callable[[Dict[str, Any]], Dict[str, Any]]
+Deserializer = Callable[[Dict[str, Any]], Dict[str, Any]]
+Merger = Callable[[Dict[str, Any], Dict[str, Any]], None]
+Mutator = Callable[[Dict[str, Any]], None]
+
+# Where a persisted session remembers the row version it was loaded at.
+VERSION_KEY = "_version"
+
+# How many times a save re-reads and retries after losing a race.
+SAVE_ATTEMPTS = 5
+
+class StaleSessionError(Exception):
+    """Another worker saved the session since this copy was loaded."""
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+class SessionStore:
+    """Interface for session storage backends.
+
+    Sessions are plain dicts that may hold live objects (for example an
+    ``AgentManager``). Callers mutate the dict returned by ``get`` and must
+    call ``save`` afterwards so backends that persist state see the change.
+
+    Short one-off changes made outside the live connection (a REST request
+    attaching a document, ending the trial) should go through ``update``,
+    which re-applies the change to the latest copy if another worker saved
+    in between.
+    """
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def save(self, session_id: str, session: Dict[str, Any], ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    async def update(
+        self,
+        session_id: str,
+        mutate: Mutator,
+        ttl_for: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Applies ``mutate`` to the stored session and saves it.
+
+        Returns the updated session, or None if there is no such session.
+        """
+        session = await self.get(session_id)
+        if session is None:
+            return None
+        mutate(session)
+        await self.save(session_id, session, ttl_for(session) if ttl_for else None)
+        return session
+
+    async def delete(self, session_id: str):
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class MemorySessionStore(SessionStore):
+    """Keeps live session objects in an LRU bounded by count and idle TTL.
+
+    Reads count as activity: ``get`` pushes the expiry out by the session's
+    TTL again and moves it to the most recently used end.
+    """
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions: "OrderedDict[str, Tuple[Dict[str, Any], float, float]]" = OrderedDict()
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [session_id for session_id, (_, expires_at, _) in self.sessions.items() if expires_at <= now]
+        for session_id in expired:
+            del self.sessions[session_id]
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            return None
+
+        session, expires_at, ttl = entry
+        now = time.time()
+        if expires_at <= now:
+            del self.sessions[session_id]
+            return None
+
+        self.sessions[session_id] = (session, now + ttl, ttl)
+        self.sessions.move_to_end(session_id)
+        return session
+
+    async def save(self, session_id: str, session: Dict[str, Any], ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        self.sessions[session_id] = (session, time.time() + ttl, ttl)
+        self.sessions.move_to_end(session_id)
+
+        if len(self.sessions) > self.max_sessions:
+            self._purge_expired()
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    async def delete(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    async def count(self) -> int:
+        self._purge_expired()
+        return len(self.sessions)
+
+class SQLiteSessionStore(SessionStore):
+    """Persists sessions as compressed JSON rows in a local SQLite database.
+
+    JSON encoding and compression run on a worker thread so a long
+    transcript does not stall other sockets. ``serialize``/``deserialize``
+    stay on the event loop because they touch live session objects.
+
+    Deserialized sessions are kept in a small in-process LRU keyed by row
+    version, so a worker only re-reads a session after another worker saved
+    it. Idle sessions leave memory once they fall out of that LRU.
+
+    Saves are compare-and-swap on the row version the copy was loaded at
+    (kept in the session under ``VERSION_KEY``). When another worker saved
+    first, ``merge(session, latest)`` folds the newer stored copy into the
+    one being saved and the save is retried; without ``merge`` the save
+    raises ``StaleSessionError`` instead of overwriting the newer copy.
+    ``update`` re-applies its change to a freshly loaded copy instead.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        serialize: Serializer,
+        deserialize: Deserializer,
+        ttl: float,
+        max_cached: int,
+        merge: Optional[Merger] = None
+    ):
+        self.namespace = namespace
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.merge = merge
+        self.ttl = ttl
+        self.max_cached = max_cached
+        self.cache: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self.saves = 0
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA busy_timeout=5000")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "namespace TEXT NOT NULL, "
+            "session_id TEXT NOT NULL, "
+            "version INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "data BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, session_id))"
+        )
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def _cache_put(self, session_id: str, version: int, session: Dict[str, Any]):
+        self.cache[session_id] = (version, session)
+        self.cache.move_to_end(session_id)
+        while len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        cached = self.cache.get(session_id)
+
+        if cached is not None:
+            rows = await asyncio.to_thread(
+                self._execute,
+                "SELECT version, expires_at FROM sessions WHERE namespace = ? AND session_id = ?",
+                (self.namespace, session_id)
+            )
+            if rows and rows[0][0] == cached[0] and rows[0][1] > time.time():
+                self.cache.move_to_end(session_id)
+                return cached[1]
+
+        return await self._load(session_id)
+
+    async def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT version, expires_at, data FROM sessions WHERE namespace = ? AND session_id = ?",
+            (self.namespace, session_id)
+        )
+        if not rows or rows[0][1] <= time.time():
+            self.cache.pop(session_id, None)
+            return None
+
+        version, _, data = rows[0]
+        session = self.deserialize(await asyncio.to_thread(_decode, data))
+        session[VERSION_KEY] = version
+        self._cache_put(session_id, version, session)
+        return session
+
+    async def _try_save(self, session_id: str, session: Dict[str, Any], ttl: Optional[float]) -> bool:
+        """Writes the session if the row is still at the version it was loaded at."""
+        payload = self.serialize(session)
+        payload.pop(VERSION_KEY, None)
+        data = await asyncio.to_thread(_encode, payload)
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+
+        version = session.get(VERSION_KEY)
+        if version is None:
+            # A new session may only replace a row that has already expired.
+            rows = await asyncio.to_thread(
+                self._execute,
+                "INSERT INTO sessions (namespace, session_id, version, expires_at, data) VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT (namespace, session_id) DO UPDATE SET "
+                "version = version + 1, expires_at = excluded.expires_at, data = excluded.data "
+                "WHERE sessions.expires_at <= ? "
+                "RETURNING version",
+                (self.namespace, session_id, expires_at, data, now)
+            )
+        else:
+            rows = await asyncio.to_thread(
+                self._execute,
+                "UPDATE sessions SET version = version + 1, expires_at = ?, data = ? "
+                "WHERE namespace = ? AND session_id = ? AND version = ? "
+                "RETURNING version",
+                (expires_at, data, self.namespace, session_id, version)
+            )
+        if not rows:
+            return False
+
+        session[VERSION_KEY] = rows[0][0]
+        self._cache_put(session_id, rows[0][0], session)
+
+        self.saves += 1
+        if self.saves % 100 == 0:
+            await asyncio.to_thread(
+                self._execute,
+                "DELETE FROM sessions WHERE expires_at <= ?",
+                (time.time(),)
+            )
+        return True
+
+    async def save(self, session_id: str, session: Dict[str, Any], ttl: Optional[float] = None):
+        for _ in range(SAVE_ATTEMPTS):
+            if await self._try_save(session_id, session, ttl):
+                return
+
+            latest = await self._load(session_id)
+            if latest is None:
+                # Deleted or expired meanwhile: write it back as a new row.
+                session.pop(VERSION_KEY, None)
+                continue
+            if self.merge is None:
+                raise StaleSessionError(f"Session {session_id} was saved by another worker")
+            self.merge(session, latest)
+            session[VERSION_KEY] = latest[VERSION_KEY]
+
+        raise StaleSessionError(f"Session {session_id} kept changing while saving")
+
+    async def update(
+        self,
+        session_id: str,
+        mutate: Mutator,
+        ttl_for: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        for _ in range(SAVE_ATTEMPTS):
+            session = await self.get(session_id)
+            if session is None:
+                return None
+            mutate(session)
+            if await self._try_save(session_id, session, ttl_for(session) if ttl_for else None):
+                return session
+            self.cache.pop(session_id, None)
+
+        raise StaleSessionError(f"Session {session_id} kept changing while updating")
+
+    async def delete(self, session_id: str):
+        self.cache.pop(session_id, None)
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM sessions WHERE namespace = ? AND session_id = ?",
+            (self.namespace, session_id)
+        )
+
+    async def count(self) -> int:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT COUNT(*) FROM sessions WHERE namespace = ? AND expires_at > ?",
+            (self.namespace, time.time())
+        )
+        return rows[0][0]
+
+    async def close(self):
+        with self.lock:
+            self.connection.close()
+
+def create_session_store(
+    namespace: str,
+    serialize: Serializer,
+    deserialize: Deserializer,
+    merge: Optional[Merger] = None
+) -> SessionStore:
+    backend = settings.session_store_backend
+
+    if backend == "memory":
+        return MemorySessionStore(
+            max_sessions=settings.session_max_in_memory,
+            ttl=settings.session_ttl_seconds
+        )
+
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            path=settings.session_store_path,
+            namespace=namespace,
+            serialize=serialize,
+            deserialize=deserialize,
+            ttl=settings.session_ttl_seconds,
+            max_cached=settings.session_max_in_memory,
+            merge=merge
+        )
+
+    raise ValueError(f"Unknown session store backend: {backend}")
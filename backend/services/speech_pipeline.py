@@ -0,0 +1,141 @@
+from typing import List, Optional, Tuple, Callable, Awaitable
+from services.speech_service import speech_service
+import asyncio
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "st", "jr", "sr", "v", "vs", "no", "nos",
+    "art", "sec", "para", "e.g", "i.e", "u.s", "u.k", "etc", "cf", "inc", "ltd",
+}
+
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+# Characters a sentence end is made of; a run of them at the end of the
+# buffer may still grow into a match once more text arrives.
+SENTENCE_END_CHARS = ".!?\"')] \t\r\n"
+
+class SentenceSplitter:
+    """Incrementally splits streamed text into sentences suitable for TTS.
+
+    Fragments shorter than ``min_length`` are merged into the following
+    sentence so the synthesizer is not flooded with one-word requests.
+    Each feed only scans the text that arrived since the last one, so long
+    stretches without a sentence end stay linear.
+    """
+
+    def __init__(self, min_length: int = 20):
+        self.min_length = min_length
+        self.buffer = ""
+        self.scanned = 0
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        sentences = []
+        start = 0
+
+        for match in SENTENCE_END.finditer(self.buffer, self.scanned):
+            head = self.buffer[start:match.start()]
+            words = head.split()
+            if not words:
+                continue
+            if words[-1].lower() in ABBREVIATIONS:
+                continue
+
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) < self.min_length:
+                continue
+
+            sentences.append(sentence)
+            start = match.end()
+
+        self.buffer = self.buffer[start:]
+        self.scanned = len(self.buffer)
+        while self.scanned and self.buffer[self.scanned - 1] in SENTENCE_END_CHARS:
+            self.scanned -= 1
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        self.scanned = 0
+        return remainder or None
+
+class SpeechPipeline:
+    """Synthesizes sentences concurrently and delivers the audio in order.
+
+    ``send_chunk`` is called as ``send_chunk(seq, text, audio_bytes)`` once per
+    sentence, strictly in sequence order, regardless of which synthesis
+    finishes first. A sentence whose synthesis failed is still sent, with
+    empty audio, so the client can show its text. If sending fails, the
+    synthesis still queued is cancelled and ``finish`` raises the error.
+    """
+
+    def __init__(
+        self,
+        role: str,
+        send_chunk: Callable[[int, str, bytes], Awaitable[None]]
+    ):
+        self.role = role
+        self.send_chunk = send_chunk
+        self.splitter = SentenceSplitter()
+        self.pending: asyncio.Queue = asyncio.Queue()
+        self.sequence = 0
+        self.sent = 0
+        self.sender = asyncio.create_task(self._send_in_order())
+
+    def feed(self, text: str):
+        for sentence in self.splitter.feed(text):
+            self._enqueue(sentence)
+
+    def _enqueue(self, sentence: str):
+        if self.sender.done():
+            return
+        task = asyncio.create_task(speech_service.synthesize_speech(sentence, self.role))
+        self.pending.put_nowait((self.sequence, sentence, task))
+        self.sequence += 1
+
+    async def _send_in_order(self):
+        task: Optional[asyncio.Task] = None
+        try:
+            while True:
+                item: Optional[Tuple[int, str, asyncio.Task]] = await self.pending.get()
+                if item is None:
+                    return
+
+                seq, sentence, task = item
+                audio_bytes = await task
+                if not audio_bytes:
+                    logger.warning("Empty audio for sentence #%s, sending text only", seq)
+
+                await self.send_chunk(seq, sentence, audio_bytes)
+                self.sent += 1
+        finally:
+            if task is not None:
+                task.cancel()
+            self._cancel_pending()
+
+    def _cancel_pending(self):
+        while not self.pending.empty():
+            item = self.pending.get_nowait()
+            if item is not None:
+                item[2].cancel()
+
+    async def finish(self) -> int:
+        remainder = self.splitter.flush()
+        if remainder:
+            self._enqueue(remainder)
+
+        self.pending.put_nowait(None)
+        await self.sender
+        return self.sent
+
+    async def cancel(self):
+        self.sender.cancel()
+        try:
+            await self.sender
+        except asyncio.CancelledError:
+            pass
+        self._cancel_pending()
@@ -1,8 +1,17 @@
 from deepgram import DeepgramClient
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Optional, Callable, Any, Dict
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
 from config import settings
+from models.trial import TranscriptEvent
+from services.recognizers import StreamingRecognizer, create_recognizer
+from services.tts_cache import TTSCache
+from services import metrics
 import io
+import time
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SpeechService:
     def __init__(self):
@@ -12,62 +21,184 @@ class SpeechService:
             "prosecutor": "aura-2-athena-en",
             "defense": "aura-angus-en",
         }
+        
+        # The Deepgram client is synchronous, so every call runs on this pool.
+        # The semaphore bounds concurrent calls; callers beyond the limit wait
+        # on the event loop instead of piling up inside the executor.
+        # "abandoned" counts calls that timed out but still hold a worker.
+        self.max_concurrency = settings.speech_max_concurrency
+        self.call_timeout = settings.speech_call_timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.speech_max_concurrency,
+            thread_name_prefix="speech"
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {
+            "queued": 0,
+            "in_flight": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "abandoned": 0,
+        }
+        
+        self.tts_cache: Optional[TTSCache] = None
+        if settings.tts_cache_enabled:
+            self.tts_cache = TTSCache(
+                max_bytes=settings.tts_cache_max_bytes,
+                ttl_seconds=settings.tts_cache_ttl_seconds,
+                disk_dir=settings.tts_cache_dir,
+                disk_max_bytes=settings.tts_cache_disk_max_bytes
+            )
+        
+        self.recognizer: StreamingRecognizer = create_recognizer(
+            settings.stt_recognizer,
+            settings.deepgram_api_key,
+            transcribe=self.transcribe_audio
+        )
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        
+        self.stats["queued"] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.stats["queued"] -= 1
+        
+        try:
+            future = loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        
+        # A timed-out call keeps running on its worker thread, so its slot is
+        # only released once the call actually returns. That keeps the
+        # semaphore in step with the executor's free workers.
+        self.stats["in_flight"] += 1
+        abandoned = False
+        
+        def release(_):
+            self.stats["in_flight"] -= 1
+            if abandoned:
+                self.stats["abandoned"] -= 1
+            semaphore.release()
+        
+        future.add_done_callback(release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.call_timeout)
+            self.stats["completed"] += 1
+            return result
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            if not future.done():
+                abandoned = True
+                self.stats["abandoned"] += 1
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_concurrency": self.max_concurrency,
+            "call_timeout": self.call_timeout,
+            "tts_cache": self.tts_cache.get_stats() if self.tts_cache else None,
+        }
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _transcribe_sync(self, audio_data: bytes) -> str:
+        response = self.deepgram.listen.v1.media.transcribe_file(
+            request=audio_data,
+            model="nova-2",
+            smart_format=True,
+            punctuate=True,
+            language="en-US"
+        )
+        
+        return response.results.channels[0].alternatives[0].transcript
     
     async def transcribe_audio(self, audio_data: bytes) -> str:
         
+        started = time.perf_counter()
         try:
-            response = self.deepgram.listen.v1.media.transcribe_file(
-                request=audio_data,
-                model="nova-2",
-                smart_format=True,
-                punctuate=True,
-                language="en-US"
-            )
-            
-            
-            transcript = response.results.channels[0].alternatives[0].transcript
+            transcript = await self._run_blocking(self._transcribe_sync, audio_data)
+            metrics.stt_latency.observe(time.perf_counter() - started, recognizer="deepgram")
             return transcript
+        except asyncio.TimeoutError:
+            logger.warning("Transcription timed out after %ss", self.call_timeout)
+            metrics.fallbacks.inc(kind="stt")
+            return "Transcription failed (mock response)"
         except Exception as e:
-            print(f"[TRANSCRIBE] ERROR: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Transcription failed: %s: %s", type(e).__name__, e)
+            metrics.fallbacks.inc(kind="stt")
             return "Transcription failed (mock response)"
 
-    async def transcribe_stream(self, audio_stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
-        pass
+    async def transcribe_stream(self, audio_stream: AsyncIterator[bytes]) -> AsyncIterator[TranscriptEvent]:
+        try:
+            async for event in self.recognizer.recognize(audio_stream):
+                yield event
+        except Exception as e:
+            logger.exception("Streaming transcription failed: %s: %s", type(e).__name__, e)
+            raise
+    
+    def _synthesize_sync(self, text: str, voice: str) -> bytes:
+        response = self.deepgram.speak.v1.audio.generate(
+            text=text,
+            model=voice
+        )
+        
+        
+        if hasattr(response, 'stream'):
+            return response.stream.getvalue()
+        elif hasattr(response, 'content'):
+            return response.content
+        elif isinstance(response, bytes):
+            return response
+        
+        buffer = io.BytesIO()
+        for chunk in response:
+            if isinstance(chunk, bytes):
+                buffer.write(chunk)
+            elif hasattr(chunk, 'data'):
+                buffer.write(chunk.data)
+        return buffer.getvalue()
     
     async def synthesize_speech(self, text: str, role: str = "judge") -> bytes:
         try:
             voice = self.voice_mapping.get(role, "aura-asteria-en")
+            started = time.perf_counter()
             
+            if self.tts_cache:
+                cached = await self.tts_cache.get(voice, text)
+                if cached is not None:
+                    metrics.tts_latency.observe(time.perf_counter() - started, cache="hit")
+                    return cached
             
-            response = self.deepgram.speak.v1.audio.generate(
-                text=text,
-                model=voice
-            )
+            audio_data = await self._run_blocking(self._synthesize_sync, text, voice)
+            metrics.tts_latency.observe(time.perf_counter() - started, cache="miss")
             
-            
-            if hasattr(response, 'stream'):
-                audio_data = response.stream.getvalue()
-            elif hasattr(response, 'content'):
-                audio_data = response.content
-            elif isinstance(response, bytes):
-                audio_data = response
-            else:
-                audio_bytes = b""
-                for chunk in response:
-                    if isinstance(chunk, bytes):
-                        audio_bytes += chunk
-                    elif hasattr(chunk, 'data'):
-                        audio_bytes += chunk.data
-                audio_data = audio_bytes
+            if self.tts_cache and audio_data:
+                await self.tts_cache.put(voice, text, audio_data)
             
             return audio_data
-            
+        
+        except asyncio.TimeoutError:
+            logger.warning("Speech synthesis timed out after %ss", self.call_timeout)
+            metrics.fallbacks.inc(kind="tts")
+            return b""
         except Exception as e:
-            print(f"[SPEAK] ERROR: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Speech synthesis failed: %s: %s", type(e).__name__, e)
+            metrics.fallbacks.inc(kind="tts")
             return b""
     
     def get_voice_for_role(self, role: str) -> str:
@@ -0,0 +1,114 @@
+from typing import List, Optional
+from models.trial import NAPStreamEvent
+import json
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+class SSEDecoder:
+    """Incremental Server-Sent Events decoder operating on raw byte chunks.
+
+    Follows the event-stream format: ``data`` lines are joined with newlines,
+    ``event``, ``id`` and ``retry`` fields are honoured, comment lines (used
+    as keep-alives) are skipped, and an event is dispatched on a blank line.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.event_type: Optional[str] = None
+        self.data_lines: List[bytes] = []
+        self.event_id: Optional[str] = None
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[NAPStreamEvent]:
+        self.buffer += chunk
+        buffer = self.buffer
+        events = []
+        start = 0
+
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline == -1:
+                break
+
+            end = newline
+            if end > start and buffer[end - 1] == 0x0D:
+                end -= 1
+
+            if end == start:
+                event = self._dispatch()
+                if event is not None:
+                    events.append(event)
+            elif buffer[start] != 0x3A:
+                self._process_field(bytes(buffer[start:end]))
+
+            start = newline + 1
+
+        if start:
+            del buffer[:start]
+        return events
+
+    def flush(self) -> List[NAPStreamEvent]:
+        if self.buffer:
+            line = bytes(self.buffer).rstrip(b"\r")
+            self.buffer.clear()
+            if line and not line.startswith(b":"):
+                self._process_field(line)
+
+        event = self._dispatch()
+        return [event] if event is not None else []
+
+    def reset(self):
+        """Drop any partially received event, keeping ``last_event_id`` for resumption."""
+        self.buffer.clear()
+        self.event_type = None
+        self.data_lines = []
+        self.event_id = None
+
+    def _process_field(self, line: bytes):
+        field, sep, value = line.partition(b":")
+        if sep and value.startswith(b" "):
+            value = value[1:]
+
+        if field == b"data":
+            self.data_lines.append(value)
+        elif field == b"event":
+            self.event_type = value.decode("utf-8", errors="replace")
+        elif field == b"id":
+            if b"\0" not in value:
+                self.event_id = value.decode("utf-8", errors="replace")
+        elif field == b"retry":
+            if value.isdigit():
+                self.retry = int(value)
+
+    def _dispatch(self) -> Optional[NAPStreamEvent]:
+        if self.event_id is not None:
+            self.last_event_id = self.event_id
+
+        if not self.data_lines:
+            self.event_type = None
+            self.event_id = None
+            return None
+
+        raw = self.data_lines[0] if len(self.data_lines) == 1 else b"\n".join(self.data_lines)
+        try:
+            data = json_loads(raw)
+            if not isinstance(data, dict):
+                data = {"text": data if isinstance(data, str) else raw.decode("utf-8", errors="replace")}
+        except ValueError:
+            data = {"text": raw.decode("utf-8", errors="replace")}
+
+        event = NAPStreamEvent.model_construct(
+            event=self.event_type or "message",
+            data=data,
+            id=self.event_id
+        )
+
+        self.event_type = None
+        self.event_id = None
+        self.data_lines = []
+        return event
@@ -0,0 +1,193 @@
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    return WHITESPACE.sub(" ", text).strip()
+
+def cache_key(voice: str, text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(voice.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+class TTSCache:
+    """Content-addressed cache for synthesized speech.
+
+    Entries are keyed by (voice, normalized text). A memory LRU tier is bounded
+    by ``max_bytes``; when ``disk_dir`` is set, entries are also written to disk
+    (bounded by ``disk_max_bytes``) and promoted back into memory on a hit.
+
+    A disk file's mtime is when it was written (for the TTL) and its atime
+    when it was last read, so disk eviction drops the least recently used
+    files first. Disk reads and writes run on worker threads, so the disk
+    byte count is kept under ``disk_lock``.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 0
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self.size = 0
+
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_size = 0
+        self.disk_lock = threading.RLock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self.disk_size = sum(path.stat().st_size for path in self.disk_dir.glob("*.audio"))
+
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    async def get(self, voice: str, text: str) -> Optional[bytes]:
+        key = cache_key(voice, text)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            audio_bytes, created_at = entry
+            if not self._is_expired(created_at):
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return audio_bytes
+            self._remove(key)
+
+        if self.disk_dir:
+            loaded = await asyncio.to_thread(self._read_disk, key)
+            if loaded is not None:
+                audio_bytes, created_at = loaded
+                self._store(key, audio_bytes, created_at)
+                self.stats["disk_hits"] += 1
+                return audio_bytes
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, voice: str, text: str, audio_bytes: bytes):
+        if not audio_bytes:
+            return
+
+        key = cache_key(voice, text)
+        created_at = time.time()
+        self._store(key, audio_bytes, created_at)
+
+        if self.disk_dir and len(audio_bytes) <= self.disk_max_bytes:
+            await asyncio.to_thread(self._write_disk, key, audio_bytes)
+
+    def _store(self, key: str, audio_bytes: bytes, created_at: float):
+        self._remove(key)
+        if len(audio_bytes) > self.max_bytes:
+            return
+
+        self.entries[key] = (audio_bytes, created_at)
+        self.size += len(audio_bytes)
+
+        while self.size > self.max_bytes:
+            oldest_key = next(iter(self.entries))
+            self._remove(oldest_key)
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.audio"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[bytes, float]]:
+        path = self._disk_path(key)
+        try:
+            created_at = path.stat().st_mtime
+            if self._is_expired(created_at):
+                self._delete_disk(path)
+                return None
+            audio_bytes = path.read_bytes()
+            os.utime(path, (time.time(), created_at))
+            return audio_bytes, created_at
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, audio_bytes: bytes):
+        path = self._disk_path(key)
+        if path.exists():
+            return
+
+        tmp = tempfile.NamedTemporaryFile(dir=self.disk_dir, suffix=".tmp", delete=False)
+        try:
+            with tmp:
+                tmp.write(audio_bytes)
+
+            with self.disk_lock:
+                if path.exists():
+                    os.unlink(tmp.name)
+                    return
+                os.replace(tmp.name, path)
+                self.disk_size += len(audio_bytes)
+
+                if self.disk_size > self.disk_max_bytes:
+                    self._evict_disk()
+        except BaseException:
+            try:
+                os.unlink(tmp.name)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _evict_disk(self):
+        with self.disk_lock:
+            files = []
+            for path in self.disk_dir.glob("*.audio"):
+                try:
+                    files.append((path.stat().st_atime, path))
+                except FileNotFoundError:
+                    pass
+            files.sort()
+
+            for _, path in files:
+                if self.disk_size <= self.disk_max_bytes:
+                    break
+                self._delete_disk(path)
+                self.stats["evictions"] += 1
+
+    def _delete_disk(self, path: Path):
+        with self.disk_lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self.disk_size -= size
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "disk_bytes": self.disk_size,
+        }
@@ -0,0 +1,4 @@
+import os
+
+# config.Settings requires a Deepgram key; tests never call Deepgram.
+os.environ.setdefault("DEEPGRAM_API_KEY", "test")
@@ -0,0 +1,136 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services.agent_router import (
+    AgentRouter,
+    HashedNgramClassifier,
+    KeywordMatcher,
+    hashed_ngrams,
+    keywords_for,
+    matcher_for,
+)
+
+ROLES = ("judge", "prosecutor", "defense")
+
+class FixedClassifier:
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+    def predict(self, text):
+        return dict(self.probabilities)
+
+def test_matcher_counts_whole_word_hits_per_role():
+    matcher = matcher_for(None)
+
+    assert matcher.score("Your Honor, the defendant pleads not guilty") == {"judge": 1.0, "defense": 2.0}
+    assert matcher.score("The JUDGE's ruling") == {"judge": 2.0}
+    assert matcher.score("The defendants agree") == {"defense": 1.0}
+    assert matcher.score("A judgement was prejudged") == {}
+
+def test_matcher_prefers_the_longest_phrase():
+    matcher = KeywordMatcher({"prosecutor": ("crown", "the crown's case"), "judge": ("case",)})
+
+    assert matcher.score("That is the crown's case") == {"prosecutor": 1.0}
+
+def test_jurisdiction_keywords_extend_the_defaults():
+    keywords = keywords_for("  United Kingdom ")
+
+    assert "your honor" in keywords["judge"]
+    assert "my lord" in keywords["judge"]
+    assert "crown" in keywords["prosecutor"]
+    assert keywords_for("Atlantis") == keywords_for(None)
+    assert matcher_for("united kingdom").score("May it please you, my lord") == {"judge": 1.0}
+
+def test_route_picks_the_highest_scoring_available_role():
+    router = AgentRouter(matcher_for(None), min_score=0.35)
+
+    assert router.route("My client is not guilty", ROLES) == "defense"
+    assert router.route("The prosecution and the prosecutor disagree with the defense", ROLES) == "prosecutor"
+    assert router.route("My client is not guilty", ("judge", "prosecutor")) != "defense"
+
+def test_route_breaks_ties_by_role_priority():
+    router = AgentRouter(matcher_for(None), min_score=0.35)
+
+    assert router.route("The prosecutor and the defendant", ROLES) == "prosecutor"
+    assert router.route("Judge, the defendant", ROLES) == "judge"
+
+def test_route_falls_back_to_the_next_speaker():
+    router = AgentRouter(matcher_for(None), min_score=0.35)
+
+    assert router.route("Let us continue", ROLES) == "judge"
+    assert router.route("Let us continue", ROLES, last_role="prosecutor") == "defense"
+    assert router.route("Let us continue", ROLES, last_role="defense") == "prosecutor"
+    assert router.route("Let us continue", ("judge", "defense"), last_role="judge") == "defense"
+
+def test_classifier_probability_is_weighted_in():
+    classifier = FixedClassifier({"judge": 0.1, "prosecutor": 0.2, "defense": 0.7})
+    router = AgentRouter(matcher_for(None), classifier, classifier_weight=0.5, min_score=0.35)
+
+    assert router.score("Let us continue") == pytest.approx({"judge": 0.05, "prosecutor": 0.1, "defense": 0.35})
+    assert router.route("Let us continue", ROLES) == "defense"
+    assert router.route("Your Honor, let us continue", ROLES) == "judge"
+
+def test_route_many_adds_other_qualifying_roles_in_score_order():
+    router = AgentRouter(matcher_for(None), min_score=0.35)
+    text = "Judge, the prosecutor ignores that my client, the defendant, is not guilty"
+
+    assert router.route_many(text, ROLES, limit=1) == ["defense"]
+    assert router.route_many(text, ROLES, limit=3) == ["defense", "judge", "prosecutor"]
+    assert router.route_many(text, ROLES, limit=2) == ["defense", "judge"]
+    assert router.route_many("Let us continue", ROLES, "judge", limit=3) == ["prosecutor"]
+
+TRAINING = [
+    ("I sustain the objection and will rule now", "judge"),
+    ("the court will take a short recess", "judge"),
+    ("order in the court please", "judge"),
+    ("the evidence proves the accused committed the crime", "prosecutor"),
+    ("we will show the jury the weapon", "prosecutor"),
+    ("the state calls its next witness", "prosecutor"),
+    ("my client was at home that night", "defense"),
+    ("there is reasonable doubt here", "defense"),
+    ("we move to dismiss for lack of evidence", "defense"),
+]
+
+def test_hashed_ngrams_cover_unigrams_and_bigrams():
+    assert len(hashed_ngrams("Order in the court", 1 << 16, ngram=2)) == 4 + 3
+    assert all(0 <= bucket < 8 for bucket in hashed_ngrams("order in the court", 8))
+    assert hashed_ngrams("Order!", 64) == hashed_ngrams("order", 64)
+
+def test_classifier_learns_the_training_roles():
+    classifier = HashedNgramClassifier.train(TRAINING, n_features=1 << 12)
+
+    probabilities = classifier.predict("the court will recess")
+    assert sum(probabilities.values()) == pytest.approx(1.0)
+    assert max(probabilities, key=probabilities.get) == "judge"
+
+    probabilities = classifier.predict("reasonable doubt about my client")
+    assert max(probabilities, key=probabilities.get) == "defense"
+
+def test_classifier_round_trips_through_json(tmp_path):
+    classifier = HashedNgramClassifier.train(TRAINING, n_features=1 << 12)
+    path = tmp_path / "router.json"
+    classifier.save(str(path))
+
+    loaded = HashedNgramClassifier.load(str(path))
+
+    for text, _ in TRAINING:
+        assert loaded.predict(text) == pytest.approx(classifier.predict(text))
+
+def test_training_without_samples_fails():
+    with pytest.raises(ValueError):
+        HashedNgramClassifier.train([])
+
+def test_route_many_scores_the_message_once():
+    class CountingClassifier(FixedClassifier):
+        calls = 0
+
+        def predict(self, text):
+            self.calls += 1
+            return super().predict(text)
+
+    classifier = CountingClassifier({"judge": 0.2, "prosecutor": 0.4, "defense": 0.4})
+    router = AgentRouter(matcher_for(None), classifier, classifier_weight=1.0, min_score=0.35)
+
+    assert router.route_many("Let us continue", ROLES, limit=3) == ["prosecutor", "defense"]
+    assert classifier.calls == 1
@@ -0,0 +1,102 @@
+from services.conversation_history import ConversationHistory, Speaker
+
+def test_window_folds_oldest_turns_into_summary():
+    history = ConversationHistory(window=2, summary_max_chars=1000)
+    history.append("user", "We call the first witness. She saw everything.", timestamp=1)
+    history.append("judge", "Proceed.", timestamp=2)
+    history.append("prosecutor", "Thank you, Your Honor.", timestamp=3)
+
+    assert [entry.speaker for entry in history] == [Speaker.JUDGE, Speaker.PROSECUTOR]
+    assert history.folded == 1
+    assert history.summary == (
+        "EARLIER IN THE PROCEEDINGS (1 turns, oldest first):\n"
+        "- User: We call the first witness."
+    )
+
+def test_summary_lines_are_truncated():
+    history = ConversationHistory(window=1, summary_max_chars=1000)
+    history.append("defense", "word " * 100)
+    history.append("judge", "Noted.")
+
+    line = history.summary_lines[0]
+    assert line.startswith("Defense: word word")
+    assert line.endswith("...")
+    assert len(line) <= len("Defense: ") + 200
+
+def test_summary_drops_oldest_lines_beyond_limit():
+    history = ConversationHistory(window=1, summary_max_chars=60)
+    for index in range(6):
+        history.append("judge", f"Ruling number {index}.")
+
+    assert history.folded == 5
+    assert history.summary_chars <= 60
+    assert list(history.summary_lines)[-1] == "Judge: Ruling number 4."
+    assert "Ruling number 0" not in history.summary
+    omitted = 5 - len(history.summary_lines)
+    assert f"{omitted} earliest omitted" in history.summary
+
+def test_empty_history_has_no_summary():
+    history = ConversationHistory(window=3, summary_max_chars=100)
+
+    assert history.summary == ""
+    assert history.last_agent() is None
+    assert history.to_messages() == []
+
+def test_last_agent_skips_user_turns():
+    history = ConversationHistory(window=5, summary_max_chars=100)
+    history.append("prosecutor", "The state rests.")
+    history.append("user", "Objection!")
+    history.append("user", "Your Honor?")
+
+    assert history.last_agent().speaker is Speaker.PROSECUTOR
+
+def test_messages_keep_the_trial_page_shape():
+    history = ConversationHistory(window=5, summary_max_chars=100)
+    history.append("user", "Hello", timestamp=0)
+    history.append("judge", "Order.", timestamp=0)
+
+    user, judge = history.to_messages()
+    assert user["id"] == "msg_0" and user["type"] == "user" and "role" not in user
+    assert judge["id"] == "msg_1" and judge["type"] == "agent" and judge["role"] == "judge"
+    assert judge["content"] == "Order."
+
+def test_round_trip_through_dict():
+    history = ConversationHistory(window=2, summary_max_chars=1000)
+    for index, speaker in enumerate(["user", "judge", "prosecutor", "defense"]):
+        history.append(speaker, f"Turn {index}.", timestamp=index)
+
+    restored = ConversationHistory.from_dict(history.to_dict(), window=2, summary_max_chars=1000)
+
+    assert restored.to_dict() == history.to_dict()
+    assert restored.summary == history.summary
+    restored.append("user", "Next.")
+    assert restored.to_messages()[-1]["id"] == "msg_4"
+
+def test_smaller_window_on_load_folds_the_excess():
+    history = ConversationHistory(window=4, summary_max_chars=1000)
+    for index in range(4):
+        history.append("judge", f"Turn {index}.", timestamp=index)
+
+    restored = ConversationHistory.from_dict(history.to_dict(), window=2, summary_max_chars=1000)
+
+    assert len(restored) == 2
+    assert restored.folded == 2
+    assert list(restored.summary_lines) == ["Judge: Turn 0.", "Judge: Turn 1."]
+
+def test_legacy_message_list_is_migrated():
+    legacy = [
+        {"id": "msg_0", "type": "user", "content": "Good morning.", "timestamp": "2024-05-01T09:00:00"},
+        {"id": "msg_1", "type": "agent", "role": "judge", "content": "Be seated. We begin.", "timestamp": "2024-05-01T09:00:05"},
+        {"id": "msg_2", "type": "agent", "role": "defense", "content": "Thank you."},
+    ]
+
+    history = ConversationHistory.from_dict(legacy, window=2, summary_max_chars=1000)
+
+    assert [entry.speaker for entry in history] == [Speaker.JUDGE, Speaker.DEFENSE]
+    assert list(history.summary_lines) == ["User: Good morning."]
+    assert history.to_messages()[0]["timestamp"] == "2024-05-01T09:00:05"
+    assert history.next_seq == 3
+
+def test_missing_data_gives_empty_history():
+    assert len(ConversationHistory.from_dict(None, window=2, summary_max_chars=100)) == 0
+    assert len(ConversationHistory.from_dict([], window=2, summary_max_chars=100)) == 0
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("PyPDF2")
+pytest.importorskip("pytesseract")
+pytest.importorskip("pydantic_settings")
+
+from PIL import Image
+
+from config import settings
+from services import document_extraction
+from services.document_extraction import DocumentExtractor, ExtractionLimitError, find_band_cuts
+
+def make_job(extractor, filename):
+    return extractor.create_job("session", filename)
+
+async def record_progress(progress, job):
+    progress.append((job.completed, job.total))
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_spool_dir", str(tmp_path))
+    return tmp_path
+
+def test_parts_are_joined_in_order_with_progress():
+    async def part(text, delay):
+        await asyncio.sleep(delay)
+        return text
+
+    async def scenario():
+        extractor = DocumentExtractor()
+        job = make_job(extractor, "brief.pdf")
+        progress = []
+        texts = await extractor._run_parts(
+            job,
+            [part("one", 0.02), part("two", 0.0), part("three", 0.01)],
+            lambda job: record_progress(progress, job)
+        )
+        return texts, progress
+
+    texts, progress = asyncio.run(scenario())
+
+    assert texts == ["one", "two", "three"]
+    assert progress == [(0, 3), (1, 3), (2, 3), (3, 3)]
+
+def test_failed_part_cancels_the_others():
+    async def scenario():
+        started = asyncio.Event()
+        slow_cancelled = []
+
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                slow_cancelled.append(True)
+                raise
+            return "slow"
+
+        async def failing():
+            await started.wait()
+            raise RuntimeError("bad page")
+
+        extractor = DocumentExtractor()
+        job = make_job(extractor, "brief.pdf")
+        with pytest.raises(RuntimeError, match="bad page"):
+            await extractor._run_parts(job, [slow(), failing()], lambda job: record_progress([], job))
+        await asyncio.sleep(0)
+        return job, slow_cancelled
+
+    job, slow_cancelled = asyncio.run(asyncio.wait_for(scenario(), 2.0))
+
+    assert slow_cancelled == [True]
+    assert job.completed == 0
+
+def test_text_files_are_decoded_without_spooling(spool_dir):
+    async def scenario():
+        extractor = DocumentExtractor()
+        job = make_job(extractor, "notes.txt")
+        return job, await extractor.extract(job, "Witness list".encode("utf-8"), lambda job: record_progress([], job))
+
+    job, text = asyncio.run(scenario())
+
+    assert text == "Witness list"
+    assert job.status == "running"
+    assert list(spool_dir.iterdir()) == []
+
+def test_spooled_upload_is_removed_when_extraction_fails(spool_dir, monkeypatch):
+    seen = []
+
+    async def run(self, func, path, *args):
+        seen.append(path)
+        assert open(path, "rb").read() == b"%PDF-fake"
+        return settings.extraction_max_pages + 1
+
+    monkeypatch.setattr(DocumentExtractor, "_run", run)
+
+    async def scenario():
+        extractor = DocumentExtractor()
+        job = make_job(extractor, "Huge.PDF")
+        with pytest.raises(ExtractionLimitError):
+            await extractor.extract(job, b"%PDF-fake", lambda job: record_progress([], job))
+
+    asyncio.run(scenario())
+
+    assert len(seen) == 1
+    assert list(spool_dir.iterdir()) == []
+
+def test_image_bands_are_read_from_one_spooled_file(spool_dir, monkeypatch):
+    async def run(self, func, *args):
+        return func(*args)
+
+    def ocr_image_band(path, top, bottom):
+        return f"{top}-{bottom}"
+
+    monkeypatch.setattr(DocumentExtractor, "_run", run)
+    monkeypatch.setattr(document_extraction, "ocr_image_band", ocr_image_band)
+    monkeypatch.setattr(settings, "extraction_ocr_band_height", 40)
+    image = Image.new("L", (20, 100), 255)
+    image.paste(0, (5, 30, 15, 50))
+    content_path = spool_dir / "scan.png"
+    image.save(content_path)
+    content = content_path.read_bytes()
+    content_path.unlink()
+
+    async def scenario():
+        extractor = DocumentExtractor()
+        job = make_job(extractor, "scan.png")
+        progress = []
+        text = await extractor.extract(job, content, lambda job: record_progress(progress, job))
+        return text, progress
+
+    text, progress = asyncio.run(scenario())
+
+    assert text == "0-50\n50-90\n90-100"
+    assert progress[-1] == (3, 3)
+    assert list(spool_dir.iterdir()) == []
+
+def test_band_cuts_move_to_the_nearest_blank_row(tmp_path):
+    image = Image.new("L", (20, 200), 255)
+    image.paste(0, (5, 92, 15, 120))
+    image.paste(0, (5, 150, 15, 200))
+    path = tmp_path / "page.png"
+    image.save(path)
+
+    assert find_band_cuts(str(path), 100) == [0, 91, 191, 200]
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services.event_bus import MemoryEventBus, SlowSubscriberError
+
+async def collect(subscription, into, count):
+    async for message in subscription:
+        into.append(message)
+        if len(into) == count:
+            return
+
+def test_events_reach_every_subscriber_of_the_channel_in_order():
+    async def scenario():
+        bus = MemoryEventBus(max_pending=8)
+        first, second, other = [], [], []
+        readers = [
+            asyncio.create_task(collect(bus.subscribe("trial:a"), first, 2)),
+            asyncio.create_task(collect(bus.subscribe("trial:a"), second, 2)),
+            asyncio.create_task(collect(bus.subscribe("trial:b"), other, 1)),
+        ]
+        await asyncio.sleep(0)
+
+        await bus.publish("trial:a", {"n": 1})
+        await bus.publish("trial:a", {"n": 2})
+        await bus.publish("trial:b", {"n": 3})
+        await asyncio.wait_for(asyncio.gather(*readers), 1.0)
+        return bus, first, second, other
+
+    bus, first, second, other = asyncio.run(scenario())
+
+    assert first == second == [{"n": 1}, {"n": 2}]
+    assert other == [{"n": 3}]
+    assert bus.subscribers == {}
+
+def test_publishing_without_subscribers_is_a_no_op():
+    async def scenario():
+        bus = MemoryEventBus(max_pending=1)
+        await bus.publish("trial:a", {"n": 1})
+        return bus
+
+    assert asyncio.run(scenario()).subscribers == {}
+
+def test_slow_subscriber_is_dropped_without_blocking_others():
+    async def scenario():
+        bus = MemoryEventBus(max_pending=2)
+        slow = bus.subscribe("trial:a")
+        first = asyncio.create_task(slow.__anext__())
+        fast = []
+        reader = asyncio.create_task(collect(bus.subscribe("trial:a"), fast, 4))
+        await asyncio.sleep(0)
+
+        await bus.publish("trial:a", {"n": 0})
+        received = await first
+        for n in range(1, 4):
+            await bus.publish("trial:a", {"n": n})
+            await asyncio.sleep(0)
+        await asyncio.wait_for(reader, 1.0)
+
+        with pytest.raises(SlowSubscriberError):
+            await slow.__anext__()
+        return bus, received, fast
+
+    bus, received, fast = asyncio.run(scenario())
+
+    assert received == {"n": 0}
+    assert [message["n"] for message in fast] == [0, 1, 2, 3]
+    assert bus.subscribers == {}
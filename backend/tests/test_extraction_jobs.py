@@ -0,0 +1,95 @@
+import asyncio
+import types
+import uuid
+
+import pytest
+
+for module in ("fastapi", "pyagentspec", "httpx", "deepgram", "PIL", "PyPDF2", "pytesseract"):
+    pytest.importorskip(module)
+
+from fastapi import HTTPException
+
+from routers import trial
+from services.session_store import SQLiteSessionStore
+
+def open_jobs(path):
+    return SQLiteSessionStore(str(path), "extraction_job", dict, dict, ttl=60.0, max_cached=8, merge=trial.keep_running_job)
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    path = tmp_path / "sessions.db"
+    monkeypatch.setattr(trial, "extraction_jobs", open_jobs(path))
+    return path
+
+@pytest.fixture
+def documents(monkeypatch):
+    attached = {}
+
+    async def update_trial_session(session_id, mutate):
+        session = {"case_context": types.SimpleNamespace(additional_info=attached)}
+        mutate(session)
+        return session
+
+    monkeypatch.setattr(trial, "update_trial_session", update_trial_session)
+    return attached
+
+async def start_job(filename):
+    job = trial.document_extractor.create_job("session", filename)
+    record = {}
+    await trial.save_extraction_job(record, job)
+    return job, record
+
+def test_job_progress_is_visible_to_another_worker(stores, documents, monkeypatch):
+    polled = []
+
+    async def extract(job, content, on_progress):
+        job.status = "running"
+        job.total = 3
+        job.completed = 3
+        await asyncio.gather(*(on_progress(job) for _ in range(3)))
+        polled.append(await open_jobs(stores).get(job.job_id))
+        return content.decode("utf-8")
+
+    monkeypatch.setattr(trial.document_extractor, "extract", extract)
+
+    async def scenario():
+        job, record = await start_job("notes.txt")
+        await trial.run_extraction_job(job, record, b"Witness list", str(uuid.uuid4()))
+        trial.extraction_jobs = open_jobs(stores)
+        return job, await trial.get_extraction_job("session", job.job_id)
+
+    job, reported = asyncio.run(scenario())
+
+    assert polled[0]["status"] == "running" and polled[0]["completed"] == 3
+    assert reported == {**job.model_dump(), "status": "completed", "text_length": 12}
+    assert documents == {"notes.txt": "Witness list"}
+
+def test_failed_job_records_the_error(stores, documents, monkeypatch):
+    async def extract(job, content, on_progress):
+        raise ValueError("PDF has 900 pages; the limit is 500")
+
+    monkeypatch.setattr(trial.document_extractor, "extract", extract)
+
+    async def scenario():
+        job, record = await start_job("brief.pdf")
+        await trial.run_extraction_job(job, record, b"%PDF", str(uuid.uuid4()))
+        return await trial.get_extraction_job("session", job.job_id)
+
+    reported = asyncio.run(scenario())
+
+    assert reported["status"] == "failed"
+    assert reported["error"] == "PDF has 900 pages; the limit is 500"
+    assert documents == {}
+
+def test_job_is_only_reported_for_its_own_session(stores):
+    async def scenario():
+        job, _ = await start_job("notes.txt")
+        with pytest.raises(HTTPException) as wrong_session:
+            await trial.get_extraction_job("other", job.job_id)
+        with pytest.raises(HTTPException) as unknown:
+            await trial.get_extraction_job("session", "missing")
+        return wrong_session.value, unknown.value
+
+    wrong_session, unknown = asyncio.run(scenario())
+
+    assert wrong_session.status_code == unknown.status_code == 404
@@ -0,0 +1,189 @@
+import asyncio
+import pytest
+
+pytest.importorskip("fastapi")
+
+from ws_handlers.outbound import DeliveryLanes, OutboundWriter
+
+class FakeSocket:
+    def __init__(self):
+        self.frames = []
+        self.closed_with = None
+        self.open = asyncio.Event()
+        self.open.set()
+        self.fail = None
+
+    async def send_json(self, message):
+        await self.open.wait()
+        if self.fail is not None:
+            raise self.fail
+        self.frames.append(("json", dict(message)))
+
+    async def send_bytes(self, data):
+        await self.open.wait()
+        self.frames.append(("bytes", data))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+def make_writer(socket, max_queue=16, flush_interval=0.02, max_batch_chars=1000):
+    return OutboundWriter(socket, "test", max_queue, flush_interval, max_batch_chars)
+
+def delta(text, role="judge", **extra):
+    return {"type": "agent_response_delta", "role": role, "text": text, **extra}
+
+def test_deltas_coalesce_into_one_frame():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket)
+        for text in ("Order", " in", " the", " court."):
+            await writer.send_json(delta(text))
+        await writer.close()
+        return socket, writer
+
+    socket, writer = asyncio.run(scenario())
+
+    assert socket.frames == [("json", delta("Order in the court."))]
+    assert writer.stats["merged"] == 3
+    assert writer.stats["frames"] == 1
+
+def test_caller_dict_is_not_mutated():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket)
+        first = delta("a")
+        await writer.send_json(first)
+        await writer.send_json(delta("b"))
+        await writer.close()
+        return first
+
+    assert asyncio.run(scenario())["text"] == "a"
+
+def test_deltas_from_other_roles_or_complete_messages_do_not_merge():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket)
+        await writer.send_json(delta("one", role="judge"))
+        await writer.send_json(delta("two", role="defense"))
+        await writer.send_json(delta("", role="defense", isComplete=True))
+        await writer.close()
+        return socket
+
+    socket = asyncio.run(scenario())
+
+    assert [payload["text"] for _, payload in socket.frames] == ["one", "two", ""]
+
+def test_batch_limit_flushes_without_waiting_for_interval():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket, flush_interval=10.0, max_batch_chars=8)
+        await writer.send_json(delta("1234"))
+        await writer.send_json(delta("5678"))
+        while not socket.frames:
+            await asyncio.sleep(0.001)
+        await writer.close()
+        return socket
+
+    socket = asyncio.run(asyncio.wait_for(scenario(), 2.0))
+
+    assert socket.frames[0][1]["text"] == "12345678"
+
+def test_interim_transcripts_replace_each_other_while_blocked():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket)
+        await writer.send_json({"type": "processing"})
+        await asyncio.sleep(0.01)
+        socket.open.clear()
+
+        await writer.send_json({"type": "status"})
+        for text in ("I", "I object", "I object to that"):
+            await writer.send_json({"type": "transcription_interim", "text": text})
+
+        socket.open.set()
+        await writer.close()
+        return socket, writer
+
+    socket, writer = asyncio.run(scenario())
+
+    assert [payload for _, payload in socket.frames] == [
+        {"type": "processing"},
+        {"type": "status"},
+        {"type": "transcription_interim", "text": "I object to that"},
+    ]
+    assert writer.stats["replaced"] == 2
+
+def test_full_queue_blocks_producers_until_socket_drains():
+    async def scenario():
+        socket = FakeSocket()
+        socket.open.clear()
+        writer = make_writer(socket, max_queue=2)
+
+        await writer.send_bytes(b"1")
+        await writer.send_bytes(b"2")
+        await writer.send_bytes(b"3")
+        blocked = asyncio.create_task(writer.send_bytes(b"4"))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+
+        socket.open.set()
+        await blocked
+        await writer.close()
+        return socket, was_blocked
+
+    socket, was_blocked = asyncio.run(asyncio.wait_for(scenario(), 2.0))
+
+    assert was_blocked
+    assert socket.frames == [("bytes", b"1"), ("bytes", b"2"), ("bytes", b"3"), ("bytes", b"4")]
+
+def test_send_failure_is_raised_to_later_senders():
+    async def scenario():
+        socket = FakeSocket()
+        socket.fail = ConnectionError("gone")
+        writer = make_writer(socket)
+        await writer.send_json({"type": "status"})
+        await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError, match="gone"):
+            await writer.send_json({"type": "status"})
+
+    asyncio.run(scenario())
+
+def test_close_flushes_queue_and_closes_socket():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket, flush_interval=10.0)
+        await writer.send_json(delta("held"))
+        await writer.close(code=1000)
+        with pytest.raises(RuntimeError):
+            await writer.send_json({"type": "status"})
+        return socket
+
+    socket = asyncio.run(asyncio.wait_for(scenario(), 2.0))
+
+    assert socket.frames == [("json", delta("held"))]
+    assert socket.closed_with == 1000
+
+def test_lanes_are_delivered_contiguously_in_order():
+    async def scenario():
+        socket = FakeSocket()
+        writer = make_writer(socket)
+        lanes = DeliveryLanes(writer)
+        first, second, third = lanes.lane(0), lanes.lane(1), lanes.lane(2)
+
+        await second.send_json({"type": "status", "lane": 1, "n": 0})
+        await first.send_json({"type": "status", "lane": 0, "n": 0})
+        await third.send_json({"type": "status", "lane": 2, "n": 0})
+        await second.send_json({"type": "status", "lane": 1, "n": 1})
+        await lanes.close_lane(1)
+        await first.send_json({"type": "status", "lane": 0, "n": 1})
+        await lanes.close_lane(0)
+        await third.send_json({"type": "status", "lane": 2, "n": 1})
+        await lanes.close_lane(2)
+        await writer.close()
+        return socket
+
+    socket = asyncio.run(scenario())
+
+    assert [(payload["lane"], payload["n"]) for _, payload in socket.frames] == [
+        (0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (2, 1),
+    ]
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from services.response_cache import CacheEntry, ResponseCache
+
+class Loader:
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        value = self.values.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+def test_etag_depends_only_on_the_value():
+    assert CacheEntry({"a": 1, "b": 2}, 1, 0).etag == CacheEntry({"b": 2, "a": 1}, 5, 5).etag
+    assert CacheEntry({"a": 1}, 1, 0).etag != CacheEntry({"a": 2}, 1, 0).etag
+
+def test_fresh_entries_are_served_without_loading():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(["first"], ["second"])
+        first = await cache.get_or_load("k", loader, ttl=60)
+        second = await cache.get_or_load("k", loader, ttl=60)
+        return cache, loader, first, second
+
+    cache, loader, first, second = asyncio.run(scenario())
+
+    assert first is second
+    assert loader.calls == 1
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(["value"])
+        loader.release.clear()
+        waiters = [asyncio.create_task(cache.get_or_load("k", loader, ttl=60)) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        return cache, loader, await asyncio.gather(*waiters)
+
+    cache, loader, entries = asyncio.run(scenario())
+
+    assert loader.calls == 1
+    assert all(entry is entries[0] for entry in entries)
+    assert cache.stats["coalesced"] == 4
+    assert cache.get_stats()["inflight"] == 0
+
+def test_cancelled_waiter_does_not_cancel_the_shared_load():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(["value"])
+        loader.release.clear()
+        first = asyncio.create_task(cache.get_or_load("k", loader, ttl=60))
+        second = asyncio.create_task(cache.get_or_load("k", loader, ttl=60))
+        await asyncio.sleep(0)
+        first.cancel()
+        loader.release.set()
+        return await second
+
+    assert asyncio.run(scenario()).value == ["value"]
+
+def test_failed_load_is_raised_and_not_cached():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(ConnectionError("down"), ["value"])
+        with pytest.raises(ConnectionError):
+            await cache.get_or_load("k", loader, ttl=60)
+        return await cache.get_or_load("k", loader, ttl=60)
+
+    assert asyncio.run(scenario()).value == ["value"]
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(["old"], ["new"])
+        await cache.get_or_load("k", loader, ttl=0, stale_ttl=60)
+
+        loader.release.clear()
+        stale = [await cache.get_or_load("k", loader, ttl=0, stale_ttl=60) for _ in range(3)]
+        loader.release.set()
+        await asyncio.sleep(0.01)
+        return cache, loader, stale, cache.entries["k"]
+
+    cache, loader, stale, refreshed = asyncio.run(scenario())
+
+    assert [entry.value for entry in stale] == [["old"]] * 3
+    assert loader.calls == 2
+    assert refreshed.value == ["new"]
+    assert cache.stats["stale_hits"] == 3
+
+def test_failed_refresh_keeps_the_stale_entry():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(["old"], ConnectionError("down"))
+        await cache.get_or_load("k", loader, ttl=0, stale_ttl=60)
+        stale = await cache.get_or_load("k", loader, ttl=0, stale_ttl=60)
+        await asyncio.sleep(0.01)
+        return cache, stale
+
+    cache, stale = asyncio.run(scenario())
+
+    assert stale.value == ["old"]
+    assert cache.entries["k"] is stale
+    assert cache.stats["refresh_errors"] == 1
+
+def test_expired_entry_waits_for_a_new_load():
+    async def scenario():
+        cache = ResponseCache()
+        loader = Loader(["old"], ["new"])
+        await cache.get_or_load("k", loader, ttl=0, stale_ttl=0)
+        return await cache.get_or_load("k", loader, ttl=0, stale_ttl=0)
+
+    assert asyncio.run(scenario()).value == ["new"]
+
+def test_least_recently_used_entries_are_dropped():
+    async def scenario():
+        cache = ResponseCache(max_entries=2)
+        for key in ("a", "b"):
+            await cache.get_or_load(key, Loader([key]), ttl=60)
+        await cache.get_or_load("a", Loader(["unused"]), ttl=60)
+        await cache.get_or_load("c", Loader(["c"]), ttl=60)
+        return list(cache.entries)
+
+    assert asyncio.run(scenario()) == ["a", "c"]
@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from services.session_store import (
+    VERSION_KEY,
+    MemorySessionStore,
+    SQLiteSessionStore,
+    StaleSessionError,
+)
+
+def union_notes(session, latest):
+    session["notes"] = sorted(set(session["notes"]) | set(latest["notes"]))
+
+def make_store(path, merge=None, ttl=60.0):
+    return SQLiteSessionStore(str(path), "test", dict, dict, ttl=ttl, max_cached=8, merge=merge)
+
+def test_sqlite_round_trip_tracks_the_row_version(tmp_path):
+    async def scenario():
+        store = make_store(tmp_path / "sessions.db")
+        await store.save("s1", {"notes": ["a"]})
+        first = store.cache.pop("s1")[1]
+        loaded = await store.get("s1")
+        return first, loaded, await store.count()
+
+    first, loaded, count = asyncio.run(scenario())
+
+    assert loaded == {"notes": ["a"], VERSION_KEY: 1}
+    assert loaded is not first
+    assert count == 1
+
+def test_stale_save_without_merge_is_refused(tmp_path):
+    async def scenario():
+        path = tmp_path / "sessions.db"
+        worker_a, worker_b = make_store(path), make_store(path)
+        await worker_a.save("s1", {"notes": []})
+
+        mine = await worker_a.get("s1")
+        theirs = await worker_b.get("s1")
+        theirs["notes"].append("b")
+        await worker_b.save("s1", theirs)
+
+        mine["notes"].append("a")
+        with pytest.raises(StaleSessionError):
+            await worker_a.save("s1", mine)
+        return await make_store(path).get("s1")
+
+    stored = asyncio.run(scenario())
+
+    assert stored["notes"] == ["b"]
+
+def test_stale_save_is_merged_into_the_latest_copy(tmp_path):
+    async def scenario():
+        path = tmp_path / "sessions.db"
+        worker_a, worker_b = make_store(path, union_notes), make_store(path, union_notes)
+        await worker_a.save("s1", {"notes": []})
+
+        mine = await worker_a.get("s1")
+        theirs = await worker_b.get("s1")
+        theirs["notes"].append("b")
+        await worker_b.save("s1", theirs)
+
+        mine["notes"].append("a")
+        await worker_a.save("s1", mine)
+        return mine, await make_store(path).get("s1")
+
+    mine, stored = asyncio.run(scenario())
+
+    assert stored["notes"] == ["a", "b"]
+    assert stored[VERSION_KEY] == mine[VERSION_KEY] == 3
+
+def test_update_reapplies_the_change_to_the_latest_copy(tmp_path):
+    async def scenario():
+        path = tmp_path / "sessions.db"
+        worker_a, worker_b = make_store(path), make_store(path)
+        await worker_a.save("s1", {"notes": []})
+        await worker_a.get("s1")
+
+        theirs = await worker_b.get("s1")
+        theirs["notes"].append("b")
+        await worker_b.save("s1", theirs)
+
+        updated = await worker_a.update("s1", lambda session: session["notes"].append("a"))
+        missing = await worker_a.update("nope", lambda session: session["notes"].append("a"))
+        return updated, missing, await make_store(path).get("s1")
+
+    updated, missing, stored = asyncio.run(scenario())
+
+    assert stored["notes"] == ["b", "a"]
+    assert updated["notes"] == ["b", "a"]
+    assert missing is None
+
+def test_new_session_does_not_overwrite_a_live_row(tmp_path):
+    async def scenario():
+        path = tmp_path / "sessions.db"
+        worker_a, worker_b = make_store(path), make_store(path)
+        await worker_a.save("s1", {"notes": ["a"]})
+        with pytest.raises(StaleSessionError):
+            await worker_b.save("s1", {"notes": ["b"]})
+        return await worker_b.get("s1")
+
+    stored = asyncio.run(scenario())
+
+    assert stored["notes"] == ["a"]
+
+def test_save_after_delete_writes_a_new_row(tmp_path):
+    async def scenario():
+        path = tmp_path / "sessions.db"
+        worker_a, worker_b = make_store(path), make_store(path)
+        await worker_a.save("s1", {"notes": []})
+        mine = await worker_a.get("s1")
+        await worker_b.delete("s1")
+
+        mine["notes"].append("a")
+        await worker_a.save("s1", mine)
+        return await worker_b.get("s1")
+
+    stored = asyncio.run(scenario())
+
+    assert stored == {"notes": ["a"], VERSION_KEY: 1}
+
+def test_expired_rows_are_not_returned(tmp_path):
+    async def scenario():
+        store = make_store(tmp_path / "sessions.db")
+        await store.save("s1", {"notes": []}, ttl=-1)
+        return await store.get("s1"), await store.count()
+
+    assert asyncio.run(scenario()) == (None, 0)
+
+def test_memory_store_reads_push_the_expiry_out():
+    async def scenario():
+        store = MemorySessionStore(max_sessions=2, ttl=60.0)
+        await store.save("s1", {})
+        store.sessions["s1"] = ({}, time.time() + 1, 60.0)
+        await store.get("s1")
+        return store.sessions["s1"][1] - time.time()
+
+    assert asyncio.run(scenario()) > 30
+
+def test_memory_store_evicts_least_recently_used():
+    async def scenario():
+        store = MemorySessionStore(max_sessions=2, ttl=60.0)
+        await store.save("s1", {"n": 1})
+        await store.save("s2", {"n": 2})
+        await store.get("s1")
+        await store.save("s3", {"n": 3})
+        return [await store.get(session_id) for session_id in ("s1", "s2", "s3")]
+
+    assert asyncio.run(scenario()) == [{"n": 1}, None, {"n": 3}]
+
+def test_memory_store_drops_expired_sessions():
+    async def scenario():
+        store = MemorySessionStore(max_sessions=2, ttl=60.0)
+        await store.save("s1", {}, ttl=60.0)
+        store.sessions["s1"] = ({}, time.time() - 1, 60.0)
+        return await store.get("s1"), await store.count()
+
+    assert asyncio.run(scenario()) == (None, 0)
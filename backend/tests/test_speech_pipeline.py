@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("deepgram")
+pytest.importorskip("pydantic_settings")
+
+from services import speech_pipeline
+from services.speech_pipeline import SentenceSplitter, SpeechPipeline
+
+def split(chunks, min_length=20):
+    splitter = SentenceSplitter(min_length=min_length)
+    sentences = []
+    for chunk in chunks:
+        sentences.extend(splitter.feed(chunk))
+    return sentences, splitter.flush()
+
+def test_splitter_emits_sentences_as_they_complete():
+    splitter = SentenceSplitter(min_length=5)
+
+    assert splitter.feed("Order in the court") == []
+    assert splitter.feed(".") == []
+    assert splitter.feed(" The defendant") == ["Order in the court."]
+    assert splitter.feed(" will rise! Now") == ["The defendant will rise!"]
+    assert splitter.flush() == "Now"
+    assert splitter.flush() is None
+
+def test_splitter_skips_abbreviations_and_merges_short_fragments():
+    sentences, rest = split(["Mr. Smith cites Art. 5 of the code. Yes. ", "That is all we ask today. "])
+
+    assert sentences == ["Mr. Smith cites Art. 5 of the code.", "Yes. That is all we ask today."]
+    assert rest is None
+
+def test_splitter_waits_for_closing_quotes_split_across_feeds():
+    sentences, rest = split(['He said "I object.', '" Then he sat down quietly.'], min_length=5)
+
+    assert sentences == ['He said "I object."']
+    assert rest == "Then he sat down quietly."
+
+def test_splitter_output_does_not_depend_on_chunking():
+    text = "The witness, Dr. Jones, arrived late. She testified at length! Did she lie? We say no. The end"
+    whole = split([text])
+    by_char = split(list(text))
+
+    assert whole == by_char
+
+@pytest.fixture
+def synthesized(monkeypatch):
+    calls = []
+
+    async def synthesize_speech(text, role="judge"):
+        calls.append(text)
+        await asyncio.sleep(0.001 * len(text))
+        return b"" if "silent" in text else f"{role}:{text}".encode()
+
+    monkeypatch.setattr(speech_pipeline.speech_service, "synthesize_speech", synthesize_speech)
+    return calls
+
+def test_audio_is_sent_in_sentence_order(synthesized):
+    async def scenario():
+        sent = []
+
+        async def send_chunk(seq, text, audio_bytes):
+            sent.append((seq, text, audio_bytes))
+
+        pipeline = SpeechPipeline("judge", send_chunk)
+        pipeline.feed("This first sentence is the longest one here. ")
+        pipeline.feed("A shorter second sentence. ")
+        pipeline.feed("The third and final")
+        return sent, await pipeline.finish()
+
+    sent, count = asyncio.run(scenario())
+
+    assert count == 3
+    assert [seq for seq, _, _ in sent] == [0, 1, 2]
+    assert sent[2] == (2, "The third and final", b"judge:The third and final")
+
+def test_sentence_without_audio_is_still_sent(synthesized):
+    async def scenario():
+        sent = []
+
+        async def send_chunk(seq, text, audio_bytes):
+            sent.append((text, audio_bytes))
+
+        pipeline = SpeechPipeline("defense", send_chunk)
+        pipeline.feed("This sentence stays silent today. And this one speaks.")
+        await pipeline.finish()
+        return sent
+
+    assert asyncio.run(scenario()) == [
+        ("This sentence stays silent today.", b""),
+        ("And this one speaks.", b"defense:And this one speaks."),
+    ]
+
+def test_send_failure_cancels_queued_synthesis(synthesized):
+    async def scenario():
+        async def send_chunk(seq, text, audio_bytes):
+            raise ConnectionError("socket closed")
+
+        pipeline = SpeechPipeline("judge", send_chunk)
+        pipeline.feed("The first sentence goes out. The second one takes a good while longer to speak. ")
+        queued = [item[2] for item in list(pipeline.pending._queue)]
+        with pytest.raises(ConnectionError):
+            await pipeline.finish()
+        pipeline.feed("A third sentence after the failure. ")
+        await asyncio.sleep(0)
+        return pipeline, queued
+
+    pipeline, queued = asyncio.run(scenario())
+
+    assert pipeline.sent == 0
+    assert queued[1].cancelled()
+    assert pipeline.sequence == 2
+
+def test_cancel_stops_delivery(synthesized):
+    async def scenario():
+        sent = []
+
+        async def send_chunk(seq, text, audio_bytes):
+            sent.append(seq)
+
+        pipeline = SpeechPipeline("judge", send_chunk)
+        pipeline.feed("The first sentence goes out. The second one is queued. ")
+        queued = [item[2] for item in list(pipeline.pending._queue)]
+        await pipeline.cancel()
+        await asyncio.sleep(0.1)
+        return sent, queued
+
+    sent, queued = asyncio.run(scenario())
+
+    assert sent == []
+    assert all(task.cancelled() for task in queued)
@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from services.sse import SSEDecoder
+
+def feed_all(decoder, chunks):
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    return events
+
+def test_dispatches_on_blank_line():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"text": "hi"}\n') == []
+
+    events = decoder.feed(b"\n")
+    assert len(events) == 1
+    assert events[0].event == "message"
+    assert events[0].data == {"text": "hi"}
+    assert events[0].id is None
+
+def test_crlf_line_endings():
+    decoder = SSEDecoder()
+    events = decoder.feed(b'event: token\r\nid: 7\r\ndata: {"text": "a"}\r\n\r\n')
+
+    assert [(event.event, event.id, event.data) for event in events] == [("token", "7", {"text": "a"})]
+    assert decoder.last_event_id == "7"
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+def test_events_split_across_chunks(size):
+    stream = (
+        b'event: token\r\nid: 1\r\ndata: {"text": "first"}\r\n\r\n'
+        b': keep-alive\n\n'
+        b'id: 2\ndata: {"text": "second"}\n\n'
+    )
+    decoder = SSEDecoder()
+    events = feed_all(decoder, [stream[i:i + size] for i in range(0, len(stream), size)])
+
+    assert [(event.event, event.id, event.data["text"]) for event in events] == [
+        ("token", "1", "first"),
+        ("message", "2", "second"),
+    ]
+    assert decoder.buffer == bytearray()
+
+def test_multiline_data_is_joined_with_newlines():
+    decoder = SSEDecoder()
+    events = decoder.feed(b"data: line one\ndata: line two\n\n")
+
+    assert events[0].data == {"text": "line one\nline two"}
+
+def test_non_object_json_is_wrapped():
+    decoder = SSEDecoder()
+    events = decoder.feed(b'data: "plain"\n\ndata: [1, 2]\n\n')
+
+    assert events[0].data == {"text": "plain"}
+    assert events[1].data == {"text": "[1, 2]"}
+
+def test_comments_and_empty_events_are_skipped():
+    decoder = SSEDecoder()
+    events = decoder.feed(b": ping\n\n: ping\nevent: noop\n\n")
+
+    assert events == []
+
+def test_retry_field():
+    decoder = SSEDecoder()
+    decoder.feed(b"retry: 1500\n\n")
+    assert decoder.retry == 1500
+
+    decoder.feed(b"retry: soon\n\n")
+    assert decoder.retry == 1500
+
+def test_flush_dispatches_unterminated_event():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"text": "tail"}\ndata: more') == []
+
+    events = decoder.flush()
+    assert len(events) == 1
+    assert events[0].data == {"text": '{"text": "tail"}\nmore'}
+    assert decoder.flush() == []
+
+def test_reset_drops_partial_event_but_keeps_last_event_id():
+    decoder = SSEDecoder()
+    decoder.feed(b"id: 41\ndata: done\n\nid: 42\ndata: partial")
+
+    decoder.reset()
+
+    assert decoder.last_event_id == "41"
+    assert decoder.feed(b"\n\n") == []
+    assert decoder.feed(b"data: next\n\n")[0].data == {"text": "next"}
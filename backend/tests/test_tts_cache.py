@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from services.tts_cache import TTSCache, cache_key
+
+def test_key_ignores_whitespace_differences():
+    assert cache_key("aura", "Order  in\nthe court. ") == cache_key("aura", "Order in the court.")
+    assert cache_key("aura", "Order.") != cache_key("orion", "Order.")
+
+def test_memory_tier_evicts_least_recently_used():
+    async def scenario():
+        cache = TTSCache(max_bytes=8, ttl_seconds=0)
+        await cache.put("v", "one", b"1111")
+        await cache.put("v", "two", b"2222")
+        await cache.get("v", "one")
+        await cache.put("v", "three", b"3333")
+        return cache, [await cache.get("v", text) for text in ("one", "two", "three")]
+
+    cache, found = asyncio.run(scenario())
+
+    assert found == [b"1111", None, b"3333"]
+    assert cache.size == 8
+    assert cache.stats["evictions"] == 1
+
+def test_oversize_entry_drops_the_stale_copy():
+    async def scenario():
+        cache = TTSCache(max_bytes=4, ttl_seconds=0)
+        await cache.put("v", "line", b"old")
+        await cache.put("v", "line", b"much too long")
+        return cache, await cache.get("v", "line")
+
+    cache, found = asyncio.run(scenario())
+
+    assert found is None
+    assert cache.size == 0
+
+def test_expired_entries_are_misses():
+    async def scenario():
+        cache = TTSCache(max_bytes=100, ttl_seconds=60)
+        await cache.put("v", "line", b"audio")
+        key = cache_key("v", "line")
+        cache.entries[key] = (b"audio", time.time() - 120)
+        return cache, await cache.get("v", "line")
+
+    cache, found = asyncio.run(scenario())
+
+    assert found is None
+    assert cache.size == 0
+
+def test_disk_hit_is_promoted_into_memory(tmp_path):
+    async def scenario():
+        writer = TTSCache(max_bytes=100, ttl_seconds=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+        await writer.put("v", "line", b"audio")
+        reader = TTSCache(max_bytes=100, ttl_seconds=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+        found = await reader.get("v", "line")
+        return reader, found, await reader.get("v", "line")
+
+    reader, first, second = asyncio.run(scenario())
+
+    assert first == second == b"audio"
+    assert reader.stats["disk_hits"] == 1
+    assert reader.stats["hits"] == 1
+    assert reader.disk_size == len(b"audio")
+
+def test_disk_tier_evicts_least_recently_read(tmp_path):
+    async def scenario():
+        cache = TTSCache(max_bytes=0, ttl_seconds=0, disk_dir=str(tmp_path), disk_max_bytes=8)
+        await cache.put("v", "one", b"1111")
+        await cache.put("v", "two", b"2222")
+        for text, age in (("one", 20), ("two", 10)):
+            path = cache._disk_path(cache_key("v", text))
+            past = time.time() - age
+            os.utime(path, (past, past))
+        await cache.get("v", "one")
+        await cache.put("v", "three", b"3333")
+        return cache, [await cache.get("v", text) for text in ("one", "two", "three")]
+
+    cache, found = asyncio.run(scenario())
+
+    assert found == [b"1111", None, b"3333"]
+    assert cache.disk_size == 8
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".audio", ".audio"]
+
+def test_failed_disk_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    cache = TTSCache(max_bytes=100, ttl_seconds=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError, match="disk full"):
+        cache._write_disk(cache_key("v", "line"), b"audio")
+
+    assert list(tmp_path.iterdir()) == []
+    assert cache.disk_size == 0
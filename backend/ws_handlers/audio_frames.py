@@ -0,0 +1,49 @@
+from typing import Tuple
+import struct
+
+# Binary audio frame layout (network byte order, 8 byte header):
+#   u8  frame type
+#   u8  role code
+#   u8  flags
+#   u8  reserved
+#   u32 sequence number
+# followed by the raw audio payload.
+HEADER = struct.Struct("!BBBxI")
+
+FRAME_USER_AUDIO = 1
+FRAME_AGENT_AUDIO = 2
+FRAME_AGENT_AUDIO_CHUNK = 3
+FRAME_USER_AUDIO_STREAM = 4
+
+FLAG_FINAL = 0x01
+
+ROLE_CODES = {
+    "user": 0,
+    "judge": 1,
+    "prosecutor": 2,
+    "defense": 3,
+}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+class AudioFrameError(ValueError):
+    pass
+
+def encode_audio_frame(
+    frame_type: int,
+    role: str,
+    seq: int,
+    audio_bytes: bytes,
+    flags: int = 0
+) -> bytes:
+    header = HEADER.pack(frame_type, ROLE_CODES.get(role, 0), flags, seq)
+    return b"".join((header, audio_bytes))
+
+def decode_audio_frame(frame: bytes) -> Tuple[int, str, int, int, bytes]:
+    if len(frame) < HEADER.size:
+        raise AudioFrameError(f"Binary frame too short ({len(frame)} bytes)")
+
+    frame_type, role_code, flags, seq = HEADER.unpack_from(frame)
+    if role_code not in ROLE_NAMES:
+        raise AudioFrameError(f"Unknown role code {role_code}")
+
+    return frame_type, ROLE_NAMES[role_code], flags, seq, frame[HEADER.size:]
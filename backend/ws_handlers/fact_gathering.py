@@ -2,12 +2,42 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import Dict, Any
 from datetime import datetime
 from services.openjustice import openjustice_service
+from services.session_store import create_session_store
+from services.content_cache import content_cache, content_hash
+from services.chunked_upload import ChunkedUpload, UploadError
+from services import metrics
+from ws_handlers.outbound import OutboundWriter
+from ws_handlers.turn_runner import Handler, TurnRunner
+from config import settings
+from contextlib import aclosing
+import time
 import json
 import base64
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-active_fact_gathering_sessions: Dict[str, Dict[str, Any]] = {}
+active_uploads: Dict[str, Dict[str, ChunkedUpload]] = {}
+
+def serialize_fact_gathering_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **session,
+        "created_at": session["created_at"].isoformat()
+    }
+
+def deserialize_fact_gathering_session(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **data,
+        "created_at": datetime.fromisoformat(data["created_at"])
+    }
+
+active_fact_gathering_sessions = create_session_store(
+    "fact_gathering",
+    serialize_fact_gathering_session,
+    deserialize_fact_gathering_session
+)
 
 @router.websocket("/ws/fact-gathering/{session_id}")
 async def websocket_fact_gathering_endpoint(websocket: WebSocket, session_id: str):
@@ -16,21 +46,30 @@ async def websocket_fact_gathering_endpoint(websocket: WebSocket, session_id: st
 async def handle_fact_gathering_session(websocket: WebSocket, session_id: str):
     await websocket.accept()
     
-    session = {
-        "websocket": websocket,
-        "conversation_id": None,
-        "execution_id": None,
-        "flow_id": None,
-        "messages": [],
-        "uploaded_files": [],
-        "pending_files": [],
-        "created_at": datetime.now()
-    }
+    session = await active_fact_gathering_sessions.get(session_id)
+    if session is None:
+        session = {
+            "conversation_id": None,
+            "execution_id": None,
+            "flow_id": None,
+            "messages": [],
+            "uploaded_files": [],
+            "pending_files": [],
+            "created_at": datetime.now()
+        }
+        await active_fact_gathering_sessions.save(session_id, session)
     
-    active_fact_gathering_sessions[session_id] = session
+    outbound = OutboundWriter(
+        websocket,
+        "fact_gathering",
+        max_queue=settings.ws_outbound_max_queue,
+        flush_interval=settings.ws_coalesce_interval,
+        max_batch_chars=settings.ws_coalesce_max_chars
+    )
+    runner = TurnRunner(f"fact_gathering:{session_id}", settings.ws_max_pending_messages)
     
     try:
-        await websocket.send_json({
+        await outbound.send_json({
             "type": "connected",
             "session_id": session_id
         })
@@ -39,36 +78,82 @@ async def handle_fact_gathering_session(websocket: WebSocket, session_id: str):
             message_type = data.get("type")
             
             if message_type == "initialize":
-                await handle_initialize(websocket, session_id, data, session)
+                await submit_message(outbound, runner, handle_initialize, session_id, data, session, interrupt=True)
             
             elif message_type == "message":
-                await handle_user_message(websocket, session_id, data, session)
+                await submit_message(outbound, runner, handle_user_message, session_id, data, session, interrupt=True)
             
             elif message_type == "upload":
-                await handle_file_upload(websocket, session_id, data, session)
+                await submit_message(outbound, runner, handle_file_upload, session_id, data, session)
+            
+            elif message_type == "upload_begin":
+                await handle_upload_begin(outbound, session_id, data, session)
+            
+            elif message_type == "upload_chunk":
+                await handle_upload_chunk(outbound, session_id, data, session)
+            
+            elif message_type == "upload_end":
+                await submit_message(outbound, runner, handle_upload_end, session_id, data, session)
             
             else:
-                await websocket.send_json({
+                await outbound.send_json({
                     "type": "error",
                     "message": f"Unknown message type: {message_type}"
                 })
     
     except WebSocketDisconnect:
-        print(f"Fact gathering session {session_id} disconnected")
+        logger.info("Fact gathering session %s disconnected", session_id)
     
     except Exception as e:
-        print(f"Error in fact gathering session {session_id}: {e}")
-        await websocket.send_json({
+        logger.error("Error in fact gathering session %s: %s", session_id, e)
+        await outbound.send_json({
             "type": "error",
             "message": str(e)
         })
     
     finally:
-        if session_id in active_fact_gathering_sessions:
-            del active_fact_gathering_sessions[session_id]
+        await runner.close()
+        await outbound.close()
+        for upload in active_uploads.pop(session_id, {}).values():
+            upload.close()
+        await active_fact_gathering_sessions.save(session_id, session)
+
+async def submit_message(
+    websocket: OutboundWriter,
+    runner: TurnRunner,
+    handler: Handler,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any],
+    interrupt: bool = False
+):
+    # New user input barges in on a response that is still streaming, which
+    # releases its NAP stream; uploads are never interrupted.
+    if interrupt and runner.interrupt():
+        await websocket.send_json({
+            "type": "streaming_interrupted"
+        })
+    
+    if not runner.submit(run_and_save, handler, websocket, session_id, data, session, interruptible=interrupt):
+        await websocket.send_json({
+            "type": "error",
+            "message": "Too many pending messages"
+        })
+
+async def run_and_save(
+    handler: Handler,
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    try:
+        await handler(websocket, session_id, data, session)
+    finally:
+        await active_fact_gathering_sessions.save(session_id, session)
 
 async def handle_initialize(
-    websocket: WebSocket,
+    websocket: OutboundWriter,
     session_id: str,
     data: Dict[str, Any],
     session: Dict[str, Any]
@@ -118,7 +203,7 @@ and guide the user through providing all necessary details about their case."""
         })
 
 async def handle_user_message(
-    websocket: WebSocket,
+    websocket: OutboundWriter,
     session_id: str,
     data: Dict[str, Any],
     session: Dict[str, Any]
@@ -157,7 +242,7 @@ async def handle_user_message(
         flow_id = session.get("flow_id")
         
         if pending_files:
-            print(f"[handle_user_message] Sending message with {len(pending_files)} attached file(s): {[f['name'] for f in pending_files]}")
+            logger.debug("Sending message with %s attached file(s): %s", len(pending_files), [f['name'] for f in pending_files])
         
         await openjustice_service.send_message_to_conversation(
             conversation_id=conversation_id,
@@ -167,17 +252,17 @@ async def handle_user_message(
         
         had_files = False
         if pending_files:
-            print(f"[handle_user_message] Files attached successfully, clearing pending_files")
+            logger.debug("Files attached successfully, clearing pending_files")
             session["pending_files"] = []
             had_files = True
-            print(f"[handle_user_message] Will stream with conversationId={conversation_id}, flowId={flow_id} (NOT executionId)")
+            logger.debug("Will stream with conversationId=%s, flowId=%s (NOT executionId)", conversation_id, flow_id)
         
         execution_id = session.get("execution_id")
         
-        print(f"[handle_user_message] Streaming with conversation_id={conversation_id}, flow_id={flow_id}, execution_id={execution_id}, had_files={had_files}")
+        logger.debug("Streaming with conversation_id=%s, flow_id=%s, execution_id=%s, had_files=%s", conversation_id, flow_id, execution_id, had_files)
         
         if had_files and flow_id and conversation_id:
-            print(f"[handle_user_message] Files were attached - streaming with conversation+flow (ignoring old executionId)")
+            logger.debug("Files were attached - streaming with conversation+flow (ignoring old executionId)")
             await stream_dialog_flow_response(
                 websocket,
                 session,
@@ -210,14 +295,14 @@ async def handle_user_message(
         })
 
 async def stream_dialog_flow_response(
-    websocket: WebSocket,
+    websocket: OutboundWriter,
     session: Dict[str, Any],
     dialog_flow_id: str = None,
     conversation_id: str = None,
     execution_id: str = None
 ):
     try:
-        print(f"[stream_dialog_flow_response] Starting stream with dialog_flow_id={dialog_flow_id}, conversation_id={conversation_id}, execution_id={execution_id}")
+        logger.debug("Starting stream with dialog_flow_id=%s, conversation_id=%s, execution_id=%s", dialog_flow_id, conversation_id, execution_id)
         
         await websocket.send_json({
             "type": "streaming_start"
@@ -228,122 +313,106 @@ async def stream_dialog_flow_response(
         is_awaiting_input = False
         has_received_any_message = False
         event_count = 0
+        started = time.perf_counter()
         
-        async for event in openjustice_service.stream_dialog_flow(
+        events = openjustice_service.stream_dialog_flow(
             dialog_flow_id=dialog_flow_id,
             conversation_id=conversation_id,
             execution_id=execution_id
-        ):
-            event_count += 1
-            event_type = event.get("event")
-            event_data = event.get("data", {})
-            
-            if event_count % 10 == 0:
-                print(f"[stream_dialog_flow_response] Processed {event_count} events, current message length: {len(current_message)}")
-            
-            
-            if event_type == "message":
-                text = event_data.get("text", "")
-                current_message += text
-                has_received_any_message = True
+        )
+        async with aclosing(events):
+            async for event in events:
+                event_count += 1
+                event_type = event.event
+                event_data = event.data
                 
-                if event_count <= 5 or event_count % 50 == 0:
-                    print(f"[stream_dialog_flow_response] Message event #{event_count}: '{text[:50]}...' (total length: {len(current_message)})")
+                if event_type == "message":
+                    text = event_data.get("text", "")
+                    current_message += text
+                    has_received_any_message = True
+                    
+                    logger.debug(
+                        "Message event #%s: '%s...' (total length: %s)",
+                        event_count, text[:50], len(current_message),
+                        extra={"sample": settings.log_sample_rate}
+                    )
+                    
+                    await websocket.send_json({
+                        "type": "ai_message",
+                        "text": text,
+                        "isComplete": False
+                    })
                 
-                await websocket.send_json({
-                    "type": "ai_message",
-                    "text": text,
-                    "isComplete": False
-                })
-            
-            elif event_type == "error":
-                error_text = event_data.get("text", "") or event_data.get("message", "")
-                if error_text:
-                    print(f"[WS Handler] Stream error: {error_text}")
-                    if "INVALID_TOOL_RESULTS" in error_text or "stream error" in error_text.lower():
-                        print("[WS Handler] LangChain tool error detected - saving partial message")
-                    elif "tool_use.name" in error_text or "400" in error_text:
-                        print("[WS Handler] File processing error from OpenJustice API - known issue with their file handling")
+                elif event_type == "error":
+                    error_text = event_data.get("text", "") or event_data.get("message", "")
+                    if error_text:
+                        logger.error("Stream error: %s", error_text)
+                        if "INVALID_TOOL_RESULTS" in error_text or "stream error" in error_text.lower():
+                            logger.warning("LangChain tool error detected - saving partial message")
+                        elif "tool_use.name" in error_text or "400" in error_text:
+                            logger.warning("File processing error from OpenJustice API - known issue with their file handling")
                 
-                if current_message and current_message.strip():
-                    print(f"[WS Handler] Saving partial response ({len(current_message)} chars) before error")
-                    session["messages"].append({
-                        "id": f"msg_{len(session['messages'])}",
-                        "role": "assistant",
-                        "content": current_message,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    if "tool_use.name" in error_text and len(current_message) > 50:
-                        print(f"[WS Handler] File was processed (got {len(current_message)} chars), treating as success despite error")
-                        await websocket.send_json({
-                            "type": "flow_complete"
+                    if current_message and current_message.strip():
+                        logger.info("Saving partial response (%s chars) before error", len(current_message))
+                        session["messages"].append({
+                            "id": f"msg_{len(session['messages'])}",
+                            "role": "assistant",
+                            "content": current_message,
+                            "timestamp": datetime.now().isoformat()
                         })
-                        return
+                    
+                        if "tool_use.name" in error_text and len(current_message) > 50:
+                            logger.warning("File was processed (got %s chars), treating as success despite error", len(current_message))
+                            await websocket.send_json({
+                                "type": "flow_complete"
+                            })
+                            return
                 
-                error_message = error_text or "Stream error occurred"
-                if "tool_use.name" in error_text:
-                    error_message = "File was processed but OpenJustice encountered an error. The partial response has been saved."
+                    error_message = error_text or "Stream error occurred"
+                    if "tool_use.name" in error_text:
+                        error_message = "File was processed but OpenJustice encountered an error. The partial response has been saved."
                 
-                await websocket.send_json({
-                    "type": "error",
-                    "message": error_message
-                })
-                break
-            
-            elif event_type == "node-result":
-                node_type = event_data.get("nodeType")
-                node_status = event_data.get("status")
-                node_title = event_data.get("title", "")
-                node_desc = event_data.get("description", "")
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": error_message
+                    })
+                    break
                 
-                print(f"[stream_dialog_flow_response] Node result: type={node_type}, status={node_status}, title={node_title}")
+                elif event_type == "node-result":
+                    node_type = event_data.get("nodeType")
+                    node_status = event_data.get("status")
+                    node_title = event_data.get("title", "")
+                    node_desc = event_data.get("description", "")
                 
-                last_node_type = node_type
+                    logger.debug("Node result: type=%s, status=%s, title=%s", node_type, node_status, node_title)
                 
-                if node_status == "running":
-                    status_msg = f"{node_title}: {node_desc}"
-                    await websocket.send_json({
-                        "type": "ai_message",
-                        "text": status_msg + "...\n",
-                        "isComplete": False
-                    })
-                    current_message += status_msg + "...\n"
+                    last_node_type = node_type
                 
-                elif node_status == "completed" and node_type == "fact":
-                    node_data = event_data.get("data", {})
-                    if node_data:
-                        facts_summary = f"\n✓ {node_title} gathered\n"
+                    if node_status == "running":
+                        status_msg = f"{node_title}: {node_desc}"
                         await websocket.send_json({
                             "type": "ai_message",
-                            "text": facts_summary,
+                            "text": status_msg + "...\n",
                             "isComplete": False
                         })
-                        current_message += facts_summary
-            
-            elif event_type == "awaiting-user-input":
-                new_execution_id = event_data.get("executionId")
-                if new_execution_id:
-                    session["execution_id"] = new_execution_id
+                        current_message += status_msg + "...\n"
                 
-                if current_message:
-                    session["messages"].append({
-                        "id": f"msg_{len(session['messages'])}",
-                        "role": "assistant",
-                        "content": current_message,
-                        "timestamp": datetime.now().isoformat()
-                    })
+                    elif node_status == "completed" and node_type == "fact":
+                        node_data = event_data.get("data", {})
+                        if node_data:
+                            facts_summary = f"\n✓ {node_title} gathered\n"
+                            await websocket.send_json({
+                                "type": "ai_message",
+                                "text": facts_summary,
+                                "isComplete": False
+                            })
+                            current_message += facts_summary
                 
-                is_awaiting_input = True
-                current_message = ""
+                elif event_type == "awaiting-user-input":
+                    new_execution_id = event_data.get("executionId")
+                    if new_execution_id:
+                        session["execution_id"] = new_execution_id
                 
-                await websocket.send_json({
-                    "type": "awaiting_input",
-                    "executionId": new_execution_id
-                })
-            
-            elif event_type == "done":
-                if not is_awaiting_input:
                     if current_message:
                         session["messages"].append({
                             "id": f"msg_{len(session['messages'])}",
@@ -351,30 +420,49 @@ async def stream_dialog_flow_response(
                             "content": current_message,
                             "timestamp": datetime.now().isoformat()
                         })
-                    
-                    await websocket.send_json({
-                        "type": "flow_complete"
-                    })
+                
+                    is_awaiting_input = True
                     current_message = ""
-                else:
-                    print("[WS Handler] Received 'done' but we're awaiting input - not sending flow_complete")
-            
-            elif event_type == "stream-complete":
-                if current_message:
-                    session["messages"].append({
-                        "id": f"msg_{len(session['messages'])}",
-                        "role": "assistant",
-                        "content": current_message,
-                        "timestamp": datetime.now().isoformat()
+                
+                    await websocket.send_json({
+                        "type": "awaiting_input",
+                        "executionId": new_execution_id
                     })
-                    current_message = ""
                 
-                await websocket.send_json({
-                    "type": "streaming_end"
-                })
-                break
+                elif event_type == "done":
+                    if not is_awaiting_input:
+                        if current_message:
+                            session["messages"].append({
+                                "id": f"msg_{len(session['messages'])}",
+                                "role": "assistant",
+                                "content": current_message,
+                                "timestamp": datetime.now().isoformat()
+                            })
+                    
+                        await websocket.send_json({
+                            "type": "flow_complete"
+                        })
+                        current_message = ""
+                    else:
+                        logger.debug("Received 'done' but we're awaiting input - not sending flow_complete")
+                
+                elif event_type == "stream-complete":
+                    if current_message:
+                        session["messages"].append({
+                            "id": f"msg_{len(session['messages'])}",
+                            "role": "assistant",
+                            "content": current_message,
+                            "timestamp": datetime.now().isoformat()
+                        })
+                        current_message = ""
+                
+                    await websocket.send_json({
+                        "type": "streaming_end"
+                    })
+                    break
         
-        print(f"[WS Handler] Stream ended. Last node type: {last_node_type}, Is awaiting input: {is_awaiting_input}, Current message length: {len(current_message)}, Has received message: {has_received_any_message}")
+        metrics.llm_turn_latency.observe(time.perf_counter() - started, agent="fact_gathering")
+        logger.debug("Stream ended. Last node type: %s, Is awaiting input: %s, Current message length: %s, Has received message: %s", last_node_type, is_awaiting_input, len(current_message), has_received_any_message)
         
         if current_message:
             session["messages"].append({
@@ -402,16 +490,16 @@ async def stream_dialog_flow_response(
                         "type": "awaiting_input",
                         "executionId": execution_id
                     })
-                print(f"[WS Handler] Sent awaiting_input with executionId: {execution_id}")
+                logger.debug("Sent awaiting_input with executionId: %s", execution_id)
             else:
-                print("[WS Handler] Warning: Stream ended awaiting input but no executionId")
+                logger.warning("Stream ended awaiting input but no executionId")
         elif last_node_type == "outcome" or not session.get("execution_id"):
-            print("[WS Handler] Flow complete - outcome node or no execution_id")
+            logger.debug("Flow complete - outcome node or no execution_id")
             await websocket.send_json({
                 "type": "flow_complete"
             })
         else:
-            print("[WS Handler] Warning: Stream ended without awaiting input but executionId exists - treating as awaiting input")
+            logger.warning("Stream ended without awaiting input but executionId exists - treating as awaiting input")
             execution_id = session.get("execution_id")
             await websocket.send_json({
                 "type": "awaiting_input",
@@ -419,7 +507,7 @@ async def stream_dialog_flow_response(
             })
         
     except Exception as e:
-        print(f"[WS Handler] Exception during streaming: {str(e)}")
+        logger.error("Exception during streaming: %s", str(e))
         if current_message:
             session["messages"].append({
                 "id": f"msg_{len(session['messages'])}",
@@ -433,7 +521,7 @@ async def stream_dialog_flow_response(
         })
 
 async def handle_file_upload(
-    websocket: WebSocket,
+    websocket: OutboundWriter,
     session_id: str,
     data: Dict[str, Any],
     session: Dict[str, Any]
@@ -451,29 +539,173 @@ async def handle_file_upload(
         
         file_bytes = base64.b64decode(file_base64)
         
-        result = await openjustice_service.upload_file_to_conversation(
-            file_data=file_bytes,
-            filename=filename
-        )
-        
-        resource_id = result.get("resourceId")
-        
-        file_resource = {
-            "id": resource_id,
-            "name": filename
-        }
+        digest = await content_hash(file_bytes)
+        result = content_cache.get_resource(digest)
+        if result is not None:
+            logger.info("Reusing uploaded resource for %s (sha256 %s)", filename, digest[:12])
+        else:
+            result = await openjustice_service.upload_file_to_conversation(
+                file_data=file_bytes,
+                filename=filename
+            )
+            if result.get("resourceId"):
+                content_cache.put_resource(digest, result)
         
-        session["uploaded_files"].append(file_resource)
-        session["pending_files"].append(file_resource)
+        await register_uploaded_file(websocket, session, filename, result, len(file_bytes))
+    
+    except Exception as e:
+        await websocket.send_json({
+            "type": "error",
+            "message": f"File upload failed: {str(e)}"
+        })
+
+async def register_uploaded_file(
+    websocket: OutboundWriter,
+    session: Dict[str, Any],
+    filename: str,
+    result: Dict[str, Any],
+    size: int
+):
+    resource_id = result.get("resourceId")
+    
+    file_resource = {
+        "id": resource_id,
+        "name": filename
+    }
+    
+    session["uploaded_files"].append(file_resource)
+    session["pending_files"].append(file_resource)
+    
+    logger.info("File uploaded successfully: %s (ID: %s)", filename, resource_id)
+    logger.debug("Total uploaded files: %s, Pending: %s", len(session['uploaded_files']), len(session['pending_files']))
+    
+    await websocket.send_json({
+        "type": "file_uploaded",
+        "filename": filename,
+        "resourceId": resource_id,
+        "size": size
+    })
+
+async def handle_upload_begin(
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    upload_id = data.get("uploadId")
+    filename = data.get("filename")
+    
+    if not upload_id or not filename:
+        await websocket.send_json({
+            "type": "error",
+            "message": "Upload ID and filename are required"
+        })
+        return
+    
+    uploads = active_uploads.setdefault(session_id, {})
+    if upload_id in uploads:
+        uploads.pop(upload_id).close()
+    
+    try:
+        uploads[upload_id] = ChunkedUpload(
+            upload_id,
+            filename,
+            int(data.get("size", 0)),
+            max_bytes=settings.upload_max_bytes,
+            spool_dir=settings.upload_spool_dir
+        )
+    except UploadError as e:
+        await websocket.send_json({
+            "type": "upload_failed",
+            "uploadId": upload_id,
+            "message": str(e)
+        })
+        return
+    
+    await websocket.send_json({
+        "type": "upload_ready",
+        "uploadId": upload_id,
+        "offset": 0,
+        "maxChunkBytes": settings.upload_chunk_max_bytes
+    })
+
+async def handle_upload_chunk(
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    upload_id = data.get("uploadId")
+    upload = active_uploads.get(session_id, {}).get(upload_id)
+    
+    if upload is None:
+        await websocket.send_json({
+            "type": "upload_failed",
+            "uploadId": upload_id,
+            "message": "Unknown upload. Send upload_begin first."
+        })
+        return
+    
+    try:
+        chunk = base64.b64decode(data.get("data", ""))
+        if len(chunk) > settings.upload_chunk_max_bytes:
+            raise UploadError(f"Chunk exceeds the {settings.upload_chunk_max_bytes} byte limit")
+        await upload.write_chunk(int(data.get("offset", -1)), chunk, data.get("crc32"))
+    except (UploadError, ValueError) as e:
+        await websocket.send_json({
+            "type": "upload_failed",
+            "uploadId": upload_id,
+            "offset": upload.received,
+            "message": str(e)
+        })
+        return
+    
+    await websocket.send_json({
+        "type": "upload_progress",
+        "uploadId": upload_id,
+        "offset": upload.received,
+        "size": upload.size
+    })
+
+async def handle_upload_end(
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    upload_id = data.get("uploadId")
+    upload = active_uploads.get(session_id, {}).pop(upload_id, None)
+    
+    if upload is None:
+        await websocket.send_json({
+            "type": "upload_failed",
+            "uploadId": upload_id,
+            "message": "Unknown upload. Send upload_begin first."
+        })
+        return
+    
+    try:
+        digest = upload.finish(data.get("sha256"))
         
-        print(f"[handle_file_upload] File uploaded successfully: {filename} (ID: {resource_id})")
-        print(f"[handle_file_upload] Total uploaded files: {len(session['uploaded_files'])}, Pending: {len(session['pending_files'])}")
+        result = content_cache.get_resource(digest)
+        if result is not None:
+            logger.info("Reusing uploaded resource for %s (sha256 %s)", upload.filename, digest[:12])
+        else:
+            result = await openjustice_service.upload_file_to_conversation(
+                file_data=upload.file,
+                filename=upload.filename,
+                size=upload.size
+            )
+            if result.get("resourceId"):
+                content_cache.put_resource(digest, result)
         
+        await register_uploaded_file(websocket, session, upload.filename, result, upload.size)
+    
+    except UploadError as e:
         await websocket.send_json({
-            "type": "file_uploaded",
-            "filename": filename,
-            "resourceId": resource_id,
-            "size": len(file_bytes)
+            "type": "upload_failed",
+            "uploadId": upload_id,
+            "message": str(e)
         })
     
     except Exception as e:
@@ -481,4 +713,6 @@ async def handle_file_upload(
             "type": "error",
             "message": f"File upload failed: {str(e)}"
         })
-
+    
+    finally:
+        upload.close()
@@ -0,0 +1,252 @@
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+from fastapi import WebSocket
+from services import metrics
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Streamed text deltas that can be merged with the delta queued right before
+# them, as long as both belong to the same message.
+COALESCED_TYPES = {"ai_message", "agent_response_delta"}
+
+# Messages where only the latest one matters to the client.
+REPLACEABLE_TYPES = {"transcription_interim"}
+
+class OutboundWriter:
+    """Per-connection sender that coalesces streamed text deltas.
+
+    Handlers call ``send_json``/``send_bytes`` as they would on the socket.
+    A small delta is held for up to ``flush_interval`` seconds (or until it
+    reaches ``max_batch_chars``) while following deltas merge into it, so a
+    streamed reply goes out as a few larger frames. The queue holds at most
+    ``max_queue`` frames: when a client falls behind, deltas keep merging into
+    the last queued frame and interim transcripts replace each other, while
+    any other message waits for room.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        endpoint: str,
+        max_queue: int,
+        flush_interval: float,
+        max_batch_chars: int
+    ):
+        self.websocket = websocket
+        self.endpoint = endpoint
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_batch_chars = max_batch_chars
+        self.queue: Deque[Tuple[str, Any]] = deque()
+        self.ready = asyncio.Event()
+        self.space = asyncio.Event()
+        self.space.set()
+        self.flush_now = asyncio.Event()
+        self.error: Optional[Exception] = None
+        self.closed = False
+        self.stats = {
+            "messages": 0,
+            "frames": 0,
+            "merged": 0,
+            "replaced": 0,
+        }
+        self.writer = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+    def _raise_if_failed(self):
+        if self.error is not None:
+            raise RuntimeError(f"WebSocket send failed: {self.error}")
+        if self.closed:
+            raise RuntimeError("WebSocket writer is closed")
+
+    def _merge(self, message: Dict[str, Any]) -> bool:
+        if not self.queue:
+            return False
+
+        kind, last = self.queue[-1]
+        message_type = message.get("type")
+        if kind != "json" or last.get("type") != message_type:
+            return False
+
+        if message_type in REPLACEABLE_TYPES:
+            self.queue[-1] = ("json", message)
+            self.stats["replaced"] += 1
+            return True
+
+        if message_type not in COALESCED_TYPES:
+            return False
+        if last.get("role") != message.get("role") or last.get("isComplete") or message.get("isComplete"):
+            return False
+
+        last["text"] += message.get("text", "")
+        self.stats["merged"] += 1
+        if len(last["text"]) >= self.max_batch_chars:
+            self.flush_now.set()
+        return True
+
+    async def _enqueue(self, kind: str, payload: Any):
+        metrics.ws_send_queue_depth.observe(len(self.queue), endpoint=self.endpoint)
+        while len(self.queue) >= self.max_queue:
+            self.space.clear()
+            await self.space.wait()
+            self._raise_if_failed()
+
+        self.queue.append((kind, payload))
+        self.ready.set()
+
+    async def send_json(self, message: Dict[str, Any]):
+        self._raise_if_failed()
+        self.stats["messages"] += 1
+
+        if self._merge(message):
+            return
+        if message.get("type") in COALESCED_TYPES:
+            # Queued deltas are extended in place, so never hold the caller's dict.
+            message = dict(message)
+        await self._enqueue("json", message)
+
+    async def send_bytes(self, data: bytes):
+        self._raise_if_failed()
+        self.stats["messages"] += 1
+        await self._enqueue("bytes", data)
+
+    def _should_hold(self) -> bool:
+        if len(self.queue) != 1:
+            return False
+
+        kind, payload = self.queue[0]
+        return (
+            kind == "json"
+            and payload.get("type") in COALESCED_TYPES
+            and len(payload.get("text", "")) < self.max_batch_chars
+        )
+
+    async def _run(self):
+        try:
+            while True:
+                if not self.queue:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+
+                if self._should_hold():
+                    self.flush_now.clear()
+                    try:
+                        await asyncio.wait_for(self.flush_now.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+                kind, payload = self.queue.popleft()
+                self.space.set()
+
+                if kind == "close":
+                    if payload is not None:
+                        await self.websocket.close(code=payload)
+                    return
+                if kind == "json":
+                    await self.websocket.send_json(payload)
+                else:
+                    await self.websocket.send_bytes(payload)
+                self.stats["frames"] += 1
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.warning("Send failed: %s: %s", type(e).__name__, e)
+            self.error = e
+            self.queue.clear()
+
+        finally:
+            # Wake producers blocked on a full queue so they see the failure.
+            self.space.set()
+
+    async def close(self, code: Optional[int] = None, timeout: float = 5.0):
+        """Flushes queued frames and stops the writer.
+
+        The socket itself is closed only when ``code`` is given. Frames that
+        cannot be delivered within ``timeout`` are dropped.
+        """
+        self.closed = True
+        if self.writer.done():
+            return
+
+        # The close marker bypasses the queue bound so closing never blocks.
+        self.queue.append(("close", code))
+        self.ready.set()
+        try:
+            await asyncio.wait_for(self.writer, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropped %s unsent frames on close", len(self.queue))
+
+class Lane:
+    """One lane of ``DeliveryLanes``, usable wherever a writer is expected."""
+
+    def __init__(self, lanes: "DeliveryLanes", index: int):
+        self.lanes = lanes
+        self.index = index
+
+    async def send_json(self, message: Dict[str, Any]):
+        await self.lanes.send_json(self.index, message)
+
+    async def send_bytes(self, data: bytes):
+        await self.lanes.send_bytes(self.index, data)
+
+class DeliveryLanes:
+    """Sends the output of concurrent producers one lane after another.
+
+    Lane 0 goes straight to the writer. Frames for a later lane are buffered
+    until every earlier lane is closed, then flushed before that lane goes
+    live. Producers run concurrently, but the client receives each lane as
+    a contiguous run, in lane order.
+    """
+
+    def __init__(self, writer: OutboundWriter):
+        self.writer = writer
+        self.buffers: Dict[int, List[Tuple[str, Any]]] = {}
+        self.closed: Set[int] = set()
+        self.current = 0
+        self.flushing = False
+
+    def lane(self, index: int) -> Lane:
+        return Lane(self, index)
+
+    async def _send(self, kind: str, payload: Any):
+        if kind == "json":
+            await self.writer.send_json(payload)
+        else:
+            await self.writer.send_bytes(payload)
+
+    async def _submit(self, index: int, kind: str, payload: Any):
+        if index == self.current and not self.flushing:
+            await self._send(kind, payload)
+        else:
+            self.buffers.setdefault(index, []).append((kind, payload))
+
+    async def send_json(self, index: int, message: Dict[str, Any]):
+        await self._submit(index, "json", message)
+
+    async def send_bytes(self, index: int, data: bytes):
+        await self._submit(index, "bytes", data)
+
+    async def close_lane(self, index: int):
+        self.closed.add(index)
+        if self.flushing:
+            # The flush in progress moves on past this lane itself.
+            return
+
+        self.flushing = True
+        try:
+            while self.current in self.closed:
+                self.current += 1
+                buffer = self.buffers.setdefault(self.current, [])
+                while buffer:
+                    await self._send(*buffer.pop(0))
+                self.buffers.pop(self.current, None)
+        finally:
+            self.flushing = False
@@ -1,30 +1,53 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union
 import json
 import asyncio
 from services.speech_service import speech_service
+from services.speech_pipeline import SpeechPipeline
+from services.recognizers import AudioStream
+from services.event_bus import event_bus, SlowSubscriberError
+from config import settings
+from models.trial import TrialStatus
+from ws_handlers.audio_frames import (
+    AudioFrameError,
+    FLAG_FINAL,
+    FRAME_AGENT_AUDIO,
+    FRAME_AGENT_AUDIO_CHUNK,
+    FRAME_USER_AUDIO,
+    FRAME_USER_AUDIO_STREAM,
+    decode_audio_frame,
+    encode_audio_frame,
+)
+from ws_handlers.outbound import DeliveryLanes, Lane, OutboundWriter
+from ws_handlers.turn_runner import Handler, TurnRunner
+from contextlib import aclosing
 from datetime import datetime
 import base64
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 active_connections: Dict[str, WebSocket] = {}
+live_transcriptions: Dict[str, Dict[str, Any]] = {}
+turn_runners: Dict[str, TurnRunner] = {}
 
 @router.websocket("/ws/trial/{session_id}")
 async def websocket_trial_endpoint(websocket: WebSocket, session_id: str):
-    print(f"[WS_TRIAL] New WebSocket connection for session {session_id}")
+    logger.info("New WebSocket connection for session %s", session_id)
     await websocket.accept()
-    print(f"[WS_TRIAL] WebSocket accepted")
+    logger.debug("WebSocket accepted")
     active_connections[session_id] = websocket
     
-    from routers.trial import trial_sessions
+    from routers.trial import trial_sessions, save_trial_session
     
-    print(f"[WS_TRIAL] Available sessions: {list(trial_sessions.keys())}")
-    print(f"[WS_TRIAL] Looking for session: {session_id}")
+    logger.debug("Looking for session: %s", session_id)
     
-    if session_id not in trial_sessions:
-        print(f"[WS_TRIAL] ERROR: Session {session_id} not found")
-        print(f"[WS_TRIAL] Total sessions in memory: {len(trial_sessions)}")
+    session = await trial_sessions.get(session_id)
+    if session is None:
+        logger.warning("Session %s not found", session_id)
+        logger.debug("Total sessions in store: %s", await trial_sessions.count())
         await websocket.send_json({
             "type": "error",
             "message": "Session not found. Please create a trial session first."
@@ -32,124 +55,511 @@ async def websocket_trial_endpoint(websocket: WebSocket, session_id: str):
         await websocket.close()
         return
     
-    session = trial_sessions[session_id]
-    session["status"] = "active"
-    print(f"[WS_TRIAL] Session {session_id} is now active")
+    session["status"] = TrialStatus.ACTIVE
+    await save_trial_session(session)
+    logger.info("Session %s is now active", session_id)
     
-    await websocket.send_json({
+    outbound = OutboundWriter(
+        websocket,
+        "trial",
+        max_queue=settings.ws_outbound_max_queue,
+        flush_interval=settings.ws_coalesce_interval,
+        max_batch_chars=settings.ws_coalesce_max_chars
+    )
+    
+    await outbound.send_json({
         "type": "connected",
         "message": "Connected to trial session",
         "session_id": session_id
     })
-    print(f"[WS_TRIAL] Sent connected message to client")
+    logger.debug("Sent connected message to client")
+    
+    bus_task = asyncio.create_task(forward_bus_events(outbound, session_id, session))
+    runner = TurnRunner(f"trial:{session_id}", settings.ws_max_pending_messages)
+    turn_runners[session_id] = runner
     
     try:
         while True:
-            print(f"[WS_TRIAL] Waiting for message on session {session_id}...")
-            data = await websocket.receive_json()
-            print(f"[WS_TRIAL] Received message: type={data.get('type')}, keys={list(data.keys())}")
+            logger.debug("Waiting for message on session %s...", session_id)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            if message.get("bytes") is not None:
+                logger.debug("Routing binary frame (%s bytes) to audio handler", len(message['bytes']))
+                await handle_binary_frame(outbound, session_id, message["bytes"], session)
+                continue
+            
+            data = json.loads(message["text"])
+            logger.debug("Received message: type=%s, keys=%s", data.get('type'), list(data.keys()))
             
             if data["type"] == "audio":
-                print(f"[WS_TRIAL] Routing to audio handler")
-                await handle_audio_message(websocket, session_id, data, session)
+                logger.debug("Routing to audio handler")
+                await start_user_turn(outbound, session_id, handle_audio_message, data, session)
             
             elif data["type"] == "text":
-                print(f"[WS_TRIAL] Routing to text handler")
-                await handle_text_message(websocket, session_id, data, session)
+                logger.debug("Routing to text handler")
+                await start_user_turn(outbound, session_id, handle_text_message, data, session)
+            
+            elif data["type"] == "audio_stream_start":
+                logger.debug("Starting live transcription")
+                await interrupt_agent_turn(outbound, session_id)
+                await handle_audio_stream_start(outbound, session_id, data, session)
+            
+            elif data["type"] == "audio_chunk":
+                await handle_audio_chunk(outbound, session_id, data, session)
+            
+            elif data["type"] == "audio_stream_end":
+                logger.debug("Ending live transcription")
+                end_live_transcription(session_id)
+            
+            elif data["type"] == "configure":
+                logger.debug("Routing to configure handler")
+                await handle_configure(outbound, session_id, data, session)
             
             elif data["type"] == "end_trial":
-                print(f"[WS_TRIAL] End trial requested")
-                session["status"] = "ended"
-                await websocket.send_json({
+                logger.info("End trial requested")
+                runner.interrupt()
+                session["status"] = TrialStatus.ENDED
+                await outbound.send_json({
                     "type": "trial_ended",
                     "message": "Trial session ended"
                 })
                 break
             else:
-                print(f"[WS_TRIAL] Unknown message type: {data['type']}")
+                logger.warning("Unknown message type: %s", data['type'])
     
     except WebSocketDisconnect:
-        print(f"[WS_TRIAL] Client disconnected from session {session_id}")
+        logger.info("Client disconnected from session %s", session_id)
         if session_id in active_connections:
             del active_connections[session_id]
-        session["status"] = "paused"
+        session["status"] = TrialStatus.PAUSED
     
     except Exception as e:
-        print(f"[WS_TRIAL] ERROR in websocket loop: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
-        await websocket.send_json({
+        logger.exception("Error in websocket loop: %s: %s", type(e).__name__, e)
+        await outbound.send_json({
             "type": "error",
             "message": str(e)
         })
         if session_id in active_connections:
             del active_connections[session_id]
+    
+    finally:
+        bus_task.cancel()
+        if turn_runners.get(session_id) is runner:
+            del turn_runners[session_id]
+        await runner.close()
+        await cancel_live_transcription(session_id)
+        await outbound.close()
+        await save_trial_session(session)
+
+async def interrupt_agent_turn(websocket: OutboundWriter, session_id: str):
+    runner = turn_runners.get(session_id)
+    if runner is not None and runner.interrupt():
+        await websocket.send_json({
+            "type": "agent_interrupted",
+            "message": "Agent response interrupted by new user input"
+        })
+
+async def start_user_turn(
+    websocket: OutboundWriter,
+    session_id: str,
+    handler: Handler,
+    *args
+):
+    # A new utterance barges in: the reply still streaming (LLM and TTS) is
+    # cancelled so its upstream stream is released before the next turn starts.
+    await interrupt_agent_turn(websocket, session_id)
+    
+    runner = turn_runners.get(session_id)
+    if runner is None or not runner.submit(handler, websocket, session_id, *args):
+        await websocket.send_json({
+            "type": "error",
+            "message": "Too many pending messages"
+        })
+
+async def forward_bus_events(
+    websocket: OutboundWriter,
+    session_id: str,
+    session: Dict[str, Any]
+):
+    from routers.trial import trial_sessions
+    
+    try:
+        async for event in event_bus.subscribe(f"trial:{session_id}"):
+            logger.debug("Bus event for session %s: %s", session_id, event.get('type'))
+            
+            if event.get("type") == "context_updated":
+                latest = await trial_sessions.get(session_id)
+                if latest is not None:
+                    session["case_context"] = latest["case_context"]
+                await websocket.send_json(event)
+            
+            elif event.get("type") == "trial_ended":
+                session["status"] = TrialStatus.ENDED
+                await websocket.send_json({
+                    "type": "trial_ended",
+                    "message": "Trial session ended"
+                })
+                await websocket.close(code=1000)
+                return
+            
+            else:
+                await websocket.send_json(event)
+    
+    except asyncio.CancelledError:
+        raise
+    
+    except SlowSubscriberError as e:
+        # Events were lost, so have the client reconnect and reload the session.
+        logger.warning("Closing trial socket %s: %s", session_id, e)
+        await websocket.close(code=1013)
+    
+    except Exception as e:
+        logger.error("Error forwarding bus events: %s: %s", type(e).__name__, e)
+
+async def handle_configure(
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    if "streaming_tts" in data:
+        session["streaming_tts"] = bool(data["streaming_tts"])
+    if "binary_audio" in data:
+        session["binary_audio"] = bool(data["binary_audio"])
+    
+    logger.debug("Session %s: streaming_tts=%s, binary_audio=%s", session_id, session.get('streaming_tts', False), session.get('binary_audio', False))
+    
+    from routers.trial import save_trial_session
+    await save_trial_session(session)
+    
+    await websocket.send_json({
+        "type": "configured",
+        "streaming_tts": session.get("streaming_tts", False),
+        "binary_audio": session.get("binary_audio", False)
+    })
+
+async def send_agent_audio(
+    websocket: Union[OutboundWriter, Lane],
+    session: Dict[str, Any],
+    role: str,
+    audio_bytes: bytes,
+    text: str,
+    seq: Optional[int] = None
+):
+    if session.get("binary_audio"):
+        # The binary header has no room for text, so the sentence goes in a
+        # small JSON frame just ahead of the audio it captions.
+        await websocket.send_json({
+            "type": "agent_audio_caption",
+            "role": role,
+            "seq": 0 if seq is None else seq,
+            "text": text
+        })
+        if seq is None:
+            frame = encode_audio_frame(FRAME_AGENT_AUDIO, role, 0, audio_bytes, FLAG_FINAL)
+        else:
+            frame = encode_audio_frame(FRAME_AGENT_AUDIO_CHUNK, role, seq, audio_bytes)
+        await websocket.send_bytes(frame)
+        return
+    
+    payload = {
+        "type": "agent_audio" if seq is None else "agent_audio_chunk",
+        "role": role,
+        "audio": base64.b64encode(audio_bytes).decode('utf-8'),
+        "text": text
+    }
+    if seq is not None:
+        payload["seq"] = seq
+    await websocket.send_json(payload)
+
+async def handle_binary_frame(
+    websocket: OutboundWriter,
+    session_id: str,
+    frame: bytes,
+    session: Dict[str, Any]
+):
+    try:
+        frame_type, _, flags, seq, audio_bytes = decode_audio_frame(frame)
+    except AudioFrameError as e:
+        logger.warning("Invalid binary frame: %s", e)
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Invalid binary frame: {str(e)}"
+        })
+        return
+    
+    if frame_type == FRAME_USER_AUDIO_STREAM:
+        live = live_transcriptions.get(session_id)
+        if live is None:
+            await websocket.send_json({
+                "type": "error",
+                "message": "No live transcription in progress. Send audio_stream_start first."
+            })
+            return
+        
+        if audio_bytes:
+            await push_live_audio(websocket, session_id, live, audio_bytes)
+        if flags & FLAG_FINAL:
+            end_live_transcription(session_id)
+        return
+    
+    if frame_type != FRAME_USER_AUDIO:
+        logger.warning("Unexpected binary frame type: %s", frame_type)
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Unexpected binary frame type: {frame_type}"
+        })
+        return
+    
+    logger.debug("Received binary audio frame #%s (%s bytes)", seq, len(audio_bytes))
+    await start_user_turn(websocket, session_id, process_audio, audio_bytes, session)
+
+async def handle_audio_stream_start(
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    await cancel_live_transcription(session_id)
+    
+    stream = AudioStream()
+    task = asyncio.create_task(
+        run_live_transcription(websocket, session_id, stream, session)
+    )
+    live_transcriptions[session_id] = {"stream": stream, "task": task}
+    
+    await websocket.send_json({
+        "type": "audio_stream_started"
+    })
+
+async def handle_audio_chunk(
+    websocket: OutboundWriter,
+    session_id: str,
+    data: Dict[str, Any],
+    session: Dict[str, Any]
+):
+    live = live_transcriptions.get(session_id)
+    if live is None:
+        await websocket.send_json({
+            "type": "error",
+            "message": "No live transcription in progress. Send audio_stream_start first."
+        })
+        return
+    
+    try:
+        audio_bytes = base64.b64decode(data.get("audio", ""))
+    except Exception as e:
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Invalid audio chunk: {str(e)}"
+        })
+        return
+    
+    await push_live_audio(websocket, session_id, live, audio_bytes)
+
+async def push_live_audio(
+    websocket: OutboundWriter,
+    session_id: str,
+    live: Dict[str, Any],
+    audio_bytes: bytes
+):
+    # Never wait on the recognizer here: the receive loop must stay free to
+    # read barge-in, interrupt and end_trial messages.
+    if live["stream"].push(audio_bytes) or not live["stream"].overflowed:
+        return
+    
+    logger.warning("Live transcription for session %s fell behind, ending it", session_id)
+    if live_transcriptions.get(session_id) is live:
+        del live_transcriptions[session_id]
+    live["task"].cancel()
+    await websocket.send_json({
+        "type": "error",
+        "message": "Live transcription fell behind and was stopped. Start a new audio stream."
+    })
+
+def end_live_transcription(session_id: str):
+    live = live_transcriptions.get(session_id)
+    if live is not None:
+        live["stream"].close()
+
+async def cancel_live_transcription(session_id: str):
+    live = live_transcriptions.pop(session_id, None)
+    if live is None:
+        return
+    
+    live["task"].cancel()
+    try:
+        await live["task"]
+    except (asyncio.CancelledError, Exception):
+        pass
+
+async def run_live_transcription(
+    websocket: OutboundWriter,
+    session_id: str,
+    stream: AudioStream,
+    session: Dict[str, Any]
+):
+    try:
+        async for event in speech_service.transcribe_stream(stream):
+            if not event.is_final:
+                await websocket.send_json({
+                    "type": "transcription_interim",
+                    "text": event.text
+                })
+                continue
+            
+            logger.debug("Final transcript: '%s'", event.text)
+            await websocket.send_json({
+                "type": "transcription",
+                "text": event.text
+            })
+            await start_user_turn(
+                websocket,
+                session_id,
+                handle_text_message,
+                {"type": "text", "text": event.text},
+                session
+            )
+    
+    except asyncio.CancelledError:
+        raise
+    
+    except Exception as e:
+        logger.error("Live transcription failed: %s: %s", type(e).__name__, e)
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Live transcription failed: {str(e)}"
+        })
+    
+    finally:
+        live = live_transcriptions.get(session_id)
+        if live is not None and live["stream"] is stream:
+            del live_transcriptions[session_id]
 
 async def handle_audio_message(
-    websocket: WebSocket,
+    websocket: OutboundWriter,
     session_id: str,
     data: Dict[str, Any],
     session: Dict[str, Any]
 ):
-    print(f"[WS_AUDIO] Received audio message for session {session_id}")
-    print(f"[WS_AUDIO] Data keys: {data.keys()}")
+    logger.debug("Received audio message for session %s", session_id)
+    logger.debug("Data keys: %s", data.keys())
     
     try:
         audio_base64 = data.get("audio")
         audio_bytes = base64.b64decode(audio_base64)
-        
+    except Exception as e:
+        logger.warning("Invalid audio message: %s: %s", type(e).__name__, e)
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Audio processing failed: {str(e)}"
+        })
+        return
+    
+    await process_audio(websocket, session_id, audio_bytes, session)
+
+async def process_audio(
+    websocket: OutboundWriter,
+    session_id: str,
+    audio_bytes: bytes,
+    session: Dict[str, Any]
+):
+    try:
         await websocket.send_json({
             "type": "processing",
             "message": "Transcribing audio..."
         })
-        print(f"[WS_AUDIO] Sent processing message to client")
+        logger.debug("Sent processing message to client")
         
-        print(f"[WS_AUDIO] Calling speech service...")
+        logger.debug("Calling speech service...")
         transcript = await speech_service.transcribe_audio(audio_bytes)
-        print(f"[WS_AUDIO] Received transcript: '{transcript}'")
+        logger.debug("Received transcript: '%s'", transcript)
         
         await websocket.send_json({
             "type": "transcription",
             "text": transcript
         })
-        print(f"[WS_AUDIO] Sent transcription to client")
+        logger.debug("Sent transcription to client")
         
-        print(f"[WS_AUDIO] Forwarding to text handler...")
+        logger.debug("Forwarding to text handler...")
         await handle_text_message(
             websocket, 
             session_id, 
             {"type": "text", "text": transcript}, 
             session
         )
-        print(f"[WS_AUDIO] Audio message handling complete")
+        logger.debug("Audio message handling complete")
     
     except Exception as e:
-        print(f"[WS_AUDIO] ERROR: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Audio processing failed: %s: %s", type(e).__name__, e)
         await websocket.send_json({
             "type": "error",
             "message": f"Audio processing failed: {str(e)}"
         })
 
+def start_agent_reply(lane: Lane, session: Dict[str, Any], role: str) -> Dict[str, Any]:
+    pipeline: Optional[SpeechPipeline] = None
+    if session.get("streaming_tts"):
+        async def send_audio_chunk(seq: int, text: str, audio_bytes: bytes):
+            await send_agent_audio(lane, session, role, audio_bytes, text, seq=seq)
+        
+        pipeline = SpeechPipeline(role, send_audio_chunk)
+    
+    return {"lane": lane, "role": role, "parts": [], "pipeline": pipeline}
+
+async def finish_agent_reply(lanes: DeliveryLanes, session: Dict[str, Any], reply: Dict[str, Any]):
+    lane: Lane = reply["lane"]
+    role = reply["role"]
+    text = "".join(reply["parts"])
+    
+    logger.debug("Sending agent_response to client")
+    await lane.send_json({
+        "type": "agent_response",
+        "role": role,
+        "content": text,
+        "timestamp": datetime.now().isoformat()
+    })
+    
+    if reply["pipeline"] is not None:
+        chunk_count = await reply["pipeline"].finish()
+        logger.debug("Streamed %s audio chunks", chunk_count)
+        
+        await lane.send_json({
+            "type": "agent_audio_end",
+            "role": role,
+            "chunks": chunk_count
+        })
+    else:
+        logger.debug("Sending synthesizing to client")
+        await lane.send_json({
+            "type": "synthesizing",
+            "message": "Generating speech..."
+        })
+        
+        logger.debug("Synthesizing speech...")
+        audio_bytes = await speech_service.synthesize_speech(text, role)
+        logger.debug("Speech synthesized: %s bytes", len(audio_bytes))
+        
+        logger.debug("Sending agent_audio to client (%s bytes)", len(audio_bytes))
+        await send_agent_audio(lane, session, role, audio_bytes, text)
+    
+    await lanes.close_lane(lane.index)
+
 async def handle_text_message(
-    websocket: WebSocket,
+    websocket: OutboundWriter,
     session_id: str,
     data: Dict[str, Any],
     session: Dict[str, Any]
 ):
-    print(f"[WS_TEXT] Handling text message: '{data.get('text', '')[:50]}...'")
+    logger.debug("Handling text message: '%s...'", data.get('text', '')[:50])
     try:
         user_text = data.get("text")
         
-        session["messages"].append({
-            "id": f"msg_{len(session['messages'])}",
-            "type": "user",
-            "content": user_text,
-            "timestamp": datetime.now().isoformat()
-        })
+        session["messages"].append("user", user_text)
         
-        print(f"[WS_TEXT] Sending user_message to client")
+        logger.debug("Sending user_message to client")
         await websocket.send_json({
             "type": "user_message",
             "content": user_text,
@@ -158,62 +568,67 @@ async def handle_text_message(
         
         agent_manager = session["agent_manager"]
         
-        print(f"[WS_TEXT] Sending agent_thinking to client")
+        logger.debug("Sending agent_thinking to client")
         await websocket.send_json({
             "type": "agent_thinking",
             "message": "Agent is preparing response..."
         })
         
-        print(f"[WS_TEXT] Getting agent response...")
-        agent_response = await agent_manager.get_agent_response(user_text, session_id)
-        print(f"[WS_TEXT] Agent response received: {len(agent_response.text)} chars")
-        
-        session["messages"].append({
-            "id": f"msg_{len(session['messages'])}",
-            "type": "agent",
-            "role": agent_response.role.value,
-            "content": agent_response.text,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        print(f"[WS_TEXT] Sending agent_response to client")
-        await websocket.send_json({
-            "type": "agent_response",
-            "role": agent_response.role.value,
-            "content": agent_response.text,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        print(f"[WS_TEXT] Sending synthesizing to client")
-        await websocket.send_json({
-            "type": "synthesizing",
-            "message": "Generating speech..."
-        })
-        
-        print(f"[WS_TEXT] Synthesizing speech...")
-        audio_bytes = await speech_service.synthesize_speech(
-            agent_response.text,
-            agent_response.role.value
-        )
-        print(f"[WS_TEXT] Speech synthesized: {len(audio_bytes)} bytes")
+        # Several agents may answer one turn. Their replies and speech are
+        # produced concurrently, and each reply is delivered on its own lane
+        # so the client receives them one after another in responder order.
+        lanes = DeliveryLanes(websocket)
+        replies: Dict[int, Dict[str, Any]] = {}
+        finishing: List[asyncio.Task] = []
         
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        print(f"[WS_TEXT] Sending agent_audio to client ({len(audio_base64)} chars base64)")
+        logger.debug("Streaming agent response...")
+        try:
+            async with aclosing(agent_manager.stream_agent_response(user_text, session_id)) as deltas:
+                async for delta in deltas:
+                    reply = replies.get(delta.position)
+                    if reply is None:
+                        reply = start_agent_reply(lanes.lane(delta.position), session, delta.role.value)
+                        replies[delta.position] = reply
+                    
+                    if delta.is_final:
+                        finishing.append(asyncio.create_task(
+                            finish_agent_reply(lanes, session, reply)
+                        ))
+                        continue
+                    
+                    reply["parts"].append(delta.text)
+                    await reply["lane"].send_json({
+                        "type": "agent_response_delta",
+                        "role": reply["role"],
+                        "text": delta.text
+                    })
+                    if reply["pipeline"] is not None:
+                        reply["pipeline"].feed(delta.text)
+            
+            for position in sorted(replies):
+                reply = replies[position]
+                logger.debug("Agent response received from %s: %s chars", reply["role"], len("".join(reply["parts"])))
+                session["messages"].append(reply["role"], "".join(reply["parts"]))
+            
+            await asyncio.gather(*finishing)
+        except BaseException:
+            for task in finishing:
+                task.cancel()
+            for reply in replies.values():
+                if reply["pipeline"] is not None:
+                    await reply["pipeline"].cancel()
+            await asyncio.gather(*finishing, return_exceptions=True)
+            raise
         
-        await websocket.send_json({
-            "type": "agent_audio",
-            "role": agent_response.role.value,
-            "audio": audio_base64,
-            "text": agent_response.text
-        })
-        print(f"[WS_TEXT] Text message handling complete")
+        logger.debug("Text message handling complete")
     
     except Exception as e:
-        print(f"[WS_TEXT] ERROR: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Message processing failed: %s: %s", type(e).__name__, e)
         await websocket.send_json({
             "type": "error",
             "message": f"Message processing failed: {str(e)}"
         })
-
+    
+    finally:
+        from routers.trial import save_trial_session
+        await save_trial_session(session)
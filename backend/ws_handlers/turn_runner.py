@@ -0,0 +1,74 @@
+from typing import Any, Awaitable, Callable, Deque, Optional, Tuple
+from collections import deque
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[None]]
+
+class TurnRunner:
+    """Runs a connection's long-running handlers off the WebSocket reader.
+
+    The reader keeps receiving while a reply streams, so it still sees
+    barge-in and control messages. Jobs run one at a time in submission
+    order. ``interrupt`` cancels the running job if it is interruptible (an
+    agent turn) and drops interruptible jobs that have not started yet;
+    non-interruptible jobs such as file uploads always run.
+    """
+
+    def __init__(self, name: str, max_pending: int):
+        self.name = name
+        self.max_pending = max_pending
+        self.pending: Deque[Tuple[Handler, Tuple[Any, ...], bool]] = deque()
+        self.wakeup = asyncio.Event()
+        self.current: Optional[asyncio.Task] = None
+        self.current_interruptible = False
+        self.worker = asyncio.create_task(self._run())
+
+    def submit(self, handler: Handler, *args, interruptible: bool = True) -> bool:
+        if len(self.pending) >= self.max_pending:
+            return False
+
+        self.pending.append((handler, args, interruptible))
+        self.wakeup.set()
+        return True
+
+    def interrupt(self) -> bool:
+        self.pending = deque(job for job in self.pending if not job[2])
+
+        if self.current is not None and self.current_interruptible and not self.current.done():
+            logger.info("%s: interrupting %s", self.name, self.current.get_name())
+            self.current.cancel()
+            return True
+        return False
+
+    async def _run(self):
+        while True:
+            if not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            handler, args, interruptible = self.pending.popleft()
+            task = asyncio.create_task(handler(*args), name=handler.__name__)
+            self.current = task
+            self.current_interruptible = interruptible
+
+            # asyncio.wait does not propagate the job's cancellation, so only
+            # cancelling the runner itself stops this loop.
+            await asyncio.wait({task})
+            self.current = None
+
+            if not task.cancelled() and task.exception() is not None:
+                error = task.exception()
+                logger.error("%s: %s failed: %s: %s", self.name, handler.__name__, type(error).__name__, error)
+
+    async def close(self):
+        self.pending.clear()
+        self.worker.cancel()
+        tasks = [self.worker]
+        if self.current is not None:
+            self.current.cancel()
+            tasks.append(self.current)
+        await asyncio.gather(*tasks, return_exceptions=True)